@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+# Benchmark scripts for ezmd; run them from the repo root, e.g. `python -m benchmarks.bench_pdf_parallel`.
@@ -0,0 +1,235 @@
+"""
+End-to-end conversion benchmark over a generated multi-format corpus.
+
+Builds the corpus from benchmarks/corpus.py (PDF, DOCX, PPTX, XLSX, HTML and
+PNGs of several sizes), then drives converter.convert_document for every
+document, once from the local path and once through a local HTTP server (the
+URL path: download into raw/ + conversion). Each (format, mode) runs in a fresh
+process so its peak RSS can be reported; the first conversion there is a
+warm-up and is not timed. The conversion cache, catalog and metrics log are
+off, and the server ignores conditional requests, so every run does the work.
+
+Reports per format and mode: documents/s, MB/s, p50/p95 latency and peak RSS,
+and compares them against a stored baseline (JSON); anything slower or larger
+than the tolerance is flagged and the exit code is 1.
+
+Usage (from the repo root):
+  python -m benchmarks.bench_convert                        # compare with benchmarks/baseline_convert.json
+  python -m benchmarks.bench_convert --save-baseline        # record a new baseline
+  python -m benchmarks.bench_convert --formats pdf html --repeat 5 --scale 0.5
+  python -m benchmarks.bench_convert --modes local --tolerance 0.5
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import multiprocessing
+
+from ezmd.metrics import percentile
+from .corpus import CORPUS_SPEC, build_corpus
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_convert.json")
+MODES = ("local", "url")
+
+
+class _FullResponseHandler(SimpleHTTPRequestHandler):
+    """
+    Serves the corpus; conditional headers are dropped so every fetch is a 200.
+    """
+
+    def send_head(self):
+        for header in ("If-Modified-Since", "If-None-Match", "If-Range", "Range"):
+            del self.headers[header]
+        return super().send_head()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_server(directory: str) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_FullResponseHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_group(docs: list, mode: str, base_url: str, workdir: str, repeat: int) -> dict:
+    """
+    Runs in a fresh process: converts every doc `repeat` times (after one
+    untimed warm-up) and returns latencies and peak RSS.
+    """
+    from ezmd.converter import convert_document
+
+    config = {
+        "base_context_dir": workdir,
+        "catalog": {"enabled": False},
+        "metrics": {"enabled": False},
+        "ingest": {"mode": "copy"},
+    }
+
+    def _convert(doc: dict, i: int) -> float:
+        source = doc["path"] if mode == "local" else f"{base_url}/{doc['name']}"
+        start = time.perf_counter()
+        convert_document(f"bench {doc['name']} {i}", source, config, "", overwrite=True,
+                         collision_policy="overwrite", use_cache=False)
+        return time.perf_counter() - start
+
+    _convert(docs[0], 0)
+    latencies = []
+    total_bytes = 0
+    start = time.perf_counter()
+    for i in range(repeat):
+        for doc in docs:
+            latencies.append(_convert(doc, i))
+            total_bytes += doc["bytes"]
+    wall = time.perf_counter() - start
+    return {
+        "docs": len(latencies),
+        "wall_sec": wall,
+        "latencies": latencies,
+        "bytes": total_bytes,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _summarise(raw: dict) -> dict:
+    latencies = sorted(raw["latencies"])
+    return {
+        "docs": raw["docs"],
+        "docs_per_sec": round(raw["docs"] / raw["wall_sec"], 3),
+        "mb_per_sec": round(raw["bytes"] / raw["wall_sec"] / (1024 * 1024), 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "peak_rss_mb": round(raw["peak_rss_mb"], 1),
+    }
+
+
+def _environment() -> dict:
+    try:
+        from importlib.metadata import version
+        markitdown_version = version("markitdown")
+    except Exception:
+        markitdown_version = "unknown"
+    return {
+        "markitdown": markitdown_version,
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, rss_tolerance: float) -> list:
+    """
+    Regressions as (key, metric, baseline, current): p50/p95 latency or peak
+    RSS above baseline * (1 + tolerance), throughput below baseline / (1 + tolerance).
+    """
+    regressions = []
+    for key, cur in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            if cur[metric] > base[metric] * (1 + tolerance):
+                regressions.append((key, metric, base[metric], cur[metric]))
+        if cur["docs_per_sec"] < base["docs_per_sec"] / (1 + tolerance):
+            regressions.append((key, "docs_per_sec", base["docs_per_sec"], cur["docs_per_sec"]))
+        if cur["peak_rss_mb"] > base["peak_rss_mb"] * (1 + rss_tolerance):
+            regressions.append((key, "peak_rss_mb", base["peak_rss_mb"], cur["peak_rss_mb"]))
+    return regressions
+
+
+def main(argv=None) -> int:
+    formats_available = sorted({fmt for _, fmt, _, _ in CORPUS_SPEC})
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--formats", nargs="*", choices=formats_available, default=formats_available)
+    parser.add_argument("--modes", nargs="*", choices=MODES, default=list(MODES))
+    parser.add_argument("--repeat", type=int, default=3, help="Timed conversions per document (default: 3).")
+    parser.add_argument("--scale", type=float, default=1.0, help="Scale document sizes (default: 1.0).")
+    parser.add_argument("--corpus-dir", default=None,
+                        help="Where to build/keep the corpus (default: a temporary directory).")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against / save to.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown before flagging, as a fraction (default: 0.25).")
+    parser.add_argument("--rss-tolerance", type=float, default=0.15,
+                        help="Allowed peak RSS growth before flagging, as a fraction (default: 0.15).")
+    parser.add_argument("--json", default=None, help="Also write the results to this path.")
+    args = parser.parse_args(argv)
+
+    tmpdir = tempfile.TemporaryDirectory(prefix="ezmd-bench-")
+    corpus_dir = args.corpus_dir or os.path.join(tmpdir.name, "corpus")
+    print(f"[info] Building corpus in {corpus_dir} (scale {args.scale:g})...")
+    docs = build_corpus(corpus_dir, scale=args.scale, formats=args.formats)
+    server = _start_server(corpus_dir)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    results = {}
+    ctx = multiprocessing.get_context("spawn")
+    print(f"\n{'format/mode':<14} {'docs':>5} {'docs/s':>8} {'MB/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'RSS MB':>8}")
+    try:
+        for fmt in args.formats:
+            group = [d for d in docs if d["format"] == fmt]
+            for mode in args.modes:
+                workdir = os.path.join(tmpdir.name, f"out_{fmt}_{mode}")
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                    raw = pool.submit(_run_group, group, mode, base_url, workdir, args.repeat).result()
+                key = f"{fmt}/{mode}"
+                res = results[key] = _summarise(raw)
+                print(f"{key:<14} {res['docs']:>5} {res['docs_per_sec']:>8.2f} {res['mb_per_sec']:>8.2f} "
+                      f"{res['p50_ms']:>9.1f} {res['p95_ms']:>9.1f} {res['peak_rss_mb']:>8.1f}")
+    finally:
+        server.shutdown()
+        tmpdir.cleanup()
+
+    report = {"environment": _environment(), "settings": {"repeat": args.repeat, "scale": args.scale},
+              "results": results}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[info] Baseline saved to {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"\n[info] No baseline at {args.baseline}; record one with --save-baseline.")
+        return 0
+
+    if baseline.get("settings") != report["settings"]:
+        print(f"\n[!] Baseline was recorded with {baseline.get('settings')}; numbers may not be comparable.")
+    if baseline.get("environment") != report["environment"]:
+        print(f"[info] Environment changed: {baseline.get('environment')} -> {report['environment']}")
+
+    regressions = compare(results, baseline.get("results", {}), args.tolerance, args.rss_tolerance)
+    if not regressions:
+        print(f"\n[+] No regressions against {args.baseline} "
+              f"(tolerance {args.tolerance:.0%}, RSS {args.rss_tolerance:.0%}).")
+        return 0
+    print(f"\n[!] {len(regressions)} regression(s) against {args.baseline}:")
+    for key, metric, base, cur in regressions:
+        print(f"  {key:<14} {metric:<13} {base:>10} -> {cur:>10}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
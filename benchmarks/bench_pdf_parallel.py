@@ -0,0 +1,73 @@
+"""
+Compare the single MarkItDown call against page-parallel PDF conversion.
+
+Usage (from the repo root):
+  python -m benchmarks.bench_pdf_parallel                  # synthetic 300/600-page PDFs
+  python -m benchmarks.bench_pdf_parallel --pdf big.pdf   # your own document(s)
+  python -m benchmarks.bench_pdf_parallel --pages-per-chunk 10 25 50 --workers 8
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+from markitdown import MarkItDown
+
+from ezmd.converter import _convert_pdf_parallel, _pdf_page_count
+from .corpus import write_text_pdf
+
+
+def _time_it(fn, repeat: int):
+    best = None
+    out = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, out
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", nargs="*", default=None, help="PDF file(s) to benchmark.")
+    parser.add_argument("--pages", nargs="*", type=int, default=[300, 600],
+                        help="Page counts of synthetic PDFs (ignored with --pdf).")
+    parser.add_argument("--pages-per-chunk", nargs="*", type=int, default=[20])
+    parser.add_argument("--workers", type=int, default=0, help="Pool size (0 = CPU count).")
+    parser.add_argument("--repeat", type=int, default=1, help="Keep the best of N runs.")
+    args = parser.parse_args(argv)
+
+    tmpdir = None
+    pdfs = args.pdf
+    if not pdfs:
+        tmpdir = tempfile.TemporaryDirectory(prefix="ezmd-bench-")
+        pdfs = []
+        for n in args.pages:
+            path = os.path.join(tmpdir.name, f"synthetic_{n}p.pdf")
+            write_text_pdf(path, n, seed=n)
+            pdfs.append(path)
+
+    print(f"{'document':<28} {'pages':>6} {'mode':<16} {'seconds':>8} {'speedup':>8} {'chars':>9}")
+    for path in pdfs:
+        pages = _pdf_page_count(path)
+        name = os.path.basename(path)[:28]
+        md = MarkItDown()
+        base_sec, base_out = _time_it(lambda: md.convert(path).text_content, args.repeat)
+        print(f"{name:<28} {pages:>6} {'single':<16} {base_sec:>8.2f} {1.0:>8.2f} {len(base_out):>9}")
+        for chunk in args.pages_per_chunk:
+            sec, out = _time_it(
+                lambda: _convert_pdf_parallel(path, chunk, args.workers or None), args.repeat
+            )
+            mode = f"parallel/{chunk}p"
+            print(f"{name:<28} {pages:>6} {mode:<16} {sec:>8.2f} {base_sec / sec:>8.2f} {len(out):>9}")
+
+    if tmpdir is not None:
+        tmpdir.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
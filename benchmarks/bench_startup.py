@@ -0,0 +1,86 @@
+"""
+Cold-start budget check for the ezmd CLI.
+
+Runs `python -X importtime -c "import ezmd.main"` in fresh interpreters and fails
+(exit code 1) if
+ - any heavy conversion dependency is imported just to open the menus, or
+ - the cumulative import time of ezmd.main exceeds the budget.
+
+Usage (from the repo root):
+  python -m benchmarks.bench_startup
+  python -m benchmarks.bench_startup --budget-ms 80 --runs 10
+"""
+
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+
+# Modules that belong to the conversion path and must not load at startup.
+HEAVY_MODULES = ("markitdown", "requests", "openai", "google.genai", "pdfminer", "magika", "pypdfium2")
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def measure_once(module: str = "ezmd.main"):
+    """
+    Returns (cumulative_us_for_module, set_of_imported_module_names).
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    cumulative = None
+    imported = set()
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        name = m.group(4)
+        imported.add(name)
+        if name == module:
+            cumulative = int(m.group(2))
+    if cumulative is None:
+        raise RuntimeError(f"{module} not found in -X importtime output")
+    return cumulative, imported
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=150.0,
+                        help="Maximum median cumulative import time of ezmd.main (default: 150).")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    # first run warms the bytecode cache and is discarded
+    measure_once()
+    samples = []
+    heavy = set()
+    for _ in range(args.runs):
+        cumulative_us, imported = measure_once()
+        samples.append(cumulative_us / 1000.0)
+        heavy |= {
+            name for name in imported
+            if any(name == h or name.startswith(h + ".") for h in HEAVY_MODULES)
+        }
+
+    median_ms = statistics.median(samples)
+    print(f"ezmd.main import: median {median_ms:.1f} ms, "
+          f"min {min(samples):.1f} ms, max {max(samples):.1f} ms over {args.runs} runs "
+          f"(budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if heavy:
+        print(f"[!] Heavy modules imported at startup: {', '.join(sorted(heavy))}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"[!] Startup regression: {median_ms:.1f} ms > {args.budget_ms:.0f} ms budget")
+        failed = True
+    if not failed:
+        print("[+] Startup within budget.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
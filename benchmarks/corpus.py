@@ -0,0 +1,292 @@
+"""
+Reproducible synthetic inputs for the ezmd benchmarks.
+
+Everything is generated from a fixed seed, with the standard library only
+except PPTX/XLSX, which are written with python-pptx/openpyxl (the libraries
+MarkItDown reads them with), so the same corpus can be rebuilt on any machine.
+
+build_corpus() writes the multi-format corpus used by bench_convert.
+"""
+
+import os
+import re
+import html
+import zlib
+import struct
+import random
+import zipfile
+import datetime
+from xml.sax.saxutils import escape
+
+_WORDS = (
+    "markdown converter document page figure table section result method "
+    "analysis model data sample value result paper abstract introduction "
+    "evaluation baseline throughput latency memory cache network process"
+).split()
+
+
+def lorem_lines(rng: random.Random, n_lines: int, words_per_line: int = 12) -> list:
+    return [
+        " ".join(rng.choice(_WORDS) for _ in range(words_per_line)).capitalize() + "."
+        for _ in range(n_lines)
+    ]
+
+
+def write_text_pdf(path: str, pages: int, lines_per_page: int = 40, seed: int = 0) -> None:
+    """
+    Write a plain-text PDF with `pages` pages of deterministic filler text
+    (Helvetica, one text object per page).
+    """
+    rng = random.Random(seed)
+    objects = []  # body of object i+1
+
+    n_fixed = 3  # catalog, pages, font
+    page_ids = []
+    page_objs = []
+    for p in range(pages):
+        lines = [f"Page {p + 1}"] + lorem_lines(rng, lines_per_page - 1)
+        ops = ["BT", "/F1 10 Tf", "12 TL", "50 760 Td"]
+        for line in lines:
+            ops.append("(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        content_id = n_fixed + 2 * p + 2
+        page_id = n_fixed + 2 * p + 1
+        page_ids.append(page_id)
+        page_objs.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>".encode("latin-1"),
+            b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        ))
+
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode("latin-1"))
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for page_obj, content_obj in page_objs:
+        objects.append(page_obj)
+        objects.append(content_obj)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref_at = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n".encode()
+    out += b"0000000000 65535 f \n"
+    for off in offsets:
+        out += f"{off:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n".encode()
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+# zip entries get a fixed timestamp so rebuilt files are byte-identical
+_ZIP_DATE = (2024, 1, 1, 0, 0, 0)
+_FIXED_DATETIME = datetime.datetime(*_ZIP_DATE)
+
+
+def _write_zip(path: str, members: dict) -> None:
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(zipfile.ZipInfo(name, _ZIP_DATE), data)
+
+
+def _normalize_zip(path: str) -> None:
+    """
+    Rewrite a zip produced by a library with fixed entry timestamps (and a
+    fixed modification date; openpyxl stamps the save time).
+    """
+    with zipfile.ZipFile(path) as zf:
+        members = {name: zf.read(name) for name in zf.namelist()}
+    if "docProps/core.xml" in members:
+        members["docProps/core.xml"] = re.sub(
+            rb"(<dcterms:modified[^>]*>)[^<]*", rb"\g<1>2024-01-01T00:00:00Z", members["docProps/core.xml"]
+        )
+    _write_zip(path, members)
+
+
+def write_docx(path: str, paragraphs: int, seed: int = 0) -> None:
+    """
+    Minimal WordprocessingML document: a heading every 10 paragraphs and a
+    5-column table every 50.
+    """
+    rng = random.Random(seed)
+    body = []
+    for i in range(paragraphs):
+        if i % 10 == 0:
+            body.append('<w:p><w:pPr><w:pStyle w:val="Heading1"/></w:pPr>'
+                        f"<w:r><w:t>Section {i // 10 + 1}</w:t></w:r></w:p>")
+        text = escape(" ".join(lorem_lines(rng, 3)))
+        body.append(f'<w:p><w:r><w:t xml:space="preserve">{text}</w:t></w:r></w:p>')
+        if i % 50 == 49:
+            rows = []
+            for _ in range(8):
+                cells = "".join(f"<w:tc><w:p><w:r><w:t>{rng.choice(_WORDS)} {rng.randint(0, 999)}</w:t></w:r></w:p></w:tc>"
+                                for _ in range(5))
+                rows.append(f"<w:tr>{cells}</w:tr>")
+            body.append(f"<w:tbl>{''.join(rows)}</w:tbl>")
+
+    ns = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+    _write_zip(path, {
+        "[Content_Types].xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            "</Types>"
+        ),
+        "_rels/.rels": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+            'relationships/officeDocument" Target="word/document.xml"/>'
+            "</Relationships>"
+        ),
+        "word/document.xml": (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document {ns}><w:body>'
+            + "".join(body) + "</w:body></w:document>"
+        ),
+    })
+
+
+def write_pptx(path: str, slides: int, seed: int = 0) -> None:
+    """
+    Title-and-content slides with five bullets each; every fifth slide also
+    carries a 4x4 table.
+    """
+    from pptx import Presentation
+    from pptx.util import Inches
+
+    rng = random.Random(seed)
+    prs = Presentation()
+    prs.core_properties.created = prs.core_properties.modified = _FIXED_DATETIME
+    layout = prs.slide_layouts[1]
+    for i in range(slides):
+        slide = prs.slides.add_slide(layout)
+        slide.shapes.title.text = f"Slide {i + 1}: {rng.choice(_WORDS).capitalize()}"
+        frame = slide.placeholders[1].text_frame
+        frame.text = lorem_lines(rng, 1)[0]
+        for line in lorem_lines(rng, 4, 8):
+            frame.add_paragraph().text = line
+        if i % 5 == 4:
+            table = slide.shapes.add_table(4, 4, Inches(1), Inches(5), Inches(8), Inches(1.5)).table
+            for r in range(4):
+                for c in range(4):
+                    table.cell(r, c).text = f"{rng.choice(_WORDS)} {rng.randint(0, 99)}"
+    prs.save(path)
+    _normalize_zip(path)
+
+
+def write_xlsx(path: str, rows: int, seed: int = 0) -> None:
+    """
+    Two sheets: `rows` rows of mixed text/number columns, and a small summary.
+    """
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "data"
+    ws.append(["id", "name", "category", "value", "ratio", "note"])
+    for i in range(rows):
+        ws.append([i, f"item-{i}", rng.choice(_WORDS), rng.randint(0, 100000),
+                   round(rng.random(), 4), " ".join(rng.choice(_WORDS) for _ in range(6))])
+    summary = wb.create_sheet("summary")
+    for word in sorted(set(_WORDS))[:10]:
+        summary.append([word, rng.randint(0, rows)])
+    wb.properties.created = wb.properties.modified = _FIXED_DATETIME
+    wb.save(path)
+    _normalize_zip(path)
+
+
+def write_html(path: str, sections: int, seed: int = 0) -> None:
+    """
+    An article page: navigation, headings, paragraphs, lists and a table per
+    section, plus boilerplate markup MarkItDown has to strip.
+    """
+    rng = random.Random(seed)
+    parts = ["<!DOCTYPE html><html><head><meta charset='utf-8'><title>Benchmark article</title>",
+             "<style>body{font-family:sans-serif}</style><script>var x=1;</script></head><body>",
+             "<nav><ul>" + "".join(f"<li><a href='#s{i}'>Section {i + 1}</a></li>" for i in range(sections)) + "</ul></nav>",
+             "<main><h1>Benchmark article</h1>"]
+    for i in range(sections):
+        parts.append(f"<section id='s{i}'><h2>Section {i + 1}</h2>")
+        for line in lorem_lines(rng, 4, 30):
+            parts.append(f"<p>{html.escape(line)} <a href='https://example.com/{i}'>link</a></p>")
+        parts.append("<ul>" + "".join(f"<li>{html.escape(line)}</li>" for line in lorem_lines(rng, 5, 6)) + "</ul>")
+        rows = "".join(
+            "<tr>" + "".join(f"<td>{rng.randint(0, 999)}</td>" for _ in range(4)) + "</tr>" for _ in range(6)
+        )
+        parts.append(f"<table><tr><th>a</th><th>b</th><th>c</th><th>d</th></tr>{rows}</table></section>")
+    parts.append("</main><footer>generated</footer></body></html>")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(parts))
+
+
+def write_png(path: str, width: int, height: int, seed: int = 0) -> None:
+    """
+    RGB PNG: a gradient with noisy blocks, so it neither compresses to
+    nothing nor is pure noise.
+    """
+    rng = random.Random(seed)
+    block_noise = [rng.randrange(64) for _ in range(64)]
+    raw = bytearray()
+    for y in range(height):
+        raw.append(0)  # filter: none
+        for x in range(width):
+            n = block_noise[((y // 16) * 7 + x // 16) % 64]
+            raw += bytes(((x * 255 // width + n) & 255, (y * 255 // height + n) & 255, (n * 4) & 255))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(bytes(raw), 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+# (name, format, writer, size argument); sizes are scaled by build_corpus(scale=...)
+CORPUS_SPEC = (
+    ("report_small.pdf", "pdf", write_text_pdf, 5),
+    ("report_large.pdf", "pdf", write_text_pdf, 60),
+    ("memo_small.docx", "docx", write_docx, 20),
+    ("memo_large.docx", "docx", write_docx, 400),
+    ("deck_small.pptx", "pptx", write_pptx, 10),
+    ("deck_large.pptx", "pptx", write_pptx, 60),
+    ("sheet_small.xlsx", "xlsx", write_xlsx, 200),
+    ("sheet_large.xlsx", "xlsx", write_xlsx, 5000),
+    ("article_small.html", "html", write_html, 5),
+    ("article_large.html", "html", write_html, 100),
+    ("image_small.png", "png", write_png, 256),
+    ("image_medium.png", "png", write_png, 1024),
+    ("image_large.png", "png", write_png, 2048),
+)
+
+
+def build_corpus(directory: str, scale: float = 1.0, formats=None) -> list:
+    """
+    Write the corpus into directory; returns [{name, format, path, bytes}].
+    Existing files are kept (the output is deterministic), so repeated runs
+    skip generation.
+    """
+    os.makedirs(directory, exist_ok=True)
+    docs = []
+    for i, (name, fmt, writer, size) in enumerate(CORPUS_SPEC):
+        if formats and fmt not in formats:
+            continue
+        path = os.path.join(directory, name)
+        n = max(1, int(size * scale))
+        if not os.path.exists(path):
+            if writer is write_png:
+                writer(path, n, n, seed=i)
+            else:
+                writer(path, n, seed=i)
+        docs.append({"name": name, "format": fmt, "path": path, "bytes": os.path.getsize(path)})
+    return docs
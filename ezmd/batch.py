@@ -0,0 +1,255 @@
+"""
+Non-interactive batch conversion, invoked as `ezmd batch <manifest>`.
+
+Reads a manifest of (title, source, provider) rows and runs
+converter.convert_document for each row across a supervised process pool
+(see isolation.py): a document that exhausts memory, hangs or crashes its
+worker fails on its own, with an error record in the results, and the run
+goes on. Collisions are resolved by policy (skip/version/overwrite) instead
+of prompting.
+
+Manifest formats:
+ - .csv   -> header row with at least "title" and "source" (and optionally "provider")
+ - .jsonl -> one JSON object per line with the same keys
+
+With sync=True (`--sync`), all new outputs are queued in the durable sync queue
+for every auto_sync remote and pushed at the end of the run (one batched rsync
+per remote, remotes in parallel). Failed pushes stay queued for retry.
+
+Exit codes:
+ 0 -> every job converted (or was skipped by policy)
+ 1 -> at least one job failed
+ 2 -> the manifest or config could not be loaded
+"""
+
+import os
+import csv
+import json
+import time
+from concurrent.futures import as_completed
+from typing import List, Optional
+
+from .isolation import SupervisedPool, WorkerFailed, error_record
+from .windows_path_utils import is_windows_path, translate_windows_path_to_wsl
+
+EXIT_OK = 0
+EXIT_JOB_FAILED = 1
+EXIT_BAD_INPUT = 2
+
+
+def load_manifest(manifest_path: str) -> List[dict]:
+    """
+    Parse a CSV or JSONL manifest into a list of job dicts
+    with keys: index, title, source, provider.
+
+    Relative local sources are resolved against the manifest's directory.
+    Raises ValueError for unsupported formats or rows missing title/source.
+    """
+    _, ext = os.path.splitext(manifest_path)
+    ext = ext.lower()
+
+    rows = []
+    with open(manifest_path, "r", encoding="utf-8", newline="") as f:
+        if ext == ".csv":
+            for row in csv.DictReader(f):
+                rows.append(row)
+        elif ext in (".jsonl", ".ndjson"):
+            for lineno, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Line {lineno}: invalid JSON ({e})")
+        else:
+            raise ValueError(f"Unsupported manifest format '{ext}' (expected .csv or .jsonl)")
+
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+    jobs = []
+    for idx, row in enumerate(rows, start=1):
+        title = (row.get("title") or "").strip()
+        source = (row.get("source") or "").strip()
+        if not title or not source:
+            raise ValueError(f"Row {idx}: both 'title' and 'source' are required")
+
+        if not source.startswith("http"):
+            if is_windows_path(source):
+                source = translate_windows_path_to_wsl(source)
+            elif not os.path.isabs(source) and os.path.exists(os.path.join(manifest_dir, source)):
+                source = os.path.join(manifest_dir, source)
+
+        jobs.append({
+            "index": idx,
+            "title": title,
+            "source": source,
+            "provider": (row.get("provider") or "").strip(),
+        })
+    return jobs
+
+
+def run_job(job: dict, config: dict, collision_policy: str, use_cache: bool = True,
+            profile: bool = False) -> dict:
+    """
+    Worker entry point. Runs in a pool process, so it must never raise:
+    every outcome is reported back as a result dict.
+    """
+    from .converter import convert_document, ConversionSkipped
+
+    result = {
+        "index": job["index"],
+        "title": job["title"],
+        "source": job["source"],
+        "status": "ok",
+        "md_path": None,
+        "error": None,
+        "error_info": None,
+    }
+    start = time.time()
+    try:
+        if not job["source"].startswith("http") and not os.path.exists(job["source"]):
+            raise FileNotFoundError(f"Local file path does not exist: {job['source']}")
+        result["md_path"] = convert_document(
+            title=job["title"],
+            source=job["source"],
+            config=config,
+            provider=job["provider"],
+            overwrite=(collision_policy == "overwrite"),
+            collision_policy=collision_policy,
+            use_cache=use_cache,
+            profile=profile,
+        )
+    except ConversionSkipped as ex:
+        result["status"] = "skipped"
+        result["error"] = str(ex)
+    except Exception as ex:
+        result["status"] = "failed"
+        result["error"] = f"{type(ex).__name__}: {ex}"
+        result["error_info"] = error_record("exception", result["error"], type=type(ex).__name__)
+    result["elapsed_sec"] = round(time.time() - start, 3)
+    return result
+
+
+def job_result(job: dict, future) -> dict:
+    """
+    The future's result dict, or a failed one if the worker itself died.
+    """
+    try:
+        return future.result()
+    except WorkerFailed as ex:
+        return {
+            "index": job["index"],
+            "title": job["title"],
+            "source": job["source"],
+            "status": "failed",
+            "md_path": None,
+            "error": str(ex),
+            "error_info": ex.record,
+            "elapsed_sec": ex.record.get("elapsed_sec"),
+        }
+
+
+def run_batch(
+    manifest_path: str,
+    config: dict,
+    workers: Optional[int] = None,
+    collision_policy: str = "version",
+    default_provider: Optional[str] = None,
+    results_path: Optional[str] = None,
+    use_cache: bool = True,
+    sync: bool = False,
+    profile: bool = False,
+) -> int:
+    """
+    Run every job in the manifest and print a per-job line plus a summary.
+    Returns the process exit code.
+    """
+    try:
+        jobs = load_manifest(manifest_path)
+    except (OSError, ValueError) as e:
+        print(f"[!] Could not read manifest {manifest_path}: {e}")
+        return EXIT_BAD_INPUT
+
+    if not jobs:
+        print("[info] Manifest is empty, nothing to do.")
+        return EXIT_OK
+
+    if default_provider is None:
+        default_provider = config.get("default_provider") or ""
+    for job in jobs:
+        if not job["provider"]:
+            job["provider"] = default_provider
+
+    if not workers or workers < 1:
+        workers = config.get("batch_workers") or os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+
+    print(f"[info] Converting {len(jobs)} document(s) with {workers} worker(s), "
+          f"collision policy '{collision_policy}'.")
+
+    results = []
+    start = time.time()
+    with SupervisedPool(workers, config) as pool:
+        futures = {pool.submit(run_job, job, config, collision_policy, use_cache, profile): job for job in jobs}
+        for done, fut in enumerate(as_completed(futures), start=1):
+            res = job_result(futures[fut], fut)
+            results.append(res)
+            prefix = f"({done}/{len(jobs)}) {res['title']}"
+            if res["status"] == "ok":
+                print(f"[+] {prefix} -> {res['md_path']} [{res['elapsed_sec']}s]")
+            elif res["status"] == "skipped":
+                print(f"[-] {prefix} skipped: {res['error']}")
+            else:
+                print(f"[!] {prefix} failed: {res['error']}")
+    elapsed = time.time() - start
+
+    results.sort(key=lambda r: r["index"])
+    if results_path:
+        try:
+            with open(results_path, "w", encoding="utf-8") as f:
+                for res in results:
+                    f.write(json.dumps(res) + "\n")
+        except OSError as e:
+            print(f"[!] Failed to write results file: {e}")
+
+    n_ok = sum(1 for r in results if r["status"] == "ok")
+    n_skipped = sum(1 for r in results if r["status"] == "skipped")
+    n_failed = sum(1 for r in results if r["status"] == "failed")
+    print(f"\n[Batch summary] {n_ok} converted, {n_skipped} skipped, "
+          f"{n_failed} failed in {elapsed:.1f}s")
+    for res in results:
+        if res["status"] == "failed":
+            print(f"  [!] #{res['index']} {res['title']}: {res['error']}")
+
+    sync_failed = False
+    if sync:
+        sync_failed = not _sync_outputs(results, config)
+
+    return EXIT_JOB_FAILED if (n_failed or sync_failed) else EXIT_OK
+
+
+def _sync_outputs(results: List[dict], config: dict) -> bool:
+    """
+    Queue every converted .md for each auto_sync remote, then drain the queue
+    once in the foreground. Returns False if any remote failed.
+    """
+    from .rsync_manager import print_sync_summary
+    from .sync_queue import SyncQueue, drain_once
+
+    outputs = [r["md_path"] for r in results if r["status"] == "ok" and r["md_path"]]
+    remotes = {
+        alias: info for alias, info in config.get("remotes", {}).items()
+        if info.get("auto_sync", False)
+    }
+    if not outputs or not remotes:
+        return True
+
+    print(f"[info] Syncing {len(outputs)} file(s) to {len(remotes)} remote(s)...")
+    queue = SyncQueue()
+    queue.enqueue(outputs, remotes)
+    results = drain_once(queue, config)
+    print_sync_summary(results)
+    if not all(r["ok"] for r in results):
+        print("[!] Some pushes failed; they remain queued (see `ezmd sync-status`).")
+        return False
+    return True
@@ -0,0 +1,136 @@
+"""
+Catalog of converted documents.
+
+Every conversion is recorded in a SQLite database inside base_context_dir
+(<base_context_dir>/.ezmd_catalog.db): canonical source, SHA-256 of the raw
+file, title, raw/md paths, sizes and timings. On ingest, convert_document looks
+the content hash up (for URLs, after the conditional download) and, if the same
+document was already converted with the same settings, links the existing
+outputs under the new name or skips it instead of converting it again.
+
+Set "duplicates" in the "catalog" config section to "link" (default), "skip"
+or "convert" (always convert, but still record).
+"""
+
+import os
+import time
+import sqlite3
+from contextlib import contextmanager
+from typing import Optional
+
+DUPLICATE_POLICIES = ("link", "skip", "convert")
+
+DEFAULT_CATALOG_SETTINGS = {
+    "enabled": True,
+    "duplicates": "link",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    source TEXT NOT NULL,
+    content_sha256 TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    raw_path TEXT,
+    md_path TEXT NOT NULL,
+    raw_bytes INTEGER,
+    md_bytes INTEGER,
+    fetch_sec REAL,
+    convert_sec REAL,
+    duplicate_of INTEGER,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_source ON documents (source, variant);
+CREATE INDEX IF NOT EXISTS idx_documents_sha ON documents (content_sha256, variant);
+"""
+
+
+def get_catalog_settings(config: Optional[dict]) -> dict:
+    settings = dict(DEFAULT_CATALOG_SETTINGS)
+    if config:
+        settings.update(config.get("catalog", {}) or {})
+    return settings
+
+
+def get_catalog_path(config: dict) -> str:
+    base_context = os.path.expanduser(config.get("base_context_dir", "~/context"))
+    return os.path.join(base_context, ".ezmd_catalog.db")
+
+
+class Catalog:
+    """
+    Thin wrapper over the SQLite catalog; one connection per call, so several
+    batch workers can record conversions at the same time.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _find(self, column: str, value: str, variant: str, prefer_md_path: Optional[str] = None) -> Optional[dict]:
+        """
+        The entry for prefer_md_path if there is one, else the most recent entry
+        whose markdown still exists on disk.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM documents WHERE {column} = ? AND variant = ? ORDER BY id DESC",
+                (value, variant),
+            ).fetchall()
+        rows = [dict(row) for row in rows if os.path.isfile(row["md_path"])]
+        for row in rows:
+            if row["md_path"] == prefer_md_path:
+                return row
+        return rows[0] if rows else None
+
+    def find_by_hash(self, content_sha256: str, variant: str, prefer_md_path: Optional[str] = None) -> Optional[dict]:
+        return self._find("content_sha256", content_sha256, variant, prefer_md_path)
+
+    def record(
+        self,
+        title: str,
+        source: str,
+        content_sha256: str,
+        variant: str,
+        raw_path: Optional[str],
+        md_path: str,
+        fetch_sec: Optional[float] = None,
+        convert_sec: Optional[float] = None,
+        duplicate_of: Optional[int] = None,
+    ) -> int:
+        raw_bytes = os.path.getsize(raw_path) if raw_path and os.path.exists(raw_path) else None
+        md_bytes = os.path.getsize(md_path) if os.path.exists(md_path) else None
+        with self._connect() as conn:
+            # re-converting onto the same output replaces the old entry
+            conn.execute("DELETE FROM documents WHERE md_path = ?", (md_path,))
+            cur = conn.execute(
+                "INSERT INTO documents (title, source, content_sha256, variant, raw_path, md_path, "
+                "raw_bytes, md_bytes, fetch_sec, convert_sec, duplicate_of, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (title, source, content_sha256, variant, raw_path, md_path, raw_bytes, md_bytes,
+                 fetch_sec, convert_sec, duplicate_of, time.time()),
+            )
+            return cur.lastrowid
+
+
+def get_catalog(config: dict) -> Optional[Catalog]:
+    """
+    Returns the catalog for base_context_dir, or None if disabled in config.
+    """
+    if not get_catalog_settings(config).get("enabled", True):
+        return None
+    return Catalog(get_catalog_path(config))
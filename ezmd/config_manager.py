@@ -26,6 +26,104 @@ DEFAULT_CONFIG = {
         }
     },
     "default_provider": None,
+    # Content-addressed conversion cache under base_context_dir/.ezmd_cache
+    "conversion_cache": {
+        "enabled": True,
+        "max_mb": 1024
+    },
+    # How sources land in raw/: reflink | hardlink | symlink | copy | direct (no raw copy:
+    # local files are converted in place, URLs streamed via a buffer of up to spool_max_mb in memory)
+    "ingest": {
+        "mode": "reflink",
+        "spool_max_mb": 64
+    },
+    # Catalog of conversions (base_context_dir/.ezmd_catalog.db); duplicates: link | skip | convert
+    "catalog": {
+        "enabled": True,
+        "duplicates": "link"
+    },
+    # On-disk cache of LLM image descriptions, keyed by image hash + model + prompt
+    "llm_image_cache": {
+        "enabled": True,
+        "max_mb": 64
+    },
+    # Describe a document's images concurrently (before MarkItDown reads them from the cache)
+    "image_description": {
+        "concurrent": True,
+        "concurrency": 8,
+        "requests_per_min": 500,
+        "tokens_per_min": 200000,
+        "est_tokens_per_image": 1000,
+        "max_retries": 5,
+        "backoff_base_sec": 1.0
+    },
+    # google_gemini provider: images are packed into as few multimodal requests as these limits allow
+    "gemini_processing": {
+        "max_images_per_request": 32,
+        "max_input_tokens": 900000,
+        "max_output_tokens": 8192,
+        "output_tokens_per_image": 250,
+        "max_request_mb": 18,
+        "min_image_bytes": 2048,
+        "concurrency": 4,
+        "requests_per_min": 60,
+        "max_retries": 5,
+        "backoff_base_sec": 2.0
+    },
+    # Page-parallel conversion for large PDFs (workers=0 -> CPU count)
+    "pdf_parallel": {
+        "enabled": False,
+        "pages_per_chunk": 20,
+        "min_pages": 40,
+        "workers": 0
+    },
+    # rsync transfers: SSH connection sharing, the timeout for batched pushes
+    # and how many remotes are synced concurrently
+    "rsync": {
+        "multiplex": True,
+        "control_persist_sec": 60,
+        "batch_timeout_sec": 300,
+        "parallelism": 4
+    },
+    # Durable sync queue (sync_queue.db next to this file): retry backoff and give-up threshold
+    "sync_queue": {
+        "max_attempts": 8,
+        "backoff_base_sec": 30,
+        "backoff_max_sec": 3600
+    },
+    # `ezmd watch <dir>`: debounce window, polling fallback interval, concurrent conversions
+    "watch": {
+        "settle_sec": 2.0,
+        "poll_interval_sec": 1.0,
+        "workers": 2,
+        "collision": "overwrite",
+        "recursive": True
+    },
+    # Per-stage timings as JSON lines (default <config_dir>/metrics.jsonl, rotated past max_mb)
+    # and, if prometheus_textfile is set, a node_exporter textfile (`ezmd stats` summarises them)
+    "metrics": {
+        "enabled": True,
+        "jsonl_path": "",
+        "prometheus_textfile": "",
+        "max_mb": 32
+    },
+    # Conversion worker processes (batch, watch, mirror, the TUI and the daemon): address-space
+    # and resident-memory caps, per-job wall-clock timeout, jobs before a worker is replaced; 0 = no limit
+    "isolation": {
+        "enabled": True,
+        "memory_mb": 4096,
+        "max_rss_mb": 3072,
+        "timeout_sec": 900,
+        "max_jobs_per_worker": 50
+    },
+    # Shared HTTP download engine (see downloader.py)
+    "download": {
+        "timeout_sec": 30,
+        "retries": 3,
+        "backoff_factor": 0.5,
+        "chunk_size_kb": 1024,
+        "max_per_host": 4
+    },
     # New field for storing remotes:
     # {
     #   "alias1": {
@@ -1,28 +1,55 @@
 """
 Handles:
 1) Final filenames with collision resolution,
-2) Download/copy,
-3) MarkItDown usage with OpenAI if relevant,
-4) Returns the .md path.
+2) Download, or ingest of local files (reflink/hardlink/symlink/copy, see ingest.py),
+3) MarkItDown usage with OpenAI if relevant (plain text, markdown, JSON and CSV
+   skip it for the lightweight converters in fast_paths.py),
+4) Gemini image post-processing appended to the markdown if relevant,
+5) Returns the .md path.
+
+Conversions are cached by content: the SHA-256 of the raw file plus the
+settings that influence output (MarkItDown version, LLM model, LLM image toggle).
+URL sources are re-fetched conditionally (ETag / Last-Modified); a 304 reuses the
+previously downloaded raw file.
 
 Now includes logic to detect arXiv IDs or abstract links, unify to PDF links, and .pdf extension.
 """
 
 import os
 import re
+import io
+import hashlib
 import shutil
-import requests
 import time
-from typing import Optional
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, List, Optional, Tuple
 from urllib.parse import urlparse
 
 from .provider_manager import (
     get_openai_key,
     get_use_llm_img_desc,
     get_img_desc_model,
+    get_gemini_key,
+    get_gemini_model,
 )
 from .config_manager import save_config
-from markitdown import MarkItDown
+from .disk_cache import DiskLRUCache, get_cache_root, sha256_file
+from .fetch_validators import FetchValidatorStore
+from .catalog import get_catalog, get_catalog_settings
+from .fast_paths import FAST_PATHS, NotFastPath, convert as convert_fast_path, route as route_fast_path
+from .ingest import get_ingest_mode, get_ingest_settings, ingest_local_file
+from .isolation import claim_for_job
+from .metrics import StageRecorder
+
+COLLISION_POLICIES = ("skip", "version", "overwrite")
+
+
+class ConversionSkipped(Exception):
+    """
+    Raised when a collision policy of "skip" finds an existing output.
+    """
+
 
 def convert_document(
     title: str,
@@ -30,13 +57,66 @@ def convert_document(
     config: dict,
     provider: str,
     overwrite: bool,
+    collision_policy: Optional[str] = None,
+    use_cache: bool = True,
+    profile: bool = False,
 ) -> str:
     """
     Convert the given source to markdown in base_context_dir 
     using MarkItDown if user picks "openai" and we have an OpenAI key + user-enabled LLM usage.
+    With "google_gemini" (and a Gemini key), the image descriptions are appended afterwards.
 
     If the user provided an ArXiv ID or link, we unify it to the official PDF link.
+
+    collision_policy (one of COLLISION_POLICIES) resolves existing files without
+    prompting; None keeps the interactive prompt used by the TUI.
+
+    use_cache=False bypasses the conversion cache (both lookup and store).
+
+    Conversions are recorded in the catalog (see catalog.py). A document that was
+    already converted with the same settings is linked under the new name, or
+    skipped (ConversionSkipped), depending on catalog.duplicates.
+
+    Every stage is timed and reported to the metrics log (see metrics.py).
+
+    profile=True runs the conversion under the profiler (see profiling.py) and
+    writes <name>.prof / .collapsed / .profile.txt next to the markdown (next to
+    where it would have gone if the conversion fails).
     """
+    metrics = StageRecorder("convert", ext=guess_extension(_canonicalize_arxiv_source(source)),
+                            source=source, provider=provider or "")
+    profiler = _start_profiler() if profile else None
+    md_path = None
+    try:
+        md_path = _convert_document(title, source, config, provider, overwrite,
+                                    collision_policy, use_cache, metrics)
+    except ConversionSkipped:
+        metrics.finish("skipped", config)
+        raise
+    except BaseException as ex:
+        metrics.finish("failed", config, error=f"{type(ex).__name__}: {ex}")
+        raise
+    finally:
+        if profiler is not None:
+            base_context = os.path.expanduser(config.get("base_context_dir", "~/context"))
+            fallback = os.path.join(
+                base_context, sanitize_title(title, config.get("max_filename_length", 128)) or "untitled"
+            )
+            _write_profile(profiler, md_path or fallback)
+    metrics.finish("ok", config)
+    return md_path
+
+
+def _convert_document(
+    title: str,
+    source: str,
+    config: dict,
+    provider: str,
+    overwrite: bool,
+    collision_policy: Optional[str],
+    use_cache: bool,
+    metrics: StageRecorder,
+) -> str:
     base_context = os.path.expanduser(config.get("base_context_dir", "~/context"))
     raw_dir = os.path.join(base_context, "raw")
     os.makedirs(raw_dir, exist_ok=True)
@@ -45,29 +125,214 @@ def convert_document(
     # If user typed arxiv.org/abs/..., also unify.
     source = _canonicalize_arxiv_source(source)
 
-    max_len = config.get("max_filename_length", 128)
-    sanitized = re.sub(r"[^\w\s-]", "", title)
-    sanitized = re.sub(r"\s+", "_", sanitized.strip())
-    if len(sanitized) > max_len:
-        sanitized = sanitized[:max_len]
+    sanitized = sanitize_title(title, config.get("max_filename_length", 128))
 
-    ext = _guess_extension(source)
+    ext = guess_extension(source)
     raw_path = os.path.join(raw_dir, sanitized + ext)
     md_path = os.path.join(base_context, sanitized + ".md")
 
-    final_raw = _resolve_collision_path_interactive(raw_path, overwrite)
-    if final_raw is None:
-        raise Exception("User canceled the job due to collision in raw path.")
+    llm_client, llm_model, gemini_model = _llm_setup(provider, config)
 
-    final_md = _resolve_collision_path_interactive(md_path, overwrite)
-    if final_md is None:
-        raise Exception("User canceled the job due to collision in output md path.")
+    # Same document already converted with the same settings? Local files are
+    # looked up by content now; URLs after the (conditional) fetch further down.
+    catalog = get_catalog(config)
+    dedupe = catalog is not None and get_catalog_settings(config)["duplicates"] != "convert"
+    variant = _catalog_variant(llm_model, gemini_model)
+    is_url = source.startswith("http")
+    content_sha = None
+    duplicate = None
+    if dedupe and not is_url:
+        with metrics.stage("hash"):
+            content_sha = sha256_file(source)
+        metrics.add_bytes("hash", os.path.getsize(source))
+        with metrics.stage("catalog"):
+            duplicate = catalog.find_by_hash(content_sha, variant, md_path)
+        duplicate = _resolve_duplicate(duplicate, md_path, overwrite, collision_policy, config)
 
-    if source.startswith("http"):
-        _download_file(source, final_raw)
-    else:
-        shutil.copy2(source, final_raw)
+    # local sources can be linked/cloned into raw/; "direct" keeps no raw copy
+    # (local files are converted in place, URLs are streamed into memory)
+    ingest_mode = get_ingest_mode(config)
+
+    # names we create (O_EXCL placeholders) are removed again if the job fails;
+    # an overwritten raw path is not reserved, so note whether it was there before
+    reserved: List[str] = []
+    raw_existed = os.path.exists(raw_path)
+    stream = None
+    try:
+        final_raw = None
+        if collision_policy is not None:
+            final_md = _resolve_collision_path(md_path, overwrite, collision_policy, reserved)
+            if final_md is None:
+                raise ConversionSkipped(f"Output already exists: {md_path}")
+            if ingest_mode != "direct":
+                final_raw = _resolve_collision_path(raw_path, overwrite, collision_policy, reserved)
+                if final_raw is None:
+                    raise ConversionSkipped(f"Raw file already exists: {raw_path}")
+        else:
+            if ingest_mode != "direct":
+                final_raw = _resolve_collision_path_interactive(raw_path, overwrite, reserved)
+                if final_raw is None:
+                    raise Exception("User canceled the job due to collision in raw path.")
+
+            final_md = _resolve_collision_path_interactive(md_path, overwrite, reserved)
+            if final_md is None:
+                raise Exception("User canceled the job due to collision in output md path.")
+
+        if duplicate is not None:
+            metrics.status = "linked"
+            with metrics.stage("link"):
+                return _link_duplicate(catalog, duplicate, title, source, final_raw, final_md, reserved)
+
+        fetch_start = time.time()
+        input_ext = None
+        not_modified = False
+        if is_url and ingest_mode == "direct":
+            with metrics.stage("download"):
+                stream, input_ext = _download_to_buffer(source, config)
+            metrics.add_bytes("download", _stream_size(stream))
+            metrics.fields["ext"] = input_ext
+        elif is_url:
+            with metrics.stage("download"):
+                not_modified = _download_file(source, final_raw, config)
+            metrics.add_bytes("download", os.path.getsize(final_raw))
+        elif ingest_mode != "direct":
+            with metrics.stage("copy"):
+                ingest_local_file(source, final_raw, ingest_mode)
+            metrics.add_bytes("copy", os.path.getsize(final_raw))
+        fetch_sec = time.time() - fetch_start
+        # what MarkItDown reads: a file, or the in-memory download
+        input_path = final_raw if final_raw is not None else source
+        document = stream if stream is not None else input_path
+
+        cache = None
+        if use_cache:
+            cache = _get_conversion_cache(config)
+        if content_sha is None and (catalog is not None or cache is not None):
+            with metrics.stage("hash"):
+                content_sha = _sha256_stream(stream) if stream is not None else sha256_file(input_path)
+            metrics.add_bytes("hash", _stream_size(stream) if stream is not None else os.path.getsize(input_path))
+
+        if dedupe and is_url:
+            # the URL may serve a document we already have; only a 304 says
+            # that this very output is still current
+            try:
+                with metrics.stage("catalog"):
+                    by_hash = catalog.find_by_hash(content_sha, variant, md_path)
+                duplicate = _resolve_duplicate(by_hash, md_path, overwrite, collision_policy, config,
+                                               current=not_modified)
+            except ConversionSkipped:
+                if final_raw == raw_path and not raw_existed and final_raw not in reserved:
+                    os.remove(final_raw)
+                raise
+            if duplicate is not None:
+                metrics.status = "linked"
+                with metrics.stage("link"):
+                    return _link_duplicate(catalog, duplicate, title, source, final_raw, final_md, reserved)
+
+        convert_start = time.time()
+        text_content, cacheable = _render_markdown(
+            document, input_ext, content_sha, llm_client, llm_model, gemini_model, config, cache, metrics
+        )
+        with metrics.stage("write"):
+            # final_md may be a hardlink created for a duplicate; don't write through it
+            _unlink_if_shared(final_md)
+            data = text_content.encode("utf-8")
+            with open(final_md, "wb") as f:
+                f.write(data)
+        metrics.add_bytes("write", len(data))
+
+        if catalog is not None and cacheable:
+            with metrics.stage("catalog"):
+                catalog.record(title, source, content_sha, variant, final_raw, final_md,
+                               fetch_sec=fetch_sec, convert_sec=time.time() - convert_start)
+
+        return final_md
+    except BaseException:
+        _release_reserved(reserved)
+        raise
+    finally:
+        if stream is not None:
+            stream.close()
 
+
+def convert_file(
+    path: str,
+    md_path: str,
+    config: dict,
+    provider: str = "",
+    use_cache: bool = True,
+    content_sha: Optional[str] = None,
+    profile: bool = False,
+) -> str:
+    """
+    Convert a local file straight to md_path (parent directories are created),
+    with the same LLM setup and conversion cache as convert_document but no
+    raw copy, catalog entry or collision handling; md_path is replaced
+    atomically. For callers that lay out outputs themselves (`ezmd mirror`).
+    """
+    metrics = StageRecorder("convert", ext=guess_extension(path), source=path,
+                            provider=provider or "", mode="file")
+    profiler = _start_profiler() if profile else None
+    try:
+        llm_client, llm_model, gemini_model = _llm_setup(provider, config)
+        cache = _get_conversion_cache(config) if use_cache else None
+        if cache is not None and content_sha is None:
+            with metrics.stage("hash"):
+                content_sha = sha256_file(path)
+            metrics.add_bytes("hash", os.path.getsize(path))
+        text_content, _ = _render_markdown(
+            path, None, content_sha, llm_client, llm_model, gemini_model, config, cache, metrics
+        )
+
+        with metrics.stage("write"):
+            os.makedirs(os.path.dirname(md_path) or ".", exist_ok=True)
+            data = text_content.encode("utf-8")
+            tmp = f"{md_path}.tmp-{os.getpid()}-{threading.get_ident()}"
+            try:
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, md_path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+        metrics.add_bytes("write", len(data))
+    except BaseException as ex:
+        metrics.finish("failed", config, error=f"{type(ex).__name__}: {ex}")
+        raise
+    finally:
+        if profiler is not None:
+            _write_profile(profiler, md_path)
+    metrics.finish("ok", config)
+    return md_path
+
+
+def _start_profiler():
+    from .profiling import ConversionProfiler
+
+    profiler = ConversionProfiler()
+    profiler.start()
+    return profiler
+
+
+def _write_profile(profiler, md_path: str) -> None:
+    """
+    Stop profiler and write its files next to md_path (".md" replaced).
+    """
+    profiler.stop()
+    base = md_path[:-len(".md")] if md_path.endswith(".md") else md_path
+    try:
+        paths = profiler.write(base)
+    except OSError as e:
+        print(f"[!] Could not write the profile for {md_path}: {e}")
+        return
+    print(f"[info] Profile written to {', '.join(paths)}")
+
+
+def _llm_setup(provider: str, config: dict) -> Tuple[object, Optional[str], Optional[str]]:
+    """
+    (llm_client, llm_model, gemini_model) for provider; unset parts are None.
+    """
     # Decide whether to attach the LLM
     llm_client = None
     llm_model = None
@@ -77,19 +342,374 @@ def convert_document(
         if openai_key:
             if get_use_llm_img_desc():
                 import openai
+                from .llm_cache import get_caching_llm_client
                 openai.api_key = openai_key
-                llm_client = openai
+                llm_client = get_caching_llm_client(openai, config)
                 llm_model = get_img_desc_model()
 
-    md_instance = MarkItDown(llm_client=llm_client, llm_model=llm_model)
-    result = md_instance.convert(final_raw)
+    # Gemini is not handed to MarkItDown; its image descriptions are appended afterwards
+    gemini_model = None
+    if provider == "google_gemini" and get_gemini_key():
+        gemini_model = get_gemini_model(config)
+    return llm_client, llm_model, gemini_model
+
+
+def _render_markdown(
+    document,
+    input_ext: Optional[str],
+    content_sha: Optional[str],
+    llm_client,
+    llm_model: Optional[str],
+    gemini_model: Optional[str],
+    config: dict,
+    cache: Optional[DiskLRUCache],
+    metrics: Optional[StageRecorder] = None,
+) -> Tuple[str, bool]:
+    """
+    The markdown for document (a local path, or a seekable stream whose
+    extension is input_ext), served from / stored in the conversion cache
+    when one is given (content_sha is then required).
+
+    Returns (markdown, cacheable); cacheable is False if Gemini left images
+    undescribed, so such results are neither cached nor catalogued.
+
+    Plain text, markdown, JSON and CSV documents take a fast path (see
+    fast_paths.py) that bypasses MarkItDown and the cache.
+    """
+    if metrics is None:
+        metrics = StageRecorder("convert")
+    text_content = _render_fast_path(document, input_ext, metrics)
+    if text_content is not None:
+        return text_content, True
+    is_stream = not isinstance(document, str)
+    pdf_parallel = None if is_stream else _pdf_parallel_settings(config, document)
+
+    cache_key = None
+    if cache is not None:
+        with metrics.stage("cache"):
+            cache_key = _conversion_cache_key(content_sha, llm_model, pdf_parallel, gemini_model)
+            cached_md = cache.get(cache_key)
+        metrics.fields["cache_hit"] = cached_md is not None
+        if cached_md is not None:
+            return cached_md.decode("utf-8"), True
+
+    if pdf_parallel is not None:
+        with metrics.stage("markitdown"):
+            text_content = _convert_pdf_parallel(document, **pdf_parallel)
+    else:
+        if llm_client is not None:
+            from .image_describer import prefetch_image_descriptions
+            with metrics.stage("llm"):
+                prefetch_image_descriptions(document, llm_client, llm_model, config, input_ext)
+        with metrics.stage("markitdown"):
+            md_instance = get_markitdown(llm_client, llm_model)
+            if is_stream:
+                text_content = _convert_stream(md_instance, document, input_ext).text_content
+            else:
+                text_content = md_instance.convert(document).text_content
+    metrics.add_bytes("markitdown", len(text_content.encode("utf-8")))
+
+    cacheable = True
+    if gemini_model is not None:
+        # don't cache a result with missing descriptions; the next run retries them
+        with metrics.stage("llm"):
+            text_content, cacheable = _do_gemini_processing(document, text_content, gemini_model, config, input_ext)
+
+    if cache is not None and cacheable:
+        try:
+            with metrics.stage("cache"):
+                cache.put(cache_key, text_content.encode("utf-8"))
+        except OSError as e:
+            print(f"[!] Failed to store conversion in cache: {e}")
+    return text_content, cacheable
+
+
+def _render_fast_path(document, input_ext: Optional[str], metrics: StageRecorder) -> Optional[str]:
+    """
+    The markdown from a fast path if the document's extension has one and its
+    content turns out to suit it; None hands the document to MarkItDown.
+    """
+    is_stream = not isinstance(document, str)
+    ext = input_ext if is_stream else guess_extension(document)
+    if (ext or "").lower() not in FAST_PATHS:
+        return None
+    stream = document if is_stream else open(document, "rb")
+    pos = stream.tell()
+    try:
+        kind = route_fast_path(stream, ext)
+        if kind is None:
+            return None
+        with metrics.stage("fast_path"):
+            text_content = convert_fast_path(kind, stream)
+    except NotFastPath:
+        return None
+    finally:
+        if is_stream:
+            stream.seek(pos)
+        else:
+            stream.close()
+    metrics.fields["fast_path"] = kind
+    metrics.add_bytes("fast_path", len(text_content.encode("utf-8")))
+    return text_content
 
-    with open(final_md, "w", encoding="utf-8") as f:
-        f.write(result.text_content)
 
+def _catalog_variant(llm_model: Optional[str], gemini_model: Optional[str]) -> str:
+    """
+    Conversions only count as duplicates if they used the same LLM setup.
+    """
+    return f"llm={llm_model or ''}|gemini={gemini_model or ''}"
+
+
+def _resolve_duplicate(
+    duplicate: Optional[dict],
+    md_path: str,
+    overwrite: bool,
+    collision_policy: Optional[str],
+    config: dict,
+    current: bool = True,
+) -> Optional[dict]:
+    """
+    Decide what to do with a catalogued duplicate: returns it when the new name
+    should link to it, None to convert anyway, or raises ConversionSkipped.
+
+    A duplicate that is this very output is converted again when asked to
+    overwrite or version it, or when it may be stale (current=False: a URL that
+    was downloaded again rather than answered with a 304); otherwise skipped.
+    """
+    if duplicate is None:
+        return None
+    if duplicate["md_path"] == md_path:
+        if overwrite or collision_policy in ("overwrite", "version") or not current:
+            return None
+        raise ConversionSkipped(f"Already converted as {duplicate['md_path']}")
+    if get_catalog_settings(config)["duplicates"] == "skip":
+        raise ConversionSkipped(f"Already converted as {duplicate['md_path']}")
+    return duplicate
+
+
+def _link_duplicate(
+    catalog,
+    duplicate: dict,
+    title: str,
+    source: str,
+    final_raw: Optional[str],
+    final_md: str,
+    reserved: List[str],
+) -> str:
+    """
+    Expose an earlier conversion of the same document under the new name
+    (hardlinks, copies across filesystems) and record it in the catalog.
+    """
+    _link_or_copy(duplicate["md_path"], final_md)
+    raw_path = None
+    # (final_raw is None with direct ingest, which keeps no raw copy)
+    if final_raw is not None and duplicate["raw_path"] and os.path.isfile(duplicate["raw_path"]):
+        _link_or_copy(duplicate["raw_path"], final_raw)
+        raw_path = final_raw
+    elif final_raw in reserved:
+        _release_reserved([final_raw])
+    catalog.record(title, source, duplicate["content_sha256"], duplicate["variant"], raw_path,
+                   final_md, duplicate_of=duplicate["id"])
+    print(f"[info] Same document as {duplicate['md_path']}; linked instead of converting again.")
     return final_md
 
 
+def _unlink_if_shared(path: str) -> None:
+    """
+    Remove path if other names hardlink to it, so rewriting it leaves them intact.
+    """
+    try:
+        if os.stat(path).st_nlink > 1:
+            os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    if os.path.exists(dst):
+        if os.path.samefile(src, dst):
+            return
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+_markitdown_instances = {}
+
+
+def get_markitdown(llm_client=None, llm_model: Optional[str] = None):
+    """
+    Returns a MarkItDown instance for this LLM setup, building it on first use.
+    Reusing instances keeps long-lived processes (e.g. `ezmd serve`) warm.
+    """
+    key = (id(llm_client), llm_model)
+    md_instance = _markitdown_instances.get(key)
+    if md_instance is None:
+        from markitdown import MarkItDown
+        md_instance = MarkItDown(llm_client=llm_client, llm_model=llm_model)
+        _markitdown_instances[key] = md_instance
+    return md_instance
+
+
+def _get_conversion_cache(config: dict) -> Optional[DiskLRUCache]:
+    """
+    Returns the conversion cache under base_context_dir, or None if disabled in config.
+    """
+    cache_cfg = config.get("conversion_cache", {})
+    if not cache_cfg.get("enabled", True):
+        return None
+    max_bytes = int(cache_cfg.get("max_mb", 1024)) * 1024 * 1024
+    root = os.path.join(get_cache_root(config), "conversions")
+    return DiskLRUCache(root, max_bytes, suffix=".md")
+
+
+def _markitdown_version() -> str:
+    try:
+        from importlib.metadata import version
+        return version("markitdown")
+    except Exception:
+        return "unknown"
+
+
+def _conversion_cache_key(
+    raw_sha256: str,
+    llm_model: Optional[str],
+    pdf_parallel: Optional[dict] = None,
+    gemini_model: Optional[str] = None,
+) -> str:
+    """
+    Key = SHA-256 of the raw bytes + every setting that can change the markdown.
+    """
+    parts = [
+        raw_sha256,
+        f"markitdown={_markitdown_version()}",
+        f"llm_model={llm_model or ''}",
+        f"use_llm_img_desc={get_use_llm_img_desc()}",
+    ]
+    if pdf_parallel is not None:
+        # chunk boundaries can shift whitespace, so they are part of the key
+        parts.append(f"pdf_pages_per_chunk={pdf_parallel['pages_per_chunk']}")
+    if gemini_model is not None:
+        parts.append(f"gemini_model={gemini_model}")
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _do_gemini_processing(
+    raw_path,
+    text_content: str,
+    model: str,
+    config: dict,
+    extension: Optional[str] = None,
+) -> Tuple[str, bool]:
+    """
+    Append Gemini's descriptions of the document's images to the markdown.
+    Images are packed into as few multimodal requests as the limits allow
+    (see gemini_processor.py). raw_path may be a stream (diskless mode).
+
+    Returns (markdown, complete); complete is False if any image went undescribed.
+    """
+    from .gemini_processor import describe_document_images
+
+    try:
+        section, missing = describe_document_images(raw_path, get_gemini_key(), model, config, extension)
+    except Exception as ex:
+        print(f"[!] Gemini post-processing failed: {ex}")
+        return text_content, False
+    if not section:
+        return text_content, True
+    return text_content.rstrip("\n") + "\n\n" + section, missing == 0
+
+
+def _pdf_page_count(path: str) -> int:
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def _pdf_parallel_settings(config: dict, raw_path: str) -> Optional[dict]:
+    """
+    Returns the page-parallel settings to use for raw_path, or None for the
+    single MarkItDown call (non-PDF, feature disabled, or too few pages).
+    """
+    pcfg = config.get("pdf_parallel", {})
+    if not pcfg.get("enabled", False) or not raw_path.lower().endswith(".pdf"):
+        return None
+    try:
+        pages = _pdf_page_count(raw_path)
+    except Exception:
+        # pypdfium2 missing or unreadable PDF; let MarkItDown handle/report it
+        return None
+    if pages < int(pcfg.get("min_pages", 40)):
+        return None
+    return {
+        "pages_per_chunk": max(1, int(pcfg.get("pages_per_chunk", 20))),
+        "workers": int(pcfg.get("workers", 0)) or None,
+    }
+
+
+def _pdf_page_ranges(page_count: int, pages_per_chunk: int) -> List[Tuple[int, int]]:
+    return [
+        (start, min(start + pages_per_chunk, page_count))
+        for start in range(0, page_count, pages_per_chunk)
+    ]
+
+
+_worker_markitdown = None
+
+
+def _convert_pdf_page_range(path: str, start: int, end: int) -> str:
+    """
+    Pool worker: copy pages [start, end) into a new in-memory PDF and convert it.
+    The MarkItDown instance is reused across ranges handled by the same process.
+    """
+    global _worker_markitdown
+    import pypdfium2 as pdfium
+
+    src = pdfium.PdfDocument(path)
+    part = pdfium.PdfDocument.new()
+    try:
+        part.import_pages(src, pages=list(range(start, end)))
+        buf = io.BytesIO()
+        part.save(buf)
+    finally:
+        part.close()
+        src.close()
+    buf.seek(0)
+
+    if _worker_markitdown is None:
+        from markitdown import MarkItDown
+        _worker_markitdown = MarkItDown()
+    return _convert_stream(_worker_markitdown, buf, ".pdf").text_content
+
+
+def _convert_pdf_parallel(path: str, pages_per_chunk: int, workers: Optional[int] = None) -> str:
+    """
+    Convert a PDF page range by page range in a process pool and stitch
+    the markdown back together in page order.
+    """
+    ranges = _pdf_page_ranges(_pdf_page_count(path), pages_per_chunk)
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(ranges))) as pool:
+        parts = pool.map(_convert_pdf_page_range, [path] * len(ranges),
+                         [r[0] for r in ranges], [r[1] for r in ranges])
+        return "\n\n".join(part.strip("\n") for part in parts)
+
+
+def _convert_stream(md_instance, stream, extension: str):
+    """
+    MarkItDown >= 0.1 takes a StreamInfo; older releases take file_extension.
+    """
+    try:
+        from markitdown import StreamInfo
+    except ImportError:
+        return md_instance.convert_stream(stream, file_extension=extension)
+    return md_instance.convert_stream(stream, stream_info=StreamInfo(extension=extension))
+
+
 def _canonicalize_arxiv_source(source: str) -> str:
     """
     If user typed something like "2306.02564" or "arxiv.org/abs/2306.02564",
@@ -133,7 +753,19 @@ def _canonicalize_arxiv_source(source: str) -> str:
     return source
 
 
-def _guess_extension(source: str) -> str:
+def sanitize_title(title: str, max_len: int = 128) -> str:
+    """
+    File-name-safe form of a title: word characters, "-" and "_" only,
+    whitespace runs collapsed to "_", cut to max_len.
+    """
+    sanitized = re.sub(r"[^\w\s-]", "", title)
+    sanitized = re.sub(r"\s+", "_", sanitized.strip())
+    if len(sanitized) > max_len:
+        sanitized = sanitized[:max_len]
+    return sanitized
+
+
+def guess_extension(source: str) -> str:
     # special check for arxiv
     if "arxiv.org/pdf/" in source.lower():
         return ".pdf"
@@ -149,28 +781,164 @@ def _guess_extension(source: str) -> str:
         return extension if extension else ".bin"
 
 
-def _download_file(url: str, dest: str) -> None:
-    r = requests.get(url, stream=True)
-    r.raise_for_status()
-    with open(dest, "wb") as f:
-        for chunk in r.iter_content(chunk_size=8192):
-            f.write(chunk)
+def _download_file(url: str, dest: str, config: Optional[dict] = None) -> bool:
+    """
+    Download url to dest through the shared download engine. With a config, the
+    request is made conditional on the validators stored from the last download;
+    on 304 the stored raw file is reused and True is returned.
+    """
+    from .downloader import get_download_engine
+
+    validators = FetchValidatorStore(config) if config is not None else None
+    return get_download_engine(config).fetch(url, dest, validators) is None
+
+
+def _download_to_buffer(url: str, config: dict) -> Tuple[BinaryIO, str]:
+    """
+    Diskless fetch for ingest mode "direct": returns the body in a spooled
+    buffer and its extension, sniffed from the content rather than the URL.
+    """
+    from .downloader import get_download_engine
+    from .sniff import sniff_extension
+
+    spool_max_bytes = int(get_ingest_settings(config)["spool_max_mb"]) * 1024 * 1024
+    buf, info = get_download_engine(config).fetch_to_buffer(url, spool_max_bytes)
+    ext = sniff_extension(buf, info.get("content_type"), info.get("content_disposition"),
+                          info.get("url") or url)
+    return buf, ext
+
+
+def _stream_size(stream: BinaryIO) -> int:
+    pos = stream.tell()
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(pos)
+    return size
+
 
+def _sha256_stream(stream: BinaryIO, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        h.update(chunk)
+    stream.seek(0)
+    return h.hexdigest()
 
-def _resolve_collision_path_interactive(path: str, overwrite: bool) -> Optional[str]:
+
+# directory -> {(stem, ext): highest "_vN" seen}, built from one scandir per directory
+_version_index = {}
+_version_index_lock = threading.Lock()
+_VERSION_RE = re.compile(r"^(.+)_v(\d+)$")
+# after this many names taken behind our back (other processes), rescan the directory
+_VERSION_RESCAN_AFTER = 8
+
+
+def _scan_versions(directory: str) -> dict:
+    index = {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                root, ext = os.path.splitext(entry.name)
+                m = _VERSION_RE.match(root)
+                if m:
+                    key = (m.group(1), ext)
+                    index[key] = max(index.get(key, 1), int(m.group(2)))
+    except FileNotFoundError:
+        pass
+    return index
+
+
+def _reserve_path(path: str) -> bool:
+    """
+    Atomically claim path by creating it empty (O_EXCL); False if it already exists.
+    """
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    except FileExistsError:
+        return False
+    os.close(fd)
+    # removed by the supervisor if this worker is killed before the job ends
+    claim_for_job(path)
+    return True
+
+
+def _release_reserved(reserved: List[str]) -> None:
+    for path in reserved:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _next_version_path(path: str, reserved: Optional[List[str]] = None) -> str:
+    """
+    Reserve and return the next free "<base>_vN<ext>" for path.
+    The next N comes from an in-memory index of the directory (one scandir, not
+    one stat per candidate); the O_EXCL reservation makes it safe against other
+    workers picking the same name.
+    """
+    directory, name = os.path.split(path)
+    stem, ext = os.path.splitext(name)
+    key = (stem, ext)
+    misses = 0
+    while True:
+        with _version_index_lock:
+            index = _version_index.get(directory)
+            if index is None or misses >= _VERSION_RESCAN_AFTER:
+                index = _scan_versions(directory)
+                _version_index[directory] = index
+                misses = 0
+            idx = index.get(key, 1) + 1
+            index[key] = idx
+        proposed = os.path.join(directory, f"{stem}_v{idx}{ext}")
+        if _reserve_path(proposed):
+            if reserved is not None:
+                reserved.append(proposed)
+            return proposed
+        misses += 1
+
+
+def _resolve_collision_path(
+    path: str,
+    overwrite: bool,
+    collision_policy: str,
+    reserved: Optional[List[str]] = None,
+) -> Optional[str]:
+    """
+    Non-interactive counterpart of _resolve_collision_path_interactive.
+    Returns None when the policy says to skip an existing file.
+    New names are reserved (created empty) and appended to `reserved`.
+    """
+    if collision_policy not in COLLISION_POLICIES:
+        raise ValueError(f"Unknown collision policy: {collision_policy}")
+
+    if overwrite or collision_policy == "overwrite":
+        return path
+
+    if _reserve_path(path):
+        if reserved is not None:
+            reserved.append(path)
+        return path
+
+    if collision_policy == "skip":
+        return None
+    return _next_version_path(path, reserved)
+
+
+def _resolve_collision_path_interactive(
+    path: str,
+    overwrite: bool,
+    reserved: Optional[List[str]] = None,
+) -> Optional[str]:
     if overwrite:
         return path
 
-    if not os.path.exists(path):
+    if reserved is None:
+        reserved = []
+    if _reserve_path(path):
+        reserved.append(path)
         return path
 
-    base, ext = os.path.splitext(path)
-    idx = 2
-    while True:
-        proposed = f"{base}_v{idx}{ext}"
-        idx += 1
-        if not os.path.exists(proposed):
-            break
+    proposed = _next_version_path(path, reserved)
 
     while True:
         print(f"\n[COLLISION] File already exists: {path}")
@@ -181,7 +949,10 @@ def _resolve_collision_path_interactive(path: str, overwrite: bool) -> Optional[
         elif user_input == "":
             return proposed
         else:
-            if os.path.exists(user_input):
+            if not _reserve_path(user_input):
                 print("[!] That path also exists, let's try again.")
                 continue
+            reserved.remove(proposed)
+            _release_reserved([proposed])
+            reserved.append(user_input)
             return user_input
\ No newline at end of file
@@ -0,0 +1,256 @@
+"""
+Resident conversion daemon (`ezmd serve`) and its thin client (`ezmd submit`).
+
+The daemon imports the conversion stack once, keeps a warm MarkItDown instance,
+and accepts jobs over a local Unix socket (<config_dir>/ezmd.sock by default).
+Scripts that call ezmd in a loop then skip the per-call import/startup cost.
+
+Protocol: the client sends one JSON object terminated by a newline and receives
+one JSON object back.
+  {"op": "ping"}                       -> {"ok": true, "pid": ...}
+  {"op": "convert", "title": ..., "source": ..., "provider": "",
+   "overwrite": false, "collision_policy": "version", "use_cache": true, "profile": false}
+                                       -> {"ok": true, "status": "ok", "md_path": ...}
+  {"op": "shutdown"}                   -> {"ok": true}
+
+Conversions run in a supervised worker process forked from the warmed-up
+daemon (see isolation.py): a document that exhausts memory, hangs or crashes
+gets a failed reply with an "error_info" record, and the daemon keeps serving.
+
+The client half only uses the standard library, so `ezmd submit` stays cheap.
+"""
+
+import os
+import json
+import socket
+import socketserver
+import threading
+import time
+from typing import Optional
+
+from .config_manager import get_config_path, load_config
+
+EXIT_OK = 0
+EXIT_JOB_FAILED = 1
+EXIT_NO_DAEMON = 3
+
+_MAX_MESSAGE_BYTES = 1024 * 1024
+
+
+def get_socket_path() -> str:
+    return os.path.join(os.path.dirname(get_config_path()), "ezmd.sock")
+
+
+def _read_message(sock_file) -> dict:
+    line = sock_file.readline(_MAX_MESSAGE_BYTES)
+    if not line:
+        raise ConnectionError("Connection closed before a message was received.")
+    return json.loads(line.decode("utf-8"))
+
+
+def _write_message(sock_file, msg: dict) -> None:
+    sock_file.write((json.dumps(msg) + "\n").encode("utf-8"))
+    sock_file.flush()
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            msg = _read_message(self.rfile)
+        except (ValueError, ConnectionError) as e:
+            _write_message(self.wfile, {"ok": False, "error": f"Bad request: {e}"})
+            return
+
+        op = msg.get("op")
+        if op == "ping":
+            _write_message(self.wfile, {"ok": True, "pid": os.getpid()})
+        elif op == "convert":
+            _write_message(self.wfile, self.server.run_job(msg))
+        elif op == "shutdown":
+            _write_message(self.wfile, {"ok": True})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        else:
+            _write_message(self.wfile, {"ok": False, "error": f"Unknown op: {op}"})
+
+
+class ConversionServer(socketserver.UnixStreamServer):
+    """
+    Handles one request at a time: MarkItDown instances are not shared across
+    threads, and conversions are CPU-bound anyway (large PDFs can still fan out
+    through the pdf_parallel process pool).
+    """
+
+    def __init__(self, socket_path: str, pool=None):
+        self.socket_path = socket_path
+        self.pool = pool
+        super().__init__(socket_path, _JobHandler)
+        os.chmod(socket_path, 0o600)
+
+    def run_job(self, msg: dict) -> dict:
+        from .converter import convert_document, ConversionSkipped
+        from .isolation import WorkerFailed
+
+        start = time.time()
+        reply = {"ok": True, "status": "ok", "md_path": None, "error": None, "error_info": None}
+        try:
+            # re-read on every job so config edits apply without a restart
+            config = load_config()
+            if config is None:
+                raise Exception("No configuration found. Run `ezmd` once to complete setup.")
+            kwargs = dict(
+                title=msg["title"],
+                source=msg["source"],
+                config=config,
+                provider=msg.get("provider") or "",
+                overwrite=bool(msg.get("overwrite", False)),
+                collision_policy=msg.get("collision_policy") or "version",
+                use_cache=bool(msg.get("use_cache", True)),
+                profile=bool(msg.get("profile", False)),
+            )
+            if self.pool is not None:
+                reply["md_path"] = self.pool.submit(convert_document, **kwargs).result()
+            else:
+                reply["md_path"] = convert_document(**kwargs)
+        except ConversionSkipped as ex:
+            reply["status"] = "skipped"
+            reply["error"] = str(ex)
+        except WorkerFailed as ex:
+            reply["ok"] = False
+            reply["status"] = "failed"
+            reply["error"] = str(ex)
+            reply["error_info"] = ex.record
+        except Exception as ex:
+            reply["ok"] = False
+            reply["status"] = "failed"
+            reply["error"] = f"{type(ex).__name__}: {ex}"
+        reply["elapsed_sec"] = round(time.time() - start, 3)
+        print(f"[{reply['status']}] {msg.get('title')} -> {reply['md_path'] or reply['error']} "
+              f"[{reply['elapsed_sec']}s]")
+        return reply
+
+
+def _warm_up() -> None:
+    """
+    Import the conversion stack and build the default MarkItDown instance
+    (plus the OpenAI-backed one when LLM image descriptions are enabled).
+    """
+    from .converter import get_markitdown
+    from .downloader import get_download_engine
+    from .provider_manager import get_openai_key, get_use_llm_img_desc, get_img_desc_model
+
+    config = load_config() or {}
+    get_download_engine(config)
+    get_markitdown()
+    if get_openai_key() and get_use_llm_img_desc():
+        import openai
+        from .llm_cache import get_caching_llm_client
+        openai.api_key = get_openai_key()
+        get_markitdown(get_caching_llm_client(openai, config), get_img_desc_model())
+
+
+def serve(socket_path: Optional[str] = None) -> int:
+    from .isolation import SupervisedPool, get_isolation_settings
+
+    socket_path = socket_path or get_socket_path()
+    if os.path.exists(socket_path):
+        if ping(socket_path):
+            print(f"[!] An ezmd daemon is already listening on {socket_path}")
+            return EXIT_JOB_FAILED
+        os.remove(socket_path)  # stale socket from a daemon that died
+
+    print("[info] Warming up the conversion stack...")
+    start = time.time()
+    _warm_up()
+    pool = None
+    config = load_config()
+    if get_isolation_settings(config)["enabled"]:
+        # forked after the warm-up, so the worker starts with the stack loaded
+        pool = SupervisedPool(1, config)
+        pool.start_workers()
+    print(f"[info] Ready in {time.time() - start:.1f}s, listening on {socket_path} (Ctrl-C to stop)")
+
+    server = ConversionServer(socket_path, pool)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[info] Stopping daemon...")
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False)
+        server.server_close()
+        try:
+            os.remove(socket_path)
+        except OSError:
+            pass
+    return EXIT_OK
+
+
+def request(msg: dict, socket_path: Optional[str] = None, timeout_sec: Optional[float] = None) -> dict:
+    """
+    Send one message to the daemon and return its reply.
+    Raises OSError if no daemon is listening.
+    """
+    socket_path = socket_path or get_socket_path()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout_sec)
+        sock.connect(socket_path)
+        with sock.makefile("rwb") as sock_file:
+            _write_message(sock_file, msg)
+            return _read_message(sock_file)
+
+
+def ping(socket_path: Optional[str] = None) -> bool:
+    try:
+        return bool(request({"op": "ping"}, socket_path, timeout_sec=2).get("ok"))
+    except (OSError, ValueError, ConnectionError):
+        return False
+
+
+def submit(
+    title: str,
+    source: str,
+    provider: str = "",
+    overwrite: bool = False,
+    collision_policy: str = "version",
+    use_cache: bool = True,
+    socket_path: Optional[str] = None,
+    profile: bool = False,
+) -> int:
+    """
+    Client side of `ezmd submit`: forward one conversion to the daemon.
+    Returns the process exit code.
+    """
+    from .windows_path_utils import is_windows_path, translate_windows_path_to_wsl
+
+    if not source.startswith("http"):
+        if is_windows_path(source):
+            source = translate_windows_path_to_wsl(source)
+        elif os.path.exists(source):
+            # the daemon has its own working directory; anything else (an arXiv ID)
+            # is passed through for the converter to resolve
+            source = os.path.abspath(source)
+
+    msg = {
+        "op": "convert",
+        "title": title,
+        "source": source,
+        "provider": provider,
+        "overwrite": overwrite,
+        "collision_policy": collision_policy,
+        "use_cache": use_cache,
+        "profile": profile,
+    }
+    try:
+        reply = request(msg, socket_path)
+    except (OSError, ConnectionError) as e:
+        print(f"[!] Could not reach the ezmd daemon ({e}). Start it with `ezmd serve`.")
+        return EXIT_NO_DAEMON
+
+    if reply.get("status") == "ok":
+        print(reply["md_path"])
+        return EXIT_OK
+    if reply.get("status") == "skipped":
+        print(f"[-] Skipped: {reply.get('error')}")
+        return EXIT_OK
+    print(f"[!] Error during conversion: {reply.get('error')}")
+    return EXIT_JOB_FAILED
@@ -0,0 +1,119 @@
+"""
+A small size-bounded, on-disk LRU cache.
+
+Each entry is a single file named after its key inside the cache directory.
+Recency is tracked through the file's mtime (touched on every hit),
+so no separate index is needed and several processes can share one cache.
+Writes go through a temp file + os.replace so readers never see partial entries.
+"""
+
+import os
+import hashlib
+import tempfile
+from typing import Optional
+
+
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Return the hex SHA-256 of a file, reading it in chunks.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def get_cache_root(config: dict) -> str:
+    """
+    Root directory for all of ezmd's caches, inside base_context_dir.
+    """
+    base_context = os.path.expanduser(config.get("base_context_dir", "~/context"))
+    return os.path.join(base_context, ".ezmd_cache")
+
+
+class DiskLRUCache:
+    """
+    Maps string keys to bytes stored under `root`, evicting the least
+    recently used entries once the total size exceeds `max_bytes`.
+    """
+
+    def __init__(self, root: str, max_bytes: int, suffix: str = ""):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        os.makedirs(self.root, exist_ok=True)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.root, key + self.suffix)
+
+    def path_for(self, key: str) -> Optional[str]:
+        """
+        Return the entry's file path on a hit (marking it recently used), else None.
+        """
+        path = self._entry_path(key)
+        try:
+            os.utime(path, None)
+        except OSError:
+            return None
+        return path
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.path_for(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._entry_path(key))
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Remove least recently used entries until the cache fits in max_bytes.
+        """
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.root) as it:
+                for entry in it:
+                    if not entry.is_file() or entry.name.startswith(".tmp-"):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+        except OSError:
+            return
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,386 @@
+"""
+Shared download engine for URL sources.
+
+Wraps one pooled requests.Session per process with:
+ - per-host connection limits (a blocking urllib3 pool of `max_per_host` connections;
+   the pool belongs to the process, so batch workers each have their own),
+ - exponential-backoff retries, both for connect/5xx/429 errors (urllib3 Retry)
+   and for connections that drop mid-stream,
+ - configurable timeouts and chunk sizes,
+ - resumable downloads: bytes go to "<dest>.part" and an interrupted transfer
+   continues with a Range request (guarded by If-Range) when the server allows it;
+   the size is checked against Content-Length / Content-Range before the .part
+   file is atomically renamed to dest, so converters never see a partial file,
+ - fetch_to_buffer() for diskless conversion: the body goes to a spooled
+   in-memory buffer instead of raw/.
+
+Settings come from the "download" section of the config, e.g.:
+  "download": {"timeout_sec": 30, "retries": 3, "backoff_factor": 0.5,
+               "chunk_size_kb": 1024, "max_per_host": 4}
+"""
+
+import io
+import os
+import re
+import json
+import time
+import shutil
+import tempfile
+import threading
+from typing import BinaryIO, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .fetch_validators import FetchValidatorStore
+
+DEFAULT_DOWNLOAD_SETTINGS = {
+    "timeout_sec": 30,
+    "retries": 3,
+    "backoff_factor": 0.5,
+    "chunk_size_kb": 1024,
+    "max_per_host": 4,
+}
+
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Socket reads stay small so a dropped connection loses at most this much of the
+# .part file; chunk_size_kb sizes the write buffer instead.
+_MAX_READ_SIZE = 64 * 1024
+_CONTENT_RANGE_RE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+
+class IncompleteDownloadError(requests.ConnectionError):
+    """
+    The body ended before the advertised size; retried (and resumed) like a dropped connection.
+    """
+
+
+class DownloadEngine:
+    def __init__(
+        self,
+        timeout_sec: float = 30,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        chunk_size_kb: int = 1024,
+        max_per_host: int = 4,
+    ):
+        self.timeout_sec = timeout_sec
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.chunk_size = max(1, int(chunk_size_kb)) * 1024
+        self.max_per_host = max_per_host
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=_RETRY_STATUSES,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        # pool_block=True makes max_per_host a hard cap on connections per host.
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=max_per_host,
+            pool_block=True,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, url: str, dest: str, validators: Optional[FetchValidatorStore] = None) -> Optional[int]:
+        """
+        Download url to dest, retrying with exponential backoff if the
+        connection drops mid-stream. Returns the number of bytes written,
+        or None when a 304 let us reuse the previously stored raw file.
+        """
+        attempt = 0
+        while True:
+            try:
+                return self._fetch_once(url, dest, validators)
+            except (requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError):
+                if attempt >= self.retries:
+                    raise
+                time.sleep(self.backoff_factor * (2 ** attempt))
+                attempt += 1
+
+    def _fetch_once(self, url: str, dest: str, validators: Optional[FetchValidatorStore]) -> Optional[int]:
+        part_path = dest + ".part"
+        meta_path = part_path + ".json"
+        offset, part_meta = _resumable_part(url, part_path, meta_path)
+
+        # identity encoding keeps byte offsets and Content-Length meaningful for Range
+        headers = {"Accept-Encoding": "identity"}
+        cached = None
+        if offset > 0:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = part_meta.get("etag") or part_meta.get("last_modified")
+        elif validators is not None:
+            cached = validators.lookup(url)
+            headers.update(validators.conditional_headers(cached))
+
+        with self.session.get(url, stream=True, headers=headers, timeout=self.timeout_sec) as r:
+            if r.status_code == 304 and cached is not None:
+                # dest may already be it, or a hardlink of it (a linked duplicate)
+                if not (os.path.exists(dest) and os.path.samefile(cached["raw_path"], dest)):
+                    shutil.copy2(cached["raw_path"], dest)
+                return None
+
+            if r.status_code == 416 and offset > 0:
+                # our .part no longer matches the resource; start over
+                _discard_part(part_path, meta_path)
+                raise IncompleteDownloadError(f"Range not satisfiable for {url}, restarting")
+
+            r.raise_for_status()
+
+            expected = None
+            if r.status_code == 206 and offset > 0:
+                m = _CONTENT_RANGE_RE.match(r.headers.get("Content-Range", ""))
+                if not m or int(m.group(1)) != offset:
+                    _discard_part(part_path, meta_path)
+                    raise IncompleteDownloadError(f"Unexpected Content-Range from {url}, restarting")
+                if m.group(3) != "*":
+                    expected = int(m.group(3))
+                mode = "ab"
+            else:
+                # 200: server ignored the Range (or we sent none), so start from zero
+                offset = 0
+                if r.headers.get("Content-Length", "").isdigit():
+                    expected = int(r.headers["Content-Length"])
+                mode = "wb"
+                _write_part_meta(meta_path, url, r.headers)
+
+            written = 0
+            with open(part_path, mode, buffering=self.chunk_size) as f:
+                for chunk in r.iter_content(chunk_size=min(self.chunk_size, _MAX_READ_SIZE)):
+                    f.write(chunk)
+                    written += len(chunk)
+
+            size = os.path.getsize(part_path)
+            if expected is not None and size != expected:
+                if size > expected:
+                    _discard_part(part_path, meta_path)
+                raise IncompleteDownloadError(
+                    f"Downloaded {size} of {expected} bytes from {url}"
+                )
+
+            os.replace(part_path, dest)
+            _discard_part(part_path, meta_path)
+
+            if validators is not None:
+                if r.status_code == 206:
+                    validators.record(url, _part_meta_headers(part_meta), dest)
+                else:
+                    validators.record(url, r.headers, dest)
+            return written
+
+    def fetch_to_buffer(self, url: str, spool_max_bytes: int) -> Tuple[BinaryIO, dict]:
+        """
+        Download url into a spooled buffer instead of raw/: it stays in
+        memory up to spool_max_bytes and spills to an anonymous temp file beyond
+        that. Dropped connections are resumed with Range/If-Range like fetch().
+        Returns (buffer rewound to 0, info) where info has the final url and the
+        Content-Type / Content-Disposition of the response.
+        """
+        buf = _SpoolBuffer(max_size=spool_max_bytes)
+        info = {}
+        attempt = 0
+        try:
+            while True:
+                try:
+                    self._stream_once(url, buf, info)
+                    buf.seek(0)
+                    return buf, info
+                except (requests.ConnectionError, requests.Timeout,
+                        requests.exceptions.ChunkedEncodingError):
+                    if attempt >= self.retries:
+                        raise
+                    time.sleep(self.backoff_factor * (2 ** attempt))
+                    attempt += 1
+        except BaseException:
+            buf.close()
+            raise
+
+    def _stream_once(self, url: str, buf: BinaryIO, info: dict) -> None:
+        offset = buf.tell()
+        headers = {"Accept-Encoding": "identity"}
+        validator = info.get("etag") or info.get("last_modified")
+        if offset > 0 and validator:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+
+        with self.session.get(url, stream=True, headers=headers, timeout=self.timeout_sec) as r:
+            if r.status_code == 416 and "Range" in headers:
+                _reset_buffer(buf)
+                raise IncompleteDownloadError(f"Range not satisfiable for {url}, restarting")
+            r.raise_for_status()
+
+            expected = None
+            if r.status_code == 206 and "Range" in headers:
+                m = _CONTENT_RANGE_RE.match(r.headers.get("Content-Range", ""))
+                if not m or int(m.group(1)) != offset:
+                    _reset_buffer(buf)
+                    raise IncompleteDownloadError(f"Unexpected Content-Range from {url}, restarting")
+                if m.group(3) != "*":
+                    expected = int(m.group(3))
+            else:
+                # full body: start from zero
+                _reset_buffer(buf)
+                if r.headers.get("Content-Length", "").isdigit():
+                    expected = int(r.headers["Content-Length"])
+                info.update({
+                    "url": r.url,
+                    "content_type": r.headers.get("Content-Type"),
+                    "content_disposition": r.headers.get("Content-Disposition"),
+                    "etag": r.headers.get("ETag"),
+                    "last_modified": r.headers.get("Last-Modified"),
+                })
+
+            for chunk in r.iter_content(chunk_size=_MAX_READ_SIZE):
+                buf.write(chunk)
+
+            size = buf.tell()
+            if expected is not None and size != expected:
+                if size > expected:
+                    _reset_buffer(buf)
+                raise IncompleteDownloadError(f"Downloaded {size} of {expected} bytes from {url}")
+
+
+def _resumable_part(url: str, part_path: str, meta_path: str) -> Tuple[int, dict]:
+    """
+    Return (offset, meta) for an existing .part file that can be resumed.
+    Resuming needs a validator for If-Range, otherwise a changed resource
+    could be spliced onto stale bytes; without one we start over.
+    """
+    try:
+        offset = os.path.getsize(part_path)
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        _discard_part(part_path, meta_path)
+        return 0, {}
+    if offset == 0 or meta.get("url") != url or not (meta.get("etag") or meta.get("last_modified")):
+        _discard_part(part_path, meta_path)
+        return 0, {}
+    return offset, meta
+
+
+def _write_part_meta(meta_path: str, url: str, response_headers) -> None:
+    meta = {
+        "url": url,
+        "etag": response_headers.get("ETag"),
+        "last_modified": response_headers.get("Last-Modified"),
+    }
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+class _SpoolBuffer(io.BufferedIOBase):
+    """
+    tempfile.SpooledTemporaryFile as a real io object (MarkItDown and magika
+    check for io.IOBase, which the stdlib class only is from Python 3.11): a
+    BytesIO that rolls over to an anonymous temp file past max_size bytes.
+    """
+
+    def __init__(self, max_size: int):
+        super().__init__()
+        self._max_size = max_size
+        self._file = io.BytesIO()
+        self._rolled = False
+
+    def _rollover(self) -> None:
+        f = tempfile.TemporaryFile()
+        f.write(self._file.getbuffer())
+        f.seek(self._file.tell())
+        self._file.close()
+        self._file = f
+        self._rolled = True
+
+    def write(self, b) -> int:
+        if not self._rolled and self._file.tell() + len(b) > self._max_size:
+            self._rollover()
+        return self._file.write(b)
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        return self._file.read(size)
+
+    def read1(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def readinto(self, b) -> int:
+        return self._file.readinto(b)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def truncate(self, size: Optional[int] = None) -> int:
+        return self._file.truncate(size)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+def _reset_buffer(buf: BinaryIO) -> None:
+    buf.seek(0)
+    buf.truncate()
+
+
+def _discard_part(part_path: str, meta_path: str) -> None:
+    for path in (part_path, meta_path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _part_meta_headers(meta: dict) -> dict:
+    """
+    Rebuild the validator headers of the original 200 response from .part metadata.
+    """
+    headers = {}
+    if meta.get("etag"):
+        headers["ETag"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["Last-Modified"] = meta["last_modified"]
+    return headers
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_download_engine(config: Optional[dict] = None) -> DownloadEngine:
+    """
+    Returns the process-wide engine for the given config's download settings,
+    so every download in this process shares one connection pool.
+    """
+    settings = dict(DEFAULT_DOWNLOAD_SETTINGS)
+    if config:
+        settings.update(config.get("download", {}) or {})
+    key = tuple(sorted(settings.items()))
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = DownloadEngine(**{k: settings[k] for k in DEFAULT_DOWNLOAD_SETTINGS})
+            _engines[key] = engine
+        return engine
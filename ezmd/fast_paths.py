@@ -0,0 +1,127 @@
+"""
+Lightweight converters for documents that need little or no conversion.
+
+converter._render_markdown routes these here instead of through MarkItDown,
+whose import and content detection (magika) cost far more than converting a
+small text file:
+ - "text" (.txt, .text, .md, .markdown, .json, .jsonl): passed through
+ - "csv"  (.csv): rendered as a markdown table
+
+The output matches MarkItDown's (its PlainTextConverter and CsvConverter,
+followed by its line normalisation: trailing whitespace stripped, runs of
+blank lines collapsed), except that a leading UTF-8 BOM is dropped. Input is
+read as a stream, so the raw bytes are never held in memory next to the text.
+
+Only UTF-8 (and so ASCII) input is handled: anything else raises NotFastPath
+part-way through, and the caller falls back to MarkItDown and its charset
+detection.
+"""
+
+import io
+import re
+import csv
+from typing import BinaryIO, List, Optional
+
+from .sniff import looks_like_text
+
+FAST_PATHS = {
+    ".txt": "text",
+    ".text": "text",
+    ".md": "text",
+    ".markdown": "text",
+    ".json": "text",
+    ".jsonl": "text",
+    ".csv": "csv",
+}
+
+_SNIFF_BYTES = 4096
+
+# a pipe plus the run of backslashes before it (doubled before the pipe is escaped)
+_PIPE_ESCAPE_RE = re.compile(r"(?<!\\)(\\*)\|")
+_BLANK_RUNS_RE = re.compile(r"\n{3,}")
+
+
+class NotFastPath(Exception):
+    """
+    The document turned out not to suit a fast path (e.g. it is not UTF-8).
+    """
+
+
+def route(stream: BinaryIO, extension: Optional[str]) -> Optional[str]:
+    """
+    The fast path for a document with this extension whose content (sniffed
+    from the start of the seekable stream, position restored) is text, or None.
+    """
+    kind = FAST_PATHS.get((extension or "").lower())
+    if kind is None:
+        return None
+    pos = stream.tell()
+    try:
+        head = stream.read(_SNIFF_BYTES)
+    finally:
+        stream.seek(pos)
+    return kind if looks_like_text(head) else None
+
+
+def convert(kind: str, stream: BinaryIO) -> str:
+    """
+    Markdown for the document in stream. Raises NotFastPath if it can't be
+    handled here; the stream is then left at an arbitrary position.
+    """
+    # newline="\n": split on \n only, like MarkItDown; a stray \r stays in its line
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="strict",
+                            newline="" if kind == "csv" else "\n")
+    try:
+        if kind == "csv":
+            lines = _csv_table(text)
+        else:
+            lines = []
+            line = ""
+            for line in text:
+                lines.append(line.rstrip())
+            # like str.split("\n"): a final newline (or no text) leaves one empty line
+            if line.endswith("\n") or not lines:
+                lines.append("")
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise NotFastPath(str(e))
+    finally:
+        # leave the caller's stream open
+        text.detach()
+    return _BLANK_RUNS_RE.sub("\n\n", "\n".join(lines))
+
+
+def _escape_cell(value: str) -> str:
+    value = _PIPE_ESCAPE_RE.sub(lambda m: m.group(1) * 2 + r"\|", value)
+    return value.replace("\r\n", " ").replace("\n", " ").replace("\r", " ")
+
+
+def _trim_blank_rows(rows: List[List[str]]) -> List[List[str]]:
+    """
+    Without the empty rows at both ends and right after the header.
+    """
+    start = 0
+    while start < len(rows) and not rows[start]:
+        start += 1
+    end = len(rows)
+    while end > start and not rows[end - 1]:
+        end -= 1
+    if start == end:
+        return []
+    body = start + 1
+    while body < end and not rows[body]:
+        body += 1
+    return [rows[start]] + rows[body:end]
+
+
+def _csv_table(text: io.TextIOWrapper) -> List[str]:
+    rows = _trim_blank_rows(list(csv.reader(text)))
+    if not rows:
+        return [""]
+    width = max(len(row) for row in rows)
+    lines = []
+    for i, row in enumerate(rows):
+        cells = [_escape_cell(cell) for cell in row] + [""] * (width - len(row))
+        lines.append("| " + " | ".join(cells) + " |")
+        if i == 0:
+            lines.append("| " + " | ".join(["---"] * width) + " |")
+    return [line.rstrip() for line in lines]
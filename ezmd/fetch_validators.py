@@ -0,0 +1,94 @@
+"""
+Stores HTTP cache validators (ETag / Last-Modified) per canonical URL,
+so re-fetching an unchanged source can be answered with a 304 and the
+previously downloaded raw file reused.
+
+One small JSON record per URL lives in <base_context_dir>/.ezmd_cache/http/,
+named by the SHA-256 of the URL. Separate files keep concurrent batch workers
+from clobbering each other's entries.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from typing import Optional
+
+from .disk_cache import get_cache_root
+
+
+class FetchValidatorStore:
+    def __init__(self, config: dict):
+        self.root = os.path.join(get_cache_root(config), "http")
+        os.makedirs(self.root, exist_ok=True)
+
+    def _record_path(self, url: str) -> str:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, digest + ".json")
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """
+        Return the stored record for url, but only if the raw file it points at
+        is still present and unmodified since it was downloaded.
+        """
+        try:
+            with open(self._record_path(url), "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if record.get("url") != url:
+            return None
+        if not record.get("etag") and not record.get("last_modified"):
+            return None
+        try:
+            st = os.stat(record["raw_path"])
+        except (OSError, KeyError):
+            return None
+        if st.st_size != record.get("size") or st.st_mtime_ns != record.get("mtime_ns"):
+            return None
+        return record
+
+    def conditional_headers(self, record: Optional[dict]) -> dict:
+        headers = {}
+        if record:
+            if record.get("etag"):
+                headers["If-None-Match"] = record["etag"]
+            if record.get("last_modified"):
+                headers["If-Modified-Since"] = record["last_modified"]
+        return headers
+
+    def record(self, url: str, response_headers, raw_path: str) -> None:
+        """
+        Remember the validators from a 200 response alongside the file it was saved to.
+        Responses without validators clear any stale record.
+        """
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+        path = self._record_path(url)
+        if not etag and not last_modified:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return
+
+        st = os.stat(raw_path)
+        record = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "raw_path": os.path.abspath(raw_path),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(record, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
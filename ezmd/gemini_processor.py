@@ -0,0 +1,329 @@
+"""
+Google Gemini image post-processing (the `google_gemini` provider).
+
+MarkItDown is not given Gemini as its LLM. Instead, after the normal conversion,
+the document's images are described by Gemini and appended to the markdown as
+an "Image Descriptions" section.
+
+Rather than one call per image, images are packed (in document order) into as
+few multimodal requests as the limits allow:
+ - estimated input tokens per request (`max_input_tokens`; an image costs 258
+   tokens per 768x768 tile, or 258 if it fits in 384x384),
+ - output tokens (`max_output_tokens` / `output_tokens_per_image`),
+ - inline request size (`max_request_mb`; images travel base64-encoded),
+ - `max_images_per_request`.
+Each request asks for a JSON array with one description per image. Batches run
+concurrently under a requests-per-minute bucket, retrying 429s with backoff.
+
+Descriptions are cached per image (image hash + model + prompt) next to the
+OpenAI ones, so repeated figures and re-conversions skip the model call.
+
+Settings live in the "gemini_processing" config section.
+"""
+
+import os
+import json
+import math
+import time
+import struct
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from .disk_cache import DiskLRUCache, get_cache_root
+from .image_describer import (
+    TokenBucket,
+    extract_document_images,
+    _is_rate_limited,
+    _retry_after_sec,
+)
+
+DEFAULT_GEMINI_PROMPT = (
+    "You are given numbered images extracted from one document. "
+    "Write a detailed caption for each image. "
+    'Respond with a JSON array of objects {"image": <number>, "description": <text>}, '
+    "one per image, in the order given."
+)
+
+DEFAULT_GEMINI_SETTINGS = {
+    "max_images_per_request": 32,
+    "max_input_tokens": 900000,
+    "max_output_tokens": 8192,
+    "output_tokens_per_image": 250,
+    "max_request_mb": 18,
+    "min_image_bytes": 2048,
+    "concurrency": 4,
+    "requests_per_min": 60,
+    "max_retries": 5,
+    "backoff_base_sec": 2.0,
+}
+
+# Image types Gemini accepts inline
+SUPPORTED_MIMETYPES = ("image/png", "image/jpeg", "image/webp", "image/heic", "image/heif")
+
+_TOKENS_PER_TILE = 258
+_TILE_PX = 768
+_SMALL_IMAGE_PX = 384
+_PROMPT_OVERHEAD_TOKENS = 512
+
+Image = Tuple[str, bytes, str]
+
+
+def get_gemini_settings(config: Optional[dict]) -> dict:
+    settings = dict(DEFAULT_GEMINI_SETTINGS)
+    if config:
+        settings.update(config.get("gemini_processing", {}) or {})
+    return settings
+
+
+def _image_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    (width, height) read from a PNG or JPEG header, or None.
+    """
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        return struct.unpack(">II", data[16:24])
+    if data[:2] == b"\xff\xd8":
+        i = 2
+        while i + 9 < len(data):
+            if data[i] != 0xFF:
+                i += 1
+                continue
+            marker = data[i + 1]
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+                i += 2
+                continue
+            length = struct.unpack(">H", data[i + 2:i + 4])[0]
+            # SOF0..SOF15, minus DHT/JPG/DAC
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">HH", data[i + 5:i + 9])
+                return width, height
+            i += 2 + length
+    return None
+
+
+def estimate_image_tokens(data: bytes) -> int:
+    dims = _image_dimensions(data)
+    if dims is None:
+        # unknown size: assume a 2x2-tile image
+        return 4 * _TOKENS_PER_TILE
+    width, height = dims
+    if width <= _SMALL_IMAGE_PX and height <= _SMALL_IMAGE_PX:
+        return _TOKENS_PER_TILE
+    return math.ceil(width / _TILE_PX) * math.ceil(height / _TILE_PX) * _TOKENS_PER_TILE
+
+
+def pack_image_batches(images: List[Image], settings: dict) -> List[List[int]]:
+    """
+    Greedily pack images (by index, preserving order) into batches that stay
+    within every per-request limit. An image too large for any limit on its
+    own still gets a batch of its own.
+    """
+    max_images = max(1, min(
+        int(settings["max_images_per_request"]),
+        int(settings["max_output_tokens"]) // max(1, int(settings["output_tokens_per_image"])),
+    ))
+    max_tokens = int(settings["max_input_tokens"]) - _PROMPT_OVERHEAD_TOKENS
+    max_bytes = int(settings["max_request_mb"] * 1024 * 1024)
+
+    batches = []
+    current, tokens, size = [], 0, 0
+    for idx, (_, data, _) in enumerate(images):
+        img_tokens = estimate_image_tokens(data)
+        img_size = 4 * math.ceil(len(data) / 3)  # base64
+        if current and (
+            len(current) >= max_images
+            or tokens + img_tokens > max_tokens
+            or size + img_size > max_bytes
+        ):
+            batches.append(current)
+            current, tokens, size = [], 0, 0
+        current.append(idx)
+        tokens += img_tokens
+        size += img_size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _parse_descriptions(text: str, count: int) -> Optional[List[str]]:
+    """
+    Map the model's JSON answer back onto the batch; None if it can't be parsed.
+    """
+    try:
+        items = json.loads(text)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(items, list):
+        return None
+    result = [None] * count
+    for pos, item in enumerate(items):
+        if isinstance(item, dict):
+            desc = item.get("description")
+            number = item.get("image")
+            slot = number - 1 if isinstance(number, int) and 1 <= number <= count else pos
+        else:
+            desc, slot = item, pos
+        if isinstance(desc, str) and slot < count and result[slot] is None:
+            result[slot] = desc.strip()
+    return result
+
+
+class GeminiImageProcessor:
+    """
+    Describes a document's images with as few Gemini requests as possible.
+    """
+
+    def __init__(self, api_key: str, model: str, settings: dict,
+                 cache: Optional[DiskLRUCache] = None, prompt: str = DEFAULT_GEMINI_PROMPT):
+        from google import genai
+
+        self.client = genai.Client(api_key=api_key)
+        self.model = model
+        self.settings = settings
+        self.cache = cache
+        self.prompt = prompt
+        self.request_bucket = TokenBucket(settings["requests_per_min"])
+
+    def _cache_key(self, data: bytes) -> str:
+        h = hashlib.sha256()
+        h.update(hashlib.sha256(data).digest())
+        h.update(f"|model=gemini:{self.model}|prompt={self.prompt}".encode("utf-8"))
+        return h.hexdigest()
+
+    def _generate(self, contents: list, max_output_tokens: int):
+        from google.genai import types
+
+        config = types.GenerateContentConfig(
+            response_mime_type="application/json",
+            max_output_tokens=max_output_tokens,
+        )
+        attempt = 0
+        while True:
+            self.request_bucket.acquire(1)
+            try:
+                return self.client.models.generate_content(
+                    model=self.model, contents=contents, config=config
+                )
+            except Exception as ex:
+                if not _is_rate_limited(ex) or attempt >= self.settings["max_retries"]:
+                    raise
+                delay = _retry_after_sec(ex)
+                if delay is None:
+                    delay = self.settings["backoff_base_sec"] * (2 ** attempt)
+                time.sleep(delay)
+                attempt += 1
+
+    def describe_batch(self, batch: List[Image]) -> List[Optional[str]]:
+        from google.genai import types
+
+        contents = [self.prompt]
+        for number, (name, data, mimetype) in enumerate(batch, start=1):
+            contents.append(f"Image {number} ({name}):")
+            contents.append(types.Part.from_bytes(data=data, mime_type=mimetype))
+        max_output = min(
+            int(self.settings["max_output_tokens"]),
+            len(batch) * int(self.settings["output_tokens_per_image"]) * 2,
+        )
+        response = self._generate(contents, max_output)
+        descriptions = _parse_descriptions(response.text, len(batch))
+        if descriptions is None:
+            if len(batch) == 1:
+                return [(response.text or "").strip() or None]
+            raise ValueError("Gemini did not return a JSON array of descriptions.")
+        return descriptions
+
+    def describe_all(self, images: List[Image]) -> List[Optional[str]]:
+        """
+        Describe every image; results come back in input order.
+        Cached images are not sent, and a failed batch yields None for its images.
+        """
+        results: List[Optional[str]] = [None] * len(images)
+        pending = []
+        for idx, (_, data, _) in enumerate(images):
+            cached = self.cache.get(self._cache_key(data)) if self.cache is not None else None
+            if cached is not None:
+                results[idx] = cached.decode("utf-8")
+            else:
+                pending.append(idx)
+        if not pending:
+            return results
+
+        batches = [
+            [pending[i] for i in batch]
+            for batch in pack_image_batches([images[i] for i in pending], self.settings)
+        ]
+
+        def _run(batch: List[int]) -> None:
+            try:
+                descriptions = self.describe_batch([images[i] for i in batch])
+            except Exception as ex:
+                print(f"[!] Gemini image description failed for {len(batch)} image(s): {ex}")
+                return
+            for idx, desc in zip(batch, descriptions):
+                results[idx] = desc
+                if desc and self.cache is not None:
+                    try:
+                        self.cache.put(self._cache_key(images[idx][1]), desc.encode("utf-8"))
+                    except OSError as e:
+                        print(f"[!] Failed to store image description in cache: {e}")
+
+        workers = max(1, min(int(self.settings["concurrency"]), len(batches)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_run, batches))
+        return results
+
+
+def _get_description_cache(config: dict) -> Optional[DiskLRUCache]:
+    cache_cfg = config.get("llm_image_cache", {})
+    if not cache_cfg.get("enabled", True):
+        return None
+    root = os.path.join(get_cache_root(config), "llm_img_desc")
+    max_bytes = int(cache_cfg.get("max_mb", 64)) * 1024 * 1024
+    return DiskLRUCache(root, max_bytes, suffix=".txt")
+
+
+def document_images_for_gemini(path, settings: dict, extension: Optional[str] = None) -> List[Image]:
+    """
+    The document's images Gemini can take, skipping tiny ones (bullets, rules)
+    and exact duplicates.
+    """
+    seen = set()
+    images = []
+    for name, data, mimetype in extract_document_images(path, extension):
+        if mimetype not in SUPPORTED_MIMETYPES or len(data) < int(settings["min_image_bytes"]):
+            continue
+        digest = hashlib.sha256(data).digest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+        images.append((name, data, mimetype))
+    return images
+
+
+def describe_document_images(
+    path,
+    api_key: str,
+    model: str,
+    config: dict,
+    extension: Optional[str] = None,
+) -> Tuple[str, int]:
+    """
+    Returns (markdown section describing the document's images, number of images
+    left undescribed). The section is "" if there are no images.
+    `path` may be a seekable stream if `extension` is given.
+    """
+    settings = get_gemini_settings(config)
+    images = document_images_for_gemini(path, settings, extension)
+    if not images:
+        return "", 0
+
+    processor = GeminiImageProcessor(api_key, model, settings, _get_description_cache(config))
+    descriptions = processor.describe_all(images)
+
+    lines = ["## Image Descriptions (Gemini)", ""]
+    for number, ((name, _, _), desc) in enumerate(zip(images, descriptions), start=1):
+        lines.append(f"### Image {number}: {name}")
+        lines.append("")
+        lines.append(desc or "_(no description available)_")
+        lines.append("")
+    return "\n".join(lines), sum(1 for desc in descriptions if not desc)
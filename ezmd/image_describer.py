@@ -0,0 +1,315 @@
+"""
+Concurrent, rate-limited image descriptions for a single document.
+
+MarkItDown describes images one at a time, so a 200-image deck costs 200
+sequential round-trips. Before MarkItDown runs, prefetch_image_descriptions()
+extracts the document's images and describes them concurrently through the
+CachingLLMClient (see llm_cache.py), with:
+ - a thread pool of `concurrency` workers,
+ - token buckets for requests/minute and tokens/minute,
+ - retries with exponential backoff on 429 (honouring Retry-After).
+MarkItDown then walks the document in its usual order and every description
+comes out of the cache, so the markdown keeps document order.
+
+Settings live in the "image_description" config section.
+"""
+
+import os
+import re
+import time
+import base64
+import hashlib
+import zipfile
+import tempfile
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+# Must match MarkItDown's default caption prompt, since prompts are part of the cache key.
+DEFAULT_IMG_DESC_PROMPT = "Write a detailed caption for this image."
+
+DEFAULT_IMAGE_DESCRIPTION_SETTINGS = {
+    "concurrent": True,
+    "concurrency": 8,
+    "requests_per_min": 500,
+    "tokens_per_min": 200000,
+    "est_tokens_per_image": 1000,
+    "max_retries": 5,
+    "backoff_base_sec": 1.0,
+}
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+# Extensions whose images MarkItDown sends to the LLM.
+LLM_DESCRIBED_EXTENSIONS = IMAGE_EXTENSIONS + (".pptx",)
+
+_OOXML_MEDIA_DIRS = {
+    ".pptx": "ppt/media/",
+    ".docx": "word/media/",
+    ".xlsx": "xl/media/",
+}
+
+
+def get_image_description_settings(config: Optional[dict]) -> dict:
+    settings = dict(DEFAULT_IMAGE_DESCRIPTION_SETTINGS)
+    if config:
+        settings.update(config.get("image_description", {}) or {})
+    return settings
+
+
+def extract_document_images(path, extension: Optional[str] = None) -> List[Tuple[str, bytes, str]]:
+    """
+    Returns (name, bytes, mimetype) for every image in the document, in
+    document order as far as the format allows (media parts sorted naturally).
+    Supports standalone images, OOXML containers (.pptx/.docx/.xlsx) and PDFs
+    (page order, when pypdfium2 is installed).
+
+    `path` may also be a seekable binary stream (diskless conversion); pass its
+    extension then. The stream is rewound afterwards.
+    """
+    if hasattr(path, "read"):
+        try:
+            return _extract_images(path, (extension or "").lower(), "document" + (extension or ""))
+        finally:
+            path.seek(0)
+    ext = (extension or os.path.splitext(path)[1]).lower()
+    return _extract_images(path, ext, os.path.basename(path))
+
+
+def _extract_images(source, ext: str, name: str) -> List[Tuple[str, bytes, str]]:
+    if ext in IMAGE_EXTENSIONS:
+        if hasattr(source, "read"):
+            data = source.read()
+        else:
+            with open(source, "rb") as f:
+                data = f.read()
+        return [(name, data, _guess_mimetype(name))]
+    if ext == ".pdf":
+        return _extract_pdf_images(source)
+
+    media_dir = _OOXML_MEDIA_DIRS.get(ext)
+    if media_dir is None:
+        return []
+    images = []
+    try:
+        with zipfile.ZipFile(source) as zf:
+            names = [n for n in zf.namelist() if n.startswith(media_dir) and not n.endswith("/")]
+            for name in sorted(names, key=_natural_key):
+                mimetype = _guess_mimetype(name)
+                if not mimetype.startswith("image/"):
+                    continue
+                images.append((os.path.basename(name), zf.read(name), mimetype))
+    except zipfile.BadZipFile:
+        return []
+    return images
+
+
+def _extract_pdf_images(path) -> List[Tuple[str, bytes, str]]:
+    try:
+        import pypdfium2 as pdfium
+        import pypdfium2.raw as pdfium_c
+    except ImportError:
+        return []
+
+    images = []
+    try:
+        pdf = pdfium.PdfDocument(path)
+    except Exception:
+        return []
+    try:
+        with tempfile.TemporaryDirectory(prefix="ezmd_pdfimg_") as tmp:
+            for page_no in range(len(pdf)):
+                page = pdf[page_no]
+                objects = page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_IMAGE,), max_depth=2)
+                for obj_no, obj in enumerate(objects):
+                    prefix = os.path.join(tmp, f"page{page_no + 1}_img{obj_no + 1}")
+                    try:
+                        # JPEG/JPEG 2000 are copied as-is, anything else is re-encoded as PNG
+                        obj.extract(prefix, fb_format="png")
+                    except Exception:
+                        continue
+                    for name in os.listdir(tmp):
+                        full = os.path.join(tmp, name)
+                        with open(full, "rb") as f:
+                            images.append((name, f.read(), _guess_mimetype(name)))
+                        os.remove(full)
+    finally:
+        pdf.close()
+    return images
+
+
+def _natural_key(name: str):
+    # image2.png sorts before image10.png
+    return [int(tok) if tok.isdigit() else tok for tok in re.split(r"(\d+)", name)]
+
+
+def _guess_mimetype(name: str) -> str:
+    mimetype, _ = mimetypes.guess_type(name)
+    return mimetype or "application/octet-stream"
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate_per_min` tokens refill continuously,
+    up to a burst of one minute's worth. acquire() blocks until enough are available.
+    """
+
+    def __init__(self, rate_per_min: float):
+        self.capacity = float(rate_per_min)
+        self.rate = float(rate_per_min) / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1.0) -> None:
+        amount = min(float(amount), self.capacity)
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def debit(self, amount: float) -> None:
+        """
+        Charge extra usage discovered after the fact (may go negative).
+        """
+        with self.lock:
+            self._refill()
+            self.tokens -= amount
+
+
+def _build_messages(prompt: str, image: bytes, mimetype: str) -> list:
+    """
+    Same message shape MarkItDown's llm_caption sends.
+    """
+    data_uri = f"data:{mimetype};base64,{base64.b64encode(image).decode('utf-8')}"
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": prompt},
+                {"type": "image_url", "image_url": {"url": data_uri}},
+            ],
+        }
+    ]
+
+
+def _is_rate_limited(ex: Exception) -> bool:
+    # openai errors carry status_code, google-genai errors carry code
+    status = getattr(ex, "status_code", None) or getattr(ex, "code", None)
+    if status is None:
+        status = getattr(getattr(ex, "response", None), "status_code", None)
+    return status == 429
+
+
+def _retry_after_sec(ex: Exception) -> Optional[float]:
+    headers = getattr(getattr(ex, "response", None), "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class ImageDescriber:
+    """
+    Describes many images concurrently while respecting request/token rate limits.
+    """
+
+    def __init__(self, client, model: str, settings: dict, prompt: str = DEFAULT_IMG_DESC_PROMPT):
+        self.client = client
+        self.model = model
+        self.prompt = prompt
+        self.settings = settings
+        self.request_bucket = TokenBucket(settings["requests_per_min"])
+        self.token_bucket = TokenBucket(settings["tokens_per_min"])
+
+    def describe_one(self, image: bytes, mimetype: str) -> Optional[str]:
+        messages = _build_messages(self.prompt, image, mimetype)
+        estimate = self.settings["est_tokens_per_image"]
+        attempt = 0
+        while True:
+            self.request_bucket.acquire(1)
+            self.token_bucket.acquire(estimate)
+            try:
+                response = self.client.chat.completions.create(model=self.model, messages=messages)
+            except Exception as ex:
+                if not _is_rate_limited(ex) or attempt >= self.settings["max_retries"]:
+                    raise
+                delay = _retry_after_sec(ex)
+                if delay is None:
+                    delay = self.settings["backoff_base_sec"] * (2 ** attempt)
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            usage = getattr(response, "usage", None)
+            used = getattr(usage, "total_tokens", None) if usage is not None else None
+            if used and used > estimate:
+                self.token_bucket.debit(used - estimate)
+            return response.choices[0].message.content
+
+    def describe_all(self, images: List[Tuple[str, bytes, str]]) -> List[Optional[str]]:
+        """
+        Describe every image; results come back in input order.
+        A failed image yields None rather than failing the whole batch.
+        """
+        def _one(item: Tuple[str, bytes, str]) -> Optional[str]:
+            _, data, mimetype = item
+            try:
+                return self.describe_one(data, mimetype)
+            except Exception as ex:
+                print(f"[!] Image description failed for {item[0]}: {ex}")
+                return None
+
+        workers = max(1, min(int(self.settings["concurrency"]), len(images) or 1))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_one, images))
+
+
+def prefetch_image_descriptions(
+    path,
+    llm_client,
+    llm_model: str,
+    config: dict,
+    extension: Optional[str] = None,
+) -> int:
+    """
+    Warm the image-description cache for `path` concurrently before MarkItDown runs.
+    `path` may be a seekable stream if `extension` is given.
+    Returns the number of images described (0 if disabled or nothing to do).
+    """
+    from .llm_cache import CachingLLMClient
+
+    settings = get_image_description_settings(config)
+    if not settings.get("concurrent", True):
+        return 0
+    # without the cache, MarkItDown could not reuse our answers
+    if not isinstance(llm_client, CachingLLMClient):
+        return 0
+    ext = (extension or os.path.splitext(path)[1]).lower()
+    if ext not in LLM_DESCRIBED_EXTENSIONS:
+        return 0
+
+    images = extract_document_images(path, ext)
+    # identical images share one cache entry, so describe each only once
+    seen = set()
+    unique = []
+    for item in images:
+        digest = hashlib.sha256(item[1]).digest()
+        if digest not in seen:
+            seen.add(digest)
+            unique.append(item)
+    if len(unique) < 2:
+        return 0  # nothing to overlap; MarkItDown's own call is just as fast
+
+    ImageDescriber(llm_client, llm_model, settings).describe_all(unique)
+    return len(unique)
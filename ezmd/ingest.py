@@ -0,0 +1,104 @@
+"""
+Placing local source files into raw/ without copying them when possible.
+
+Ingest modes ("ingest.mode" in the config):
+ - "reflink"  (default) copy-on-write clone (FICLONE, e.g. btrfs/xfs): no extra
+              space, and the raw file is still independent of the source.
+ - "hardlink" hardlink to the source (same filesystem); edits to the source show
+              up in raw/. Falls back to a reflink.
+ - "symlink"  symlink to the source's absolute path; breaks if the source moves.
+ - "copy"     plain copy (the previous behaviour).
+ - "direct"   no raw copy at all; local sources are converted in place and URL
+              sources are streamed into a spooled buffer (in memory up to
+              "spool_max_mb", then an anonymous temp file) and converted from it.
+Every mode falls back to a plain copy when its mechanism is unavailable
+(other filesystem, unsupported OS, ...).
+
+The new name is always swapped in with os.replace, so ingesting onto an
+existing (or reserved) raw path never writes through another hardlink.
+"""
+
+import os
+import shutil
+import threading
+from typing import Optional
+
+INGEST_MODES = ("reflink", "hardlink", "symlink", "copy", "direct")
+
+DEFAULT_INGEST_SETTINGS = {
+    "mode": "reflink",
+    "spool_max_mb": 64,
+}
+
+# linux/fs.h: _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+_FALLBACKS = {
+    "reflink": ("reflink", "copy"),
+    "hardlink": ("hardlink", "reflink", "copy"),
+    "symlink": ("symlink", "copy"),
+    "copy": ("copy",),
+}
+
+
+def get_ingest_settings(config: Optional[dict]) -> dict:
+    settings = dict(DEFAULT_INGEST_SETTINGS)
+    if config:
+        settings.update(config.get("ingest", {}) or {})
+    return settings
+
+
+def get_ingest_mode(config: Optional[dict]) -> str:
+    mode = get_ingest_settings(config)["mode"]
+    if mode not in INGEST_MODES:
+        raise ValueError(f"Unknown ingest mode: {mode} (expected one of {', '.join(INGEST_MODES)})")
+    return mode
+
+
+def _reflink(src: str, dst: str) -> None:
+    import fcntl
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+    shutil.copystat(src, dst)
+
+
+def _hardlink(src: str, dst: str) -> None:
+    os.link(src, dst)
+
+
+def _symlink(src: str, dst: str) -> None:
+    os.symlink(os.path.abspath(src), dst)
+
+
+def _copy(src: str, dst: str) -> None:
+    shutil.copy2(src, dst)
+
+
+_METHODS = {
+    "reflink": _reflink,
+    "hardlink": _hardlink,
+    "symlink": _symlink,
+    "copy": _copy,
+}
+
+
+def ingest_local_file(source: str, dest: str, mode: str) -> str:
+    """
+    Put `source` at `dest` using `mode` (anything but "direct"), falling back
+    as described above. Returns the method that was actually used.
+    """
+    tmp = f"{dest}.ingest-{os.getpid()}-{threading.get_ident()}"
+    for method in _FALLBACKS[mode]:
+        try:
+            _METHODS[method](source, tmp)
+        except (OSError, ImportError):
+            # e.g. EXDEV across filesystems, EOPNOTSUPP without reflink support
+            if os.path.lexists(tmp):
+                os.remove(tmp)
+            if method == "copy":
+                raise
+            continue
+        os.replace(tmp, dest)
+        return method
+    raise AssertionError("unreachable: copy is always the last fallback")
@@ -0,0 +1,531 @@
+"""
+Supervised worker processes for conversions.
+
+A malformed document can make MarkItDown allocate gigabytes or spin forever.
+SupervisedPool runs jobs in child processes instead, with a
+concurrent.futures-style interface (submit() returns a Future, so
+as_completed() and .done() work as with ProcessPoolExecutor):
+
+ - each worker runs with RLIMIT_AS = memory_mb (an allocation past it raises
+   MemoryError in the worker), and the supervisor kills a worker whose
+   resident set grows past max_rss_mb (Linux, via /proc);
+ - a job running longer than timeout_sec is killed, together with any
+   processes it started (workers lead their own process group);
+ - a worker is replaced after max_jobs_per_worker jobs, so memory creep in
+   long runs stays bounded;
+ - when a worker dies, times out or runs out of memory, the job's future
+   raises WorkerFailed carrying a structured error record, and the pool
+   carries on with a fresh worker. Exceptions raised by the job itself are
+   re-raised unchanged when they can be pickled;
+ - files a job announces with claim_for_job() (the converter's O_EXCL name
+   reservations) are removed by the supervisor if the worker is killed
+   before the job finishes, so no empty placeholder outputs are left behind.
+
+Error records are plain dicts: {"kind": "exception" | "timeout" | "memory" |
+"crashed" | "aborted", "message": ..., plus details such as "type",
+"traceback", "elapsed_sec", "peak_rss_mb", "exit_code", "signal", "pid"}.
+
+With interactive=True, input() inside a worker is forwarded to the parent,
+so the TUI's collision prompts keep working.
+
+Settings live under "isolation" in the config; 0 disables a limit, and
+"enabled": false drops all of them (the TUI and daemon then convert in-process).
+"""
+
+import os
+import time
+import atexit
+import pickle
+import signal
+import sys
+import threading
+import traceback
+import collections
+import weakref
+import multiprocessing
+import multiprocessing.util  # registers its atexit hook before ours, so ours runs first
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+from typing import List, Optional
+
+DEFAULT_ISOLATION_SETTINGS = {
+    "enabled": True,
+    "memory_mb": 4096,
+    "max_rss_mb": 3072,
+    "timeout_sec": 900,
+    "max_jobs_per_worker": 50,
+}
+
+# how often a busy worker's resident set size is checked
+_RSS_CHECK_SEC = 0.5
+
+_live_pools: "weakref.WeakSet[SupervisedPool]" = weakref.WeakSet()
+
+# in a worker process: the connection to the supervisor
+_supervisor_conn = None
+
+
+def get_isolation_settings(config: Optional[dict]) -> dict:
+    settings = dict(DEFAULT_ISOLATION_SETTINGS)
+    if config:
+        settings.update(config.get("isolation", {}) or {})
+    return settings
+
+
+def error_record(kind: str, message: str, **details) -> dict:
+    record = {"kind": kind, "message": message}
+    record.update(details)
+    return record
+
+
+class WorkerFailed(Exception):
+    """
+    The worker running a job died, timed out or ran out of memory.
+    """
+
+    def __init__(self, record: dict):
+        super().__init__(record["message"])
+        self.record = record
+
+
+def claim_for_job(path: str) -> None:
+    """
+    In a supervised worker, report that the running job created path, so the
+    supervisor removes it if the job is killed. No-op in any other process.
+    """
+    if _supervisor_conn is not None:
+        _supervisor_conn.send(("claim", path))
+
+
+def _remote_input(conn, prompt: str = "") -> str:
+    conn.send(("input", str(prompt)))
+    return conn.recv()
+
+
+def _limit_address_space(memory_mb: int) -> None:
+    if not memory_mb:
+        return
+    try:
+        import resource
+
+        limit = int(memory_mb) * 1024 * 1024
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ImportError, ValueError, OSError):
+        # not enforceable here (e.g. macOS); the supervisor's RSS check still applies
+        pass
+
+
+def _die_with_parent() -> None:
+    """
+    Linux: get SIGKILLed if the supervisor goes away without stopping us.
+    """
+    if not sys.platform.startswith("linux"):
+        return
+    try:
+        import ctypes
+
+        ctypes.CDLL(None).prctl(1, signal.SIGKILL)  # PR_SET_PDEATHSIG
+    except (OSError, AttributeError):
+        pass
+
+
+def _worker_main(conn, parent_conn, memory_mb: int, interactive: bool) -> None:
+    """
+    Child process loop: receive (fn, args, kwargs), reply with the outcome.
+    """
+    global _supervisor_conn
+    # our copy of the parent's end would keep recv() from seeing EOF when the parent dies
+    parent_conn.close()
+    # Ctrl-C is the parent's business; it kills us if needed
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    os.setpgrp()
+    _die_with_parent()
+    _limit_address_space(memory_mb)
+    _supervisor_conn = conn
+    if interactive:
+        import builtins
+
+        builtins.input = lambda prompt="": _remote_input(conn, prompt)
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+        if job is None:
+            return
+        fn, args, kwargs = job
+        try:
+            reply = ("ok", fn(*args, **kwargs))
+        except MemoryError:
+            reply = ("failed", error_record(
+                "memory", f"MemoryError: the conversion exceeded the {memory_mb} MB address space limit"))
+        except BaseException as ex:
+            record = error_record("exception", f"{type(ex).__name__}: {ex}", type=type(ex).__name__,
+                                  traceback=traceback.format_exc(limit=-10))
+            try:
+                # the parent re-raises it, so it must survive the round trip
+                pickle.loads(pickle.dumps(ex))
+                reply = ("raised", ex, record)
+            except Exception:
+                reply = ("failed", record)
+        try:
+            conn.send(reply)
+        except Exception as ex:
+            conn.send(("failed", error_record("exception", f"Could not send the result back: {ex}")))
+        if reply[0] == "failed" and reply[1]["kind"] == "memory":
+            # don't reuse a process that hit its memory limit
+            return
+
+
+class _Worker:
+    """
+    Parent-side handle of one worker process.
+    """
+
+    def __init__(self, ctx, settings: dict, interactive: bool):
+        self.settings = settings
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, name="ezmd-worker",
+                                   args=(child_conn, self.conn, settings["memory_mb"], interactive))
+        self.process.start()
+        child_conn.close()
+        self.future: Optional[Future] = None
+        self.jobs_done = 0
+        self.started = 0.0
+        self.waited_on_input = 0.0
+        self.peak_rss = 0
+        self.next_rss_check = 0.0
+        self.killed_record: Optional[dict] = None
+        self.claimed: List[str] = []
+
+    @property
+    def busy(self) -> bool:
+        return self.future is not None
+
+    def start_job(self, future: Future, fn, args: tuple, kwargs: dict) -> None:
+        self.future = future
+        self.started = time.monotonic()
+        self.waited_on_input = 0.0
+        self.peak_rss = 0
+        self.next_rss_check = self.started
+        self.killed_record = None
+        self.claimed = []
+        self.conn.send((fn, args, kwargs))
+
+    def finish_job(self) -> Future:
+        future, self.future = self.future, None
+        self.jobs_done += 1
+        self.claimed = []
+        return future
+
+    def discard_claimed(self) -> None:
+        """
+        After the worker died mid-job: remove the files the job claimed,
+        including claims still unread in the pipe.
+        """
+        try:
+            while self.conn.poll():
+                message = self.receive()
+                if message is None:
+                    break
+                if message[0] == "claim":
+                    self.claimed.append(message[1])
+        except OSError:
+            pass
+        for path in self.claimed:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.claimed = []
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started - self.waited_on_input
+
+    def _details(self) -> dict:
+        return {
+            "elapsed_sec": round(self.elapsed(), 3),
+            "peak_rss_mb": round(self.peak_rss / (1024 * 1024), 1),
+            "pid": self.process.pid,
+        }
+
+    def rss_bytes(self) -> Optional[int]:
+        try:
+            with open(f"/proc/{self.process.pid}/statm", "rb") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def check_limits(self) -> Optional[dict]:
+        """
+        Kill the worker if its job is over the time or RSS limit; returns the error record.
+        """
+        now = time.monotonic()
+        timeout = self.settings["timeout_sec"]
+        if timeout and self.elapsed() > timeout:
+            self.kill()
+            self.killed_record = error_record(
+                "timeout", f"Conversion did not finish within {timeout:g}s", **self._details())
+            return self.killed_record
+        max_rss_mb = self.settings["max_rss_mb"]
+        if max_rss_mb and now >= self.next_rss_check:
+            self.next_rss_check = now + _RSS_CHECK_SEC
+            rss = self.rss_bytes()
+            if rss is not None:
+                self.peak_rss = max(self.peak_rss, rss)
+                if rss > max_rss_mb * 1024 * 1024:
+                    self.kill()
+                    self.killed_record = error_record(
+                        "memory", f"Conversion exceeded {max_rss_mb} MB resident memory", **self._details())
+                    return self.killed_record
+        return None
+
+    def next_deadline(self) -> Optional[float]:
+        """
+        Seconds until check_limits() has something to do, or None.
+        """
+        waits = []
+        if self.settings["timeout_sec"]:
+            waits.append(self.settings["timeout_sec"] - self.elapsed())
+        if self.settings["max_rss_mb"]:
+            waits.append(self.next_rss_check - time.monotonic())
+        return max(0.0, min(waits)) if waits else None
+
+    def crash_record(self) -> dict:
+        if self.killed_record is not None:
+            return self.killed_record
+        self.process.join(1)
+        code = self.process.exitcode
+        details = self._details()
+        details["exit_code"] = code
+        if code is not None and code < 0:
+            name = signal.Signals(-code).name
+            details["signal"] = name
+            hint = " (possibly the kernel's out-of-memory killer)" if -code == signal.SIGKILL else ""
+            return error_record("crashed", f"Conversion worker was killed by {name}{hint}", **details)
+        return error_record("crashed", f"Conversion worker exited unexpectedly (exit code {code})", **details)
+
+    def receive(self):
+        """
+        Next message from the worker, or None if it died before sending one.
+        """
+        try:
+            return self.conn.recv()
+        except Exception:
+            return None
+
+    def kill(self) -> None:
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError, TypeError):
+            pass
+        try:
+            self.process.kill()
+        except (ProcessLookupError, ValueError):
+            pass
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def _resolve(future: Future, message) -> None:
+    kind = message[0]
+    if kind == "ok":
+        future.set_result(message[1])
+    elif kind == "raised":
+        future.set_exception(message[1])
+    else:
+        future.set_exception(WorkerFailed(message[1]))
+
+
+class SupervisedPool:
+    """
+    A process pool whose workers are memory-capped, timed out and recycled.
+    """
+
+    def __init__(self, max_workers: int, config: Optional[dict] = None, interactive: bool = False):
+        settings = get_isolation_settings(config)
+        if not settings["enabled"]:
+            settings.update(memory_mb=0, max_rss_mb=0, timeout_sec=0, max_jobs_per_worker=0)
+        self.settings = settings
+        self.max_workers = max(1, int(max_workers))
+        self.interactive = interactive
+        self._ctx = multiprocessing.get_context()
+        self._pending = collections.deque()  # (future, fn, args, kwargs)
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._wake_r, self._wake_w = os.pipe()
+        self._shutdown = False
+        self._abort = False
+        self._thread = threading.Thread(target=self._manage, name="ezmd-supervisor", daemon=True)
+        self._thread.start()
+        _live_pools.add(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown(wait=exc_type is None, cancel_futures=exc_type is not None)
+        return False
+
+    def start_workers(self) -> None:
+        """
+        Fork the workers now instead of on demand, e.g. before starting other
+        threads or accepting connections, or to inherit a warmed-up parent.
+        """
+        with self._lock:
+            while len(self._workers) < self.max_workers:
+                self._workers.append(_Worker(self._ctx, self.settings, self.interactive))
+        self._wake()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot submit to a pool that has been shut down")
+            self._pending.append((future, fn, args, kwargs))
+        self._wake()
+        return future
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        """
+        wait=False kills running jobs (their futures raise WorkerFailed) and returns.
+        """
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while self._pending:
+                    self._pending.popleft()[0].cancel()
+            if not wait:
+                self._abort = True
+                for worker in list(self._workers):
+                    worker.kill()
+        self._wake()
+        if wait:
+            self._thread.join()
+
+    def _wake(self) -> None:
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass
+
+    def _assign(self) -> None:
+        with self._lock:
+            while self._pending:
+                worker = next((w for w in self._workers if not w.busy and w.process.is_alive()), None)
+                if worker is None:
+                    if len(self._workers) >= self.max_workers:
+                        return
+                    worker = _Worker(self._ctx, self.settings, self.interactive)
+                    self._workers.append(worker)
+                future, fn, args, kwargs = self._pending.popleft()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    worker.start_job(future, fn, args, kwargs)
+                except Exception as ex:
+                    # e.g. an argument that cannot be pickled
+                    worker.finish_job()
+                    future.set_exception(ex)
+
+    def _retire(self, worker: _Worker, kill: bool = False) -> None:
+        with self._lock:
+            self._workers.remove(worker)
+        if kill:
+            worker.kill()
+            worker.process.join()
+            worker.conn.close()
+        else:
+            worker.stop()
+
+    def _manage(self) -> None:
+        try:
+            self._loop()
+        finally:
+            for worker in list(self._workers):
+                if worker.busy:
+                    if self._abort:
+                        worker.discard_claimed()
+                    worker.finish_job().set_exception(WorkerFailed(error_record(
+                        "aborted", "The worker pool was shut down before the conversion finished")))
+                self._retire(worker, kill=self._abort)
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+
+    def _loop(self) -> None:
+        max_jobs = self.settings["max_jobs_per_worker"]
+        while True:
+            if self._abort:
+                return
+            self._assign()
+            busy = [w for w in self._workers if w.busy]
+            with self._lock:
+                if self._shutdown and not self._pending and not busy:
+                    return
+
+            deadlines = [d for d in (w.next_deadline() for w in busy) if d is not None]
+            ready = wait([self._wake_r] + [w.conn for w in busy] + [w.process.sentinel for w in self._workers],
+                         timeout=min(deadlines) if deadlines else None)
+            if self._wake_r in ready:
+                os.read(self._wake_r, 4096)
+
+            for worker in list(self._workers):
+                # a reply is read even if the worker exited right after sending it
+                message = worker.receive() if worker.busy and worker.conn.poll() else None
+                if message is not None and message[0] == "input":
+                    self._forward_input(worker, message[1])
+                    continue
+                if message is not None and message[0] == "claim":
+                    worker.claimed.append(message[1])
+                    continue
+                if message is not None:
+                    if message[0] != "ok":
+                        message[-1].update(worker._details())
+                    _resolve(worker.finish_job(), message)
+                    if message[0] == "failed" and message[1]["kind"] == "memory":
+                        # the worker exits after a MemoryError
+                        self._retire(worker, kill=True)
+                    elif max_jobs and worker.jobs_done >= max_jobs:
+                        self._retire(worker)
+                    continue
+                if not worker.process.is_alive():
+                    if worker.busy:
+                        record = worker.crash_record()
+                        worker.discard_claimed()
+                        worker.finish_job().set_exception(WorkerFailed(record))
+                    self._retire(worker, kill=True)
+                    continue
+                if worker.busy and worker.check_limits() is not None:
+                    worker.discard_claimed()
+                    worker.finish_job().set_exception(WorkerFailed(worker.killed_record))
+                    self._retire(worker, kill=True)
+
+    def _forward_input(self, worker: _Worker, prompt: str) -> None:
+        asked = time.monotonic()
+        try:
+            answer = input(prompt)
+        except EOFError:
+            answer = ""
+        worker.waited_on_input += time.monotonic() - asked
+        worker.conn.send(answer)
+
+
+@atexit.register
+def _shutdown_pools() -> None:
+    # workers are not daemonic (they may start their own pools), so they must
+    # be stopped before multiprocessing joins them at exit
+    for pool in list(_live_pools):
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,120 @@
+"""
+Persistent cache for LLM image descriptions.
+
+MarkItDown describes images by calling `client.chat.completions.create(model=..., messages=...)`
+with a text prompt and the image as a base64 data URI. CachingLLMClient stands in
+for that client: requests are keyed by the SHA-256 of the decoded image bytes, the
+model and the prompt, and answers are stored on disk (size-bounded LRU under
+<base_context_dir>/.ezmd_cache/llm_img_desc). Re-converting a document, or any
+document that reuses the same logo/figure, then makes no model call for it.
+
+Requests that don't look like an image description pass straight through.
+"""
+
+import os
+import base64
+import hashlib
+import threading
+from types import SimpleNamespace
+from typing import Optional
+
+from .disk_cache import DiskLRUCache, get_cache_root
+
+
+def image_desc_cache_key(model: str, messages) -> Optional[str]:
+    """
+    Key for a single-image description request, or None if the request
+    doesn't have exactly one text prompt and one data-URI image.
+    """
+    try:
+        if len(messages) != 1:
+            return None
+        content = messages[0]["content"]
+        prompts = [part["text"] for part in content if part.get("type") == "text"]
+        images = [part["image_url"]["url"] for part in content if part.get("type") == "image_url"]
+    except (KeyError, TypeError, AttributeError):
+        return None
+    if len(prompts) != 1 or len(images) != 1 or not images[0].startswith("data:"):
+        return None
+
+    try:
+        image_bytes = base64.b64decode(images[0].split(",", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+    h = hashlib.sha256()
+    h.update(hashlib.sha256(image_bytes).digest())
+    h.update(f"|model={model}|prompt={prompts[0]}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _cached_response(text: str):
+    """
+    Minimal object with the shape MarkItDown reads: response.choices[0].message.content
+    """
+    message = SimpleNamespace(content=text, role="assistant")
+    return SimpleNamespace(choices=[SimpleNamespace(message=message, index=0)], usage=None)
+
+
+class CachingLLMClient:
+    """
+    Wraps an OpenAI client (or the `openai` module) and caches image descriptions.
+    Only `chat.completions.create` is intercepted, which is all MarkItDown uses.
+    """
+
+    def __init__(self, client, cache: DiskLRUCache):
+        self._client = client
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, *, model: str, messages, **kwargs):
+        key = image_desc_cache_key(model, messages) if not kwargs.get("stream") else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                return _cached_response(cached.decode("utf-8"))
+
+        response = self._client.chat.completions.create(model=model, messages=messages, **kwargs)
+        if key is not None:
+            self.misses += 1
+            try:
+                content = response.choices[0].message.content
+            except (AttributeError, IndexError):
+                content = None
+            if content:
+                try:
+                    self.cache.put(key, content.encode("utf-8"))
+                except OSError as e:
+                    print(f"[!] Failed to store image description in cache: {e}")
+        return response
+
+    def __getattr__(self, name):
+        # anything else (e.g. models, api_key) goes to the real client
+        return getattr(self._client, name)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_caching_llm_client(client, config: dict):
+    """
+    Returns the cached wrapper for `client`, or `client` itself when the
+    llm_image_cache is disabled. The same wrapper is reused per process so
+    MarkItDown instances built around it stay warm.
+    """
+    cache_cfg = config.get("llm_image_cache", {})
+    if not cache_cfg.get("enabled", True):
+        return client
+    root = os.path.join(get_cache_root(config), "llm_img_desc")
+    max_bytes = int(cache_cfg.get("max_mb", 64)) * 1024 * 1024
+    key = (id(client), root, max_bytes)
+    with _clients_lock:
+        wrapper = _clients.get(key)
+        if wrapper is None:
+            wrapper = CachingLLMClient(client, DiskLRUCache(root, max_bytes, suffix=".txt"))
+            _clients[key] = wrapper
+        return wrapper
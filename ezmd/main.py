@@ -4,10 +4,15 @@ Handles the initial loading of config,
 and dispatches control to the TUI main menu.
 
 Now catches Ctrl-C (KeyboardInterrupt) to avoid messy traceback.
+
+Subcommands (e.g. `ezmd batch <manifest>`, `ezmd watch <dir>`, `ezmd mirror <src> <dest>`) run non-interactively;
+plain `ezmd` opens the TUI.
 """
 
 import sys
 import os
+import argparse
+from typing import Optional
 
 from .config_manager import load_config, init_config_wizard, save_config
 from .tui import main_menu
@@ -16,6 +21,14 @@ def entry_point():
     """
     Invoked when user types 'ezmd'.
     """
+    args = _build_arg_parser().parse_args()
+    if args.command is not None:
+        try:
+            sys.exit(args.handler(args))
+        except KeyboardInterrupt:
+            print("\nExiting...")
+            sys.exit(130)
+
     try:
         config = load_config()
         if config is None:
@@ -25,8 +38,13 @@ def entry_point():
             # Prompt user if they'd like to configure remotes now
             _ask_configure_remotes(config)
 
+        # resume any syncs left pending by a previous run
+        from .sync_queue import pending_count, start_background_worker
+        if pending_count():
+            start_background_worker(config)
+
         while True:
-            main_menu(config)
+            main_menu(config, use_cache=not args.no_cache, profile=args.profile)
             # TUI handles changes that might need saving.
             # If the TUI-based actions do not exit, it returns here.
             break
@@ -47,6 +65,205 @@ def _ask_configure_remotes(config: dict) -> None:
         save_config(config)
 
 
+PROFILE_HELP = ("Profile each conversion; writes <name>.prof, <name>.collapsed (flame graph stacks) "
+                "and <name>.profile.txt next to the markdown.")
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="ezmd", description="Easy Markdown conversion tool.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always re-run MarkItDown instead of reusing cached conversions.")
+    parser.add_argument("--profile", action="store_true", help=PROFILE_HELP)
+    sub = parser.add_subparsers(dest="command")
+
+    p_batch = sub.add_parser("batch", help="Convert every row of a CSV/JSONL manifest non-interactively.")
+    p_batch.add_argument("manifest", help="Path to a .csv or .jsonl manifest with title,source[,provider] rows.")
+    p_batch.add_argument("-j", "--workers", type=int, default=None,
+                         help="Number of worker processes (default: config batch_workers or CPU count).")
+    p_batch.add_argument("--collision", choices=["skip", "version", "overwrite"], default="version",
+                         help="How to handle existing output files (default: version).")
+    p_batch.add_argument("--provider", default=None,
+                         help="Provider for rows that do not set one (default: config default_provider).")
+    p_batch.add_argument("--results", default=None, help="Write per-job results as JSON lines to this path.")
+    p_batch.add_argument("--no-cache", action="store_true", default=argparse.SUPPRESS,
+                         help="Always re-run MarkItDown instead of reusing cached conversions.")
+    p_batch.add_argument("--profile", action="store_true", default=argparse.SUPPRESS, help=PROFILE_HELP)
+    p_batch.add_argument("--sync", action="store_true",
+                         help="Push all new outputs to auto_sync remotes (one rsync per remote) at the end.")
+    p_batch.set_defaults(handler=_cmd_batch)
+
+    p_serve = sub.add_parser("serve", help="Run a resident conversion daemon on a local Unix socket.")
+    p_serve.add_argument("--socket", default=None, help="Socket path (default: <config_dir>/ezmd.sock).")
+    p_serve.set_defaults(handler=_cmd_serve)
+
+    p_submit = sub.add_parser("submit", help="Send one conversion to a running `ezmd serve` daemon.")
+    p_submit.add_argument("title")
+    p_submit.add_argument("source", help="URL, arXiv ID or local path.")
+    p_submit.add_argument("--provider", default="", help="LLM provider (e.g. openai).")
+    p_submit.add_argument("--collision", choices=["skip", "version", "overwrite"], default="version",
+                          help="How to handle existing output files (default: version).")
+    p_submit.add_argument("--no-cache", action="store_true", default=argparse.SUPPRESS,
+                          help="Always re-run MarkItDown instead of reusing cached conversions.")
+    p_submit.add_argument("--profile", action="store_true", default=argparse.SUPPRESS, help=PROFILE_HELP)
+    p_submit.add_argument("--socket", default=None, help="Socket path (default: <config_dir>/ezmd.sock).")
+    p_submit.set_defaults(handler=_cmd_submit)
+
+    p_status = sub.add_parser("sync-status", help="Show pending and failed items in the sync queue.")
+    p_status.add_argument("--retry-failed", action="store_true",
+                          help="Move failed items back to pending before showing the queue.")
+    p_status.add_argument("--drain", action="store_true",
+                          help="Push every pending item now (ignoring backoff) before showing the queue.")
+    p_status.set_defaults(handler=_cmd_sync_status)
+
+    p_watch = sub.add_parser("watch", help="Convert files as they are added to or modified in a directory.")
+    p_watch.add_argument("directory", help="Directory to watch (subdirectories included).")
+    p_watch.add_argument("-j", "--workers", type=int, default=None,
+                         help="Concurrent conversions (default: config watch.workers).")
+    p_watch.add_argument("--collision", choices=["skip", "version", "overwrite"], default=None,
+                         help="How to handle existing output files (default: config watch.collision, overwrite).")
+    p_watch.add_argument("--provider", default=None,
+                         help="LLM provider (default: config default_provider).")
+    p_watch.add_argument("--poll", action="store_true", help="Poll the directory instead of using inotify.")
+    p_watch.add_argument("--state", default=None,
+                         help="State file (default: <config_dir>/watch/<hash of directory>.json).")
+    p_watch.add_argument("--no-cache", action="store_true", default=argparse.SUPPRESS,
+                         help="Always re-run MarkItDown instead of reusing cached conversions.")
+    p_watch.add_argument("--profile", action="store_true", default=argparse.SUPPRESS, help=PROFILE_HELP)
+    p_watch.set_defaults(handler=_cmd_watch)
+
+    p_mirror = sub.add_parser("mirror", help="Incrementally convert a directory tree into a markdown tree.")
+    p_mirror.add_argument("src", help="Source directory tree.")
+    p_mirror.add_argument("dest", help="Destination for the .md files (and the .ezmd_mirror.json manifest).")
+    p_mirror.add_argument("-j", "--workers", type=int, default=None,
+                          help="Number of worker processes (default: config batch_workers or CPU count).")
+    p_mirror.add_argument("--provider", default=None,
+                          help="LLM provider (default: config default_provider).")
+    p_mirror.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                          help="Skip files/directories matching GLOB (name or relative path); repeatable.")
+    p_mirror.add_argument("-n", "--dry-run", action="store_true",
+                          help="Only list what would be converted and removed.")
+    p_mirror.add_argument("--no-cache", action="store_true", default=argparse.SUPPRESS,
+                          help="Always re-run MarkItDown instead of reusing cached conversions.")
+    p_mirror.add_argument("--profile", action="store_true", default=argparse.SUPPRESS, help=PROFILE_HELP)
+    p_mirror.set_defaults(handler=_cmd_mirror)
+
+    p_stats = sub.add_parser("stats", help="Show p50/p95/p99 timings per stage and per source extension.")
+    p_stats.add_argument("--since", type=float, default=None, metavar="HOURS",
+                         help="Only include events from the last HOURS hours.")
+    p_stats.add_argument("--path", default=None,
+                         help="Metrics file (default: config metrics.jsonl_path or <config_dir>/metrics.jsonl).")
+    p_stats.set_defaults(handler=_cmd_stats)
+
+    return parser
+
+
+def _load_config_noninteractive() -> Optional[dict]:
+    config = load_config()
+    if config is None:
+        print("[!] No configuration found. Run `ezmd` once to complete the setup wizard.")
+    return config
+
+
+def _cmd_batch(args: argparse.Namespace) -> int:
+    from .batch import run_batch, EXIT_BAD_INPUT
+
+    config = _load_config_noninteractive()
+    if config is None:
+        return EXIT_BAD_INPUT
+    return run_batch(
+        manifest_path=args.manifest,
+        config=config,
+        workers=args.workers,
+        collision_policy=args.collision,
+        default_provider=args.provider,
+        results_path=args.results,
+        use_cache=not args.no_cache,
+        profile=args.profile,
+        sync=args.sync,
+    )
+
+
+def _cmd_watch(args: argparse.Namespace) -> int:
+    from .watch import run_watch, EXIT_BAD_INPUT
+
+    config = _load_config_noninteractive()
+    if config is None:
+        return EXIT_BAD_INPUT
+    return run_watch(
+        directory=args.directory,
+        config=config,
+        workers=args.workers,
+        collision_policy=args.collision,
+        provider=args.provider,
+        use_cache=not args.no_cache,
+        profile=args.profile,
+        force_poll=args.poll,
+        state_path=args.state,
+    )
+
+
+def _cmd_mirror(args: argparse.Namespace) -> int:
+    from .mirror import run_mirror, EXIT_BAD_INPUT
+
+    config = _load_config_noninteractive()
+    if config is None:
+        return EXIT_BAD_INPUT
+    return run_mirror(
+        src=args.src,
+        dest=args.dest,
+        config=config,
+        workers=args.workers,
+        provider=args.provider,
+        use_cache=not args.no_cache,
+        profile=args.profile,
+        excludes=args.exclude,
+        dry_run=args.dry_run,
+    )
+
+
+def _cmd_stats(args: argparse.Namespace) -> int:
+    from .metrics import print_stats
+
+    return print_stats(load_config(), since_hours=args.since, path=args.path)
+
+
+def _cmd_serve(args: argparse.Namespace) -> int:
+    from .batch import EXIT_BAD_INPUT
+    from .daemon import serve
+
+    if _load_config_noninteractive() is None:
+        return EXIT_BAD_INPUT
+    return serve(args.socket)
+
+
+def _cmd_submit(args: argparse.Namespace) -> int:
+    from .daemon import submit
+
+    return submit(
+        title=args.title,
+        source=args.source,
+        provider=args.provider,
+        collision_policy=args.collision,
+        use_cache=not args.no_cache,
+        profile=args.profile,
+        socket_path=args.socket,
+    )
+
+
+def _cmd_sync_status(args: argparse.Namespace) -> int:
+    from .sync_queue import SyncQueue, drain_once, print_sync_status
+    from .rsync_manager import print_sync_summary
+
+    queue = SyncQueue()
+    if args.retry_failed:
+        print(f"[info] {queue.retry_failed()} failed item(s) moved back to pending.")
+    if args.drain:
+        results = drain_once(queue, load_config(), ignore_backoff=True)
+        print_sync_summary(results)
+    print_sync_status()
+    return 1 if queue.counts().get("failed", 0) else 0
+
+
 def debug_entry_point():
     """
     Alternate entry point for debugging with debugpy or VSCode.
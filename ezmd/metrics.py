@@ -0,0 +1,317 @@
+"""
+Per-stage timing and byte counters for conversions and rsync pushes.
+
+convert_document (and convert_file) time each stage they go through:
+  hash, catalog, download, copy (ingest into raw/), cache (conversion cache
+  lookup), llm (image descriptions: OpenAI prefetch / Gemini), markitdown,
+  write, link (duplicate linked instead of converted)
+and rsync_manager times each batched push ("rsync"). Every finished
+operation is appended as one JSON line to <config_dir>/metrics.jsonl:
+
+  {"ts": ..., "event": "convert", "status": "ok", "ext": ".pdf", "total_sec": 4.2,
+   "stages": {"download": {"sec": 1.1, "bytes": 524288}, "markitdown": {"sec": 2.9}}, ...}
+
+If "prometheus_textfile" is set, running totals (a duration histogram and a
+byte counter per stage, plus event counts) are also written there in the
+Prometheus text format, for node_exporter's textfile collector. Several
+processes (batch workers) may update it; a lock file serialises them.
+
+`ezmd stats` summarises the JSON lines (p50/p95/p99 per stage and per source
+extension). Settings live in the "metrics" config section.
+"""
+
+import os
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+from .config_manager import get_config_path
+
+DEFAULT_METRICS_SETTINGS = {
+    "enabled": True,
+    "jsonl_path": "",
+    "prometheus_textfile": "",
+    "max_mb": 32,
+}
+
+# Prometheus histogram buckets (seconds)
+_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def get_metrics_settings(config: Optional[dict]) -> dict:
+    settings = dict(DEFAULT_METRICS_SETTINGS)
+    if config:
+        settings.update(config.get("metrics", {}) or {})
+    return settings
+
+
+def get_metrics_path(config: Optional[dict]) -> str:
+    path = get_metrics_settings(config).get("jsonl_path")
+    if path:
+        return os.path.expanduser(path)
+    return os.path.join(os.path.dirname(get_config_path()), "metrics.jsonl")
+
+
+class StageRecorder:
+    """
+    Collects the stages of one operation; emitted by finish().
+    A stage that runs several times (e.g. hashing) accumulates.
+    """
+
+    def __init__(self, event: str, **fields):
+        self.event = event
+        self.fields = fields
+        self.stages: Dict[str, dict] = {}
+        self.status: Optional[str] = None
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, sec: float, nbytes: Optional[int] = None) -> None:
+        entry = self.stages.setdefault(name, {"sec": 0.0})
+        entry["sec"] += sec
+        if nbytes is not None:
+            self.add_bytes(name, nbytes)
+
+    def add_bytes(self, name: str, nbytes: int) -> None:
+        entry = self.stages.setdefault(name, {"sec": 0.0})
+        entry["bytes"] = entry.get("bytes", 0) + int(nbytes)
+
+    def finish(self, status: str, config: Optional[dict] = None, error: Optional[str] = None) -> dict:
+        """
+        Build the record and emit it. self.status, if set during the
+        operation (e.g. "linked"), overrides an "ok" status.
+        """
+        if status == "ok" and self.status:
+            status = self.status
+        record = {
+            "ts": round(time.time(), 3),
+            "event": self.event,
+            "status": status,
+            "total_sec": round(time.perf_counter() - self._start, 4),
+            **self.fields,
+            "stages": {
+                name: {k: (round(v, 4) if k == "sec" else v) for k, v in entry.items()}
+                for name, entry in self.stages.items()
+            },
+        }
+        if error:
+            record["error"] = error
+        emit(record, config)
+        return record
+
+
+def emit(record: dict, config: Optional[dict] = None) -> None:
+    """
+    Append record to the JSON-lines file (and update the Prometheus textfile).
+    Metrics must never break a conversion, so failures are only reported.
+    config=None reads the saved config (for callers that don't carry one).
+    """
+    if config is None:
+        from .config_manager import load_config
+        config = load_config() or {}
+    settings = get_metrics_settings(config)
+    if not settings.get("enabled", True):
+        return
+    try:
+        _append_jsonl(get_metrics_path(config), record, int(float(settings["max_mb"]) * 1024 * 1024))
+        if settings.get("prometheus_textfile"):
+            _update_prometheus(os.path.expanduser(settings["prometheus_textfile"]), record)
+    except OSError as e:
+        print(f"[!] Failed to write metrics: {e}")
+
+
+def _append_jsonl(path: str, record: dict, max_bytes: int) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    try:
+        if max_bytes > 0 and os.path.getsize(path) > max_bytes:
+            # keep one previous generation; `ezmd stats` reads both
+            os.replace(path, path + ".1")
+    except FileNotFoundError:
+        pass
+    line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+    # one O_APPEND write per record, so concurrent writers don't interleave
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def _new_histogram() -> dict:
+    return {"buckets": [0] * len(_BUCKETS), "sum": 0.0, "count": 0}
+
+
+def _observe(hist: dict, value: float) -> None:
+    for i, bound in enumerate(_BUCKETS):
+        if value <= bound:
+            hist["buckets"][i] += 1
+    hist["sum"] += value
+    hist["count"] += 1
+
+
+def _update_prometheus(path: str, record: dict) -> None:
+    """
+    Fold record into the running totals (<path>.state.json) and rewrite the
+    textfile atomically, under an exclusive lock.
+    """
+    import fcntl
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        state_path = path + ".state.json"
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            state = {"stages": {}, "events": {}, "durations": {}}
+
+        event = record["event"]
+        key = f"{event}|{record['status']}"
+        state["events"][key] = state["events"].get(key, 0) + 1
+        _observe(state["durations"].setdefault(event, _new_histogram()), record["total_sec"])
+        for name, entry in record["stages"].items():
+            stage = state["stages"].setdefault(name, dict(_new_histogram(), bytes=0))
+            _observe(stage, entry["sec"])
+            stage["bytes"] += entry.get("bytes", 0)
+        state["last_ts"] = record["ts"]
+
+        tmp = f"{state_path}.tmp-{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, state_path)
+
+        tmp = f"{path}.tmp-{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(_render_prometheus(state))
+        os.replace(tmp, path)
+
+
+def _render_histogram(lines: List[str], name: str, label: str, value: str, hist: dict) -> None:
+    for bound, count in zip(_BUCKETS, hist["buckets"]):
+        lines.append(f'{name}_bucket{{{label}="{value}",le="{bound}"}} {count}')
+    lines.append(f'{name}_bucket{{{label}="{value}",le="+Inf"}} {hist["count"]}')
+    lines.append(f'{name}_sum{{{label}="{value}"}} {hist["sum"]:.6f}')
+    lines.append(f'{name}_count{{{label}="{value}"}} {hist["count"]}')
+
+
+def _render_prometheus(state: dict) -> str:
+    lines = [
+        "# HELP ezmd_stage_duration_seconds Time spent in each conversion/sync stage.",
+        "# TYPE ezmd_stage_duration_seconds histogram",
+    ]
+    for name in sorted(state["stages"]):
+        _render_histogram(lines, "ezmd_stage_duration_seconds", "stage", name, state["stages"][name])
+    lines += [
+        "# HELP ezmd_stage_bytes_total Bytes processed by each stage.",
+        "# TYPE ezmd_stage_bytes_total counter",
+    ]
+    for name in sorted(state["stages"]):
+        lines.append(f'ezmd_stage_bytes_total{{stage="{name}"}} {state["stages"][name]["bytes"]}')
+    lines += [
+        "# HELP ezmd_event_duration_seconds End-to-end duration of conversions and pushes.",
+        "# TYPE ezmd_event_duration_seconds histogram",
+    ]
+    for event in sorted(state["durations"]):
+        _render_histogram(lines, "ezmd_event_duration_seconds", "event", event, state["durations"][event])
+    lines += [
+        "# HELP ezmd_events_total Finished conversions and pushes by outcome.",
+        "# TYPE ezmd_events_total counter",
+    ]
+    for key in sorted(state["events"]):
+        event, status = key.split("|", 1)
+        lines.append(f'ezmd_events_total{{event="{event}",status="{status}"}} {state["events"][key]}')
+    lines += [
+        "# HELP ezmd_last_event_timestamp_seconds Time of the last recorded event.",
+        "# TYPE ezmd_last_event_timestamp_seconds gauge",
+        f"ezmd_last_event_timestamp_seconds {state.get('last_ts', 0)}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def read_records(path: str, since_ts: Optional[float] = None) -> Iterable[dict]:
+    for p in (path + ".1", path):
+        try:
+            with open(p, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line
+                    if since_ts is None or record.get("ts", 0) >= since_ts:
+                        yield record
+        except FileNotFoundError:
+            continue
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Linear interpolation between closest ranks; sorted_values must be sorted.
+    """
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _format_bytes(n: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if n < 1024 or unit == "GiB":
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+
+
+def _print_table(title: str, rows: Dict[str, List[float]], extra: Optional[Dict[str, str]] = None) -> None:
+    print(f"\n{title:<14} {'n':>6} {'p50':>9} {'p95':>9} {'p99':>9}" + (f" {'bytes/run':>10}" if extra else ""))
+    for name in sorted(rows):
+        values = sorted(rows[name])
+        line = (f"{name:<14} {len(values):>6} "
+                f"{percentile(values, 50):>8.3f}s {percentile(values, 95):>8.3f}s {percentile(values, 99):>8.3f}s")
+        if extra:
+            line += f" {extra.get(name, '-'):>10}"
+        print(line)
+
+
+def print_stats(config: Optional[dict], since_hours: Optional[float] = None,
+                path: Optional[str] = None) -> int:
+    """
+    `ezmd stats`: p50/p95/p99 per stage and per source extension.
+    """
+    path = path or get_metrics_path(config)
+    since_ts = time.time() - since_hours * 3600 if since_hours else None
+
+    stage_secs: Dict[str, List[float]] = {}
+    stage_bytes: Dict[str, List[int]] = {}
+    ext_secs: Dict[str, List[float]] = {}
+    statuses: Dict[str, int] = {}
+    for record in read_records(path, since_ts):
+        statuses[f"{record['event']} {record['status']}"] = statuses.get(f"{record['event']} {record['status']}", 0) + 1
+        for name, entry in record.get("stages", {}).items():
+            stage_secs.setdefault(name, []).append(entry.get("sec", 0.0))
+            if "bytes" in entry:
+                stage_bytes.setdefault(name, []).append(entry["bytes"])
+        if record["event"] == "convert" and record["status"] == "ok":
+            ext_secs.setdefault(record.get("ext") or "?", []).append(record["total_sec"])
+
+    if not statuses:
+        window = f" in the last {since_hours:g}h" if since_hours else ""
+        print(f"[info] No metrics recorded{window} ({path}).")
+        return 0
+
+    print(f"Metrics from {path}" + (f" (last {since_hours:g}h)" if since_hours else ""))
+    print("  " + ", ".join(f"{k}: {v}" for k, v in sorted(statuses.items())))
+    avg_bytes = {name: _format_bytes(sum(v) / len(v)) for name, v in stage_bytes.items()}
+    _print_table("Stage", stage_secs, avg_bytes)
+    if ext_secs:
+        _print_table("Extension", ext_secs)
+    return 0
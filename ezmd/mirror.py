@@ -0,0 +1,268 @@
+"""
+Make-style mirroring of a directory tree, invoked as `ezmd mirror <src> <dest>`.
+
+Every file under <src> gets a markdown counterpart at the same relative
+location under <dest> (names sanitized like titles: "Q3 Report.pdf" ->
+"Q3_Report.md"). A manifest in <dest>/.ezmd_mirror.json records each source's
+(size, mtime_ns, sha256) fingerprint and its output, so a re-run only:
+ - converts files that are new or whose content changed (size/mtime differ
+   and the hash differs; a touched but identical file is just re-stamped),
+ - re-creates outputs that were deleted from <dest>,
+ - removes outputs whose source is gone (and directories left empty).
+Unchanged files cost one stat each, so a large, mostly unchanged tree
+refreshes in seconds.
+
+Sources whose names collide once sanitized (e.g. "a.pdf" and "a.docx") keep
+their extension in the output name ("a_pdf.md", "a_docx.md").
+
+Exit codes follow `ezmd batch`: 0 ok, 1 some conversion failed, 2 bad input.
+"""
+
+import os
+import json
+import time
+import fnmatch
+from concurrent.futures import as_completed
+from typing import Dict, List, Optional, Tuple
+
+from .disk_cache import sha256_file
+from .isolation import SupervisedPool, WorkerFailed
+from .profiling import PROFILE_SUFFIXES
+from .converter import guess_extension, sanitize_title
+
+EXIT_OK = 0
+EXIT_JOB_FAILED = 1
+EXIT_BAD_INPUT = 2
+
+MANIFEST_NAME = ".ezmd_mirror.json"
+
+# save the manifest every N finished conversions, so an interrupted run keeps its progress
+_SAVE_EVERY = 50
+
+
+def _load_manifest(path: str) -> Dict[str, dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("files", {})
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"[!] Ignoring unreadable mirror manifest {path}: {e}")
+        return {}
+
+
+def _save_manifest(path: str, source_root: str, files: Dict[str, dict]) -> None:
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"source": source_root, "files": files}, f, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _walk(src: str, skip_dir: Optional[str], excludes: List[str]) -> Dict[str, os.stat_result]:
+    """
+    {relative path: stat} for every regular file under src, skipping hidden
+    entries, excluded globs and skip_dir (the destination, if nested in src).
+    """
+    found = {}
+    stack = [src]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as e:
+            print(f"[!] Cannot read {directory}: {e}")
+            continue
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            rel = os.path.relpath(entry.path, src)
+            if any(fnmatch.fnmatch(rel, pat) or fnmatch.fnmatch(entry.name, pat) for pat in excludes):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if entry.path != skip_dir:
+                    stack.append(entry.path)
+            elif entry.is_file():
+                try:
+                    found[rel] = entry.stat()
+                except OSError:
+                    continue
+    return found
+
+
+def _output_names(rel_paths: List[str], max_len: int) -> Dict[str, str]:
+    """
+    Relative source path -> relative .md path, with each component sanitized.
+    """
+    def _dir_part(rel_dir: str) -> str:
+        parts = [sanitize_title(p, max_len) or "untitled" for p in rel_dir.split(os.sep) if p]
+        return os.path.join(*parts) if parts else ""
+
+    planned: Dict[str, List[str]] = {}
+    for rel in rel_paths:
+        rel_dir, name = os.path.split(rel)
+        stem, _ = os.path.splitext(name)
+        out = os.path.join(_dir_part(rel_dir), (sanitize_title(stem, max_len) or "untitled") + ".md")
+        planned.setdefault(out, []).append(rel)
+
+    names = {}
+    for out, rels in planned.items():
+        if len(rels) == 1:
+            names[rels[0]] = out
+            continue
+        # deterministic regardless of which of the colliding files existed first
+        for rel in rels:
+            ext = guess_extension(rel).lstrip(".") or "bin"
+            names[rel] = out[:-len(".md")] + f"_{ext}.md"
+    return names
+
+
+def _convert_job(src_path: str, md_path: str, config: dict, provider: str,
+                 use_cache: bool, sha: str, profile: bool = False) -> Tuple[bool, Optional[str]]:
+    """
+    Worker entry point: (ok, error). Never raises.
+    """
+    from .converter import convert_file
+
+    try:
+        convert_file(src_path, md_path, config, provider, use_cache, content_sha=sha, profile=profile)
+        return True, None
+    except Exception as ex:
+        return False, f"{type(ex).__name__}: {ex}"
+
+
+def _remove_output(dest: str, rel_md: str) -> None:
+    path = os.path.join(dest, rel_md)
+    # the markdown and any --profile output next to it
+    for victim in [path] + [path[:-len(".md")] + suffix for suffix in PROFILE_SUFFIXES]:
+        try:
+            os.remove(victim)
+        except FileNotFoundError:
+            pass
+    # prune directories we emptied, up to dest
+    directory = os.path.dirname(path)
+    while os.path.abspath(directory) != os.path.abspath(dest):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            break
+        directory = os.path.dirname(directory)
+
+
+def run_mirror(
+    src: str,
+    dest: str,
+    config: dict,
+    workers: Optional[int] = None,
+    provider: Optional[str] = None,
+    use_cache: bool = True,
+    excludes: Optional[List[str]] = None,
+    dry_run: bool = False,
+    profile: bool = False,
+) -> int:
+    """
+    Bring dest up to date with src. Returns the process exit code.
+    """
+    src = os.path.abspath(os.path.expanduser(src))
+    dest = os.path.abspath(os.path.expanduser(dest))
+    if not os.path.isdir(src):
+        print(f"[!] Not a directory: {src}")
+        return EXIT_BAD_INPUT
+    if os.path.commonpath([src, dest]) == dest:
+        print(f"[!] The destination must not contain the source tree: {dest}")
+        return EXIT_BAD_INPUT
+    if provider is None:
+        provider = config.get("default_provider") or ""
+
+    start = time.time()
+    manifest_path = os.path.join(dest, MANIFEST_NAME)
+    manifest = _load_manifest(manifest_path)
+    current = _walk(src, dest, excludes or [])
+    names = _output_names(sorted(current), config.get("max_filename_length", 128))
+
+    to_convert: List[Tuple[str, str]] = []  # (rel, sha256)
+    touched = 0
+    for rel, st in current.items():
+        entry = manifest.get(rel)
+        out_exists = entry is not None and os.path.isfile(os.path.join(dest, entry["md"]))
+        if (entry is not None and out_exists and entry["md"] == names[rel]
+                and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns):
+            continue
+        try:
+            sha = sha256_file(os.path.join(src, rel))
+        except OSError as e:
+            print(f"[!] Cannot read {rel}: {e}")
+            continue
+        if entry is not None and out_exists and entry["md"] == names[rel] and entry["sha256"] == sha:
+            # touched, not changed
+            entry.update({"size": st.st_size, "mtime_ns": st.st_mtime_ns})
+            touched += 1
+            continue
+        to_convert.append((rel, sha))
+
+    # outputs of deleted sources, and of sources whose output name changed
+    stale = [
+        (rel, entry["md"]) for rel, entry in manifest.items()
+        if rel not in current or entry["md"] != names[rel]
+    ]
+
+    if dry_run:
+        for rel, _ in sorted(to_convert):
+            print(f"[convert] {rel} -> {names[rel]}")
+        for rel, rel_md in sorted(stale):
+            print(f"[remove] {rel_md}" + ("" if rel in current else f" (source {rel} deleted)"))
+        print(f"\n[Mirror dry run] {len(to_convert)} to convert, {len(stale)} to remove, "
+              f"{len(current) - len(to_convert)} up to date.")
+        return EXIT_OK
+
+    os.makedirs(dest, exist_ok=True)
+    new_outputs = {names[rel] for rel, _ in to_convert}
+    for rel, rel_md in stale:
+        if rel_md not in new_outputs:
+            _remove_output(dest, rel_md)
+        if rel not in current:
+            del manifest[rel]
+    if stale or touched:
+        _save_manifest(manifest_path, src, manifest)
+
+    failed = []
+    if to_convert:
+        if not workers or workers < 1:
+            workers = config.get("batch_workers") or os.cpu_count() or 1
+        workers = min(workers, len(to_convert))
+        print(f"[info] Converting {len(to_convert)} of {len(current)} file(s) with {workers} worker(s).")
+        with SupervisedPool(workers, config) as pool:
+            futures = {
+                pool.submit(_convert_job, os.path.join(src, rel), os.path.join(dest, names[rel]),
+                            config, provider, use_cache, sha, profile): (rel, sha)
+                for rel, sha in to_convert
+            }
+            for done, fut in enumerate(as_completed(futures), start=1):
+                rel, sha = futures[fut]
+                try:
+                    ok, error = fut.result()
+                except WorkerFailed as ex:
+                    ok, error = False, str(ex)
+                prefix = f"({done}/{len(to_convert)}) {rel}"
+                if not ok:
+                    print(f"[!] {prefix} failed: {error}")
+                    failed.append((rel, error))
+                    continue
+                print(f"[+] {prefix} -> {names[rel]}")
+                st = current[rel]
+                manifest[rel] = {
+                    "size": st.st_size,
+                    "mtime_ns": st.st_mtime_ns,
+                    "sha256": sha,
+                    "md": names[rel],
+                }
+                if done % _SAVE_EVERY == 0:
+                    _save_manifest(manifest_path, src, manifest)
+        _save_manifest(manifest_path, src, manifest)
+
+    elapsed = time.time() - start
+    print(f"\n[Mirror summary] {len(to_convert) - len(failed)} converted, "
+          f"{len(current) - len(to_convert)} up to date, {len(stale)} removed, "
+          f"{len(failed)} failed in {elapsed:.1f}s")
+    for rel, error in failed:
+        print(f"  [!] {rel}: {error}")
+    return EXIT_JOB_FAILED if failed else EXIT_OK
@@ -0,0 +1,184 @@
+"""
+Profiling of individual conversions (`--profile`).
+
+ConversionProfiler runs cProfile on the converting thread and, alongside it, a
+sampling thread that records the stacks of that thread and of any thread the
+conversion starts (image description workers, downloads). write(base) produces:
+
+ - <base>.prof         cProfile stats (snakeviz, `python -m pstats`, ...)
+ - <base>.collapsed    folded stacks for flamegraph.pl / speedscope / inferno
+ - <base>.profile.txt  where the time went: ezmd vs MarkItDown vs the rest,
+                       plus the top functions of each group
+
+Frames are tagged with their origin so the groups are easy to tell apart in a
+flame graph: "[ezmd]", "[markitdown]", "[lib]" (other installed packages, e.g.
+pdfminer or mammoth) and "[python]" (standard library). In the summary, a
+sample belongs to the innermost ezmd or MarkItDown frame on its stack, so a
+pdfminer call made by MarkItDown counts as MarkItDown time.
+
+Sampled times include cProfile's own overhead, which inflates call-heavy code;
+use the sampled split for proportions and the .prof for call counts.
+"""
+
+import os
+import sys
+import time
+import pstats
+import cProfile
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_INTERVAL_SEC = 0.005
+PROFILE_SUFFIXES = (".prof", ".collapsed", ".profile.txt")
+
+_EZMD_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+_OWNERS = ("ezmd", "markitdown")
+
+
+def _markitdown_dir() -> Optional[str]:
+    import importlib.util
+
+    spec = importlib.util.find_spec("markitdown")
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    return os.path.abspath(list(spec.submodule_search_locations)[0]) + os.sep
+
+
+def _classify(filename: str, markitdown_dir: Optional[str]) -> str:
+    path = os.path.abspath(filename) if filename and not filename.startswith("<") else ""
+    if path.startswith(_EZMD_DIR):
+        return "ezmd"
+    if markitdown_dir and path.startswith(markitdown_dir):
+        return "markitdown"
+    if "site-packages" in path or "dist-packages" in path:
+        return "lib"
+    return "python"
+
+
+def _short_path(filename: str) -> str:
+    """
+    File name relative to the sys.path entry it was imported from.
+    """
+    path = os.path.abspath(filename) if filename and not filename.startswith("<") else filename
+    best = ""
+    for entry in sys.path:
+        entry = os.path.abspath(entry or ".") + os.sep
+        if path.startswith(entry) and len(entry) > len(best):
+            best = entry
+    return path[len(best):] if best else os.path.basename(path)
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, interval_sec: float, target_ident: int, markitdown_dir: Optional[str]):
+        super().__init__(name="ezmd-profiler", daemon=True)
+        self.interval_sec = interval_sec
+        self.target_ident = target_ident
+        self.markitdown_dir = markitdown_dir
+        # threads already running (e.g. a TUI spinner) are not part of the conversion
+        self.ignored = {t.ident for t in threading.enumerate()} - {target_ident}
+        self.stacks: Counter = Counter()  # (thread label, frame labels root..leaf) -> samples
+        self.owners: Counter = Counter()  # converting thread only: owner -> samples
+        self.samples = 0
+        self._labels: Dict[object, Tuple[str, str]] = {}
+        self._stop_event = threading.Event()
+
+    def _label(self, code) -> Tuple[str, str]:
+        cached = self._labels.get(code)
+        if cached is None:
+            category = _classify(code.co_filename, self.markitdown_dir)
+            name = f"[{category}] {code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+            cached = self._labels[code] = (category, name.replace(";", ","))
+        return cached
+
+    def run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop_event.wait(self.interval_sec):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me or ident in self.ignored:
+                    continue
+                labels: List[Tuple[str, str]] = []
+                while frame is not None:
+                    labels.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                labels.reverse()
+                thread = "main" if ident == self.target_ident else names.get(ident, str(ident))
+                self.stacks[(thread, tuple(name for _, name in labels))] += 1
+                if ident == self.target_ident:
+                    self.samples += 1
+                    owner = next((cat for cat, _ in reversed(labels) if cat in _OWNERS), "other")
+                    self.owners[owner] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class ConversionProfiler:
+    """
+    start() / stop() around a conversion on the calling thread, then write().
+    """
+
+    def __init__(self, interval_sec: float = DEFAULT_INTERVAL_SEC):
+        self.interval_sec = interval_sec
+        self.markitdown_dir = _markitdown_dir()
+        self.profile = cProfile.Profile()
+        self.sampler: Optional[_Sampler] = None
+        self.wall_sec = 0.0
+        self._start = 0.0
+
+    def start(self) -> None:
+        self.sampler = _Sampler(self.interval_sec, threading.get_ident(), self.markitdown_dir)
+        self._start = time.perf_counter()
+        self.sampler.start()
+        self.profile.enable()
+
+    def stop(self) -> None:
+        self.profile.disable()
+        self.wall_sec = time.perf_counter() - self._start
+        self.sampler.stop()
+
+    def write(self, base: str) -> List[str]:
+        """
+        Write <base>.prof, <base>.collapsed and <base>.profile.txt; returns the paths.
+        """
+        os.makedirs(os.path.dirname(base) or ".", exist_ok=True)
+        prof_path, collapsed_path, summary_path = (base + suffix for suffix in PROFILE_SUFFIXES)
+
+        self.profile.dump_stats(prof_path)
+        with open(collapsed_path, "w", encoding="utf-8") as f:
+            for (thread, frames), count in sorted(self.sampler.stacks.items()):
+                f.write(";".join((f"thread:{thread}",) + frames) + f" {count}\n")
+        with open(summary_path, "w", encoding="utf-8") as f:
+            f.write(self._summary())
+        return [prof_path, collapsed_path, summary_path]
+
+    def _summary(self) -> str:
+        lines = [
+            f"Wall time: {self.wall_sec:.3f}s, {self.sampler.samples} samples of the converting "
+            f"thread every {self.interval_sec * 1000:g}ms",
+            "",
+            "Time by owner (innermost ezmd/MarkItDown frame on the stack):",
+        ]
+        total = max(1, self.sampler.samples)
+        for owner in _OWNERS + ("other",):
+            count = self.sampler.owners.get(owner, 0)
+            lines.append(f"  {owner:<11} {100.0 * count / total:5.1f}%  ~{self.wall_sec * count / total:.3f}s")
+
+        stats = pstats.Stats(self.profile)
+        grouped: Dict[str, list] = {}
+        for (filename, lineno, func), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+            category = _classify(filename, self.markitdown_dir)
+            grouped.setdefault(category, []).append((tottime, cumtime, ncalls, filename, lineno, func))
+        for category in ("ezmd", "markitdown", "lib", "python"):
+            rows = sorted(grouped.get(category, []), reverse=True)[:15]
+            if not rows:
+                continue
+            own = sum(r[0] for r in grouped[category])
+            lines += ["", f"[{category}] own time {own:.3f}s (cProfile); top functions by own time:",
+                      f"  {'own s':>8} {'cum s':>8} {'calls':>8}  function"]
+            for tottime, cumtime, ncalls, filename, lineno, func in rows:
+                lines.append(f"  {tottime:>8.3f} {cumtime:>8.3f} {ncalls:>8}  "
+                             f"{func} ({_short_path(filename)}:{lineno})")
+        return "\n".join(lines) + "\n"
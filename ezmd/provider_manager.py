@@ -1,9 +1,9 @@
 """
 Manages environment variables for storing and retrieving
-OpenAI keys and usage toggles (e.g., use LLM for images).
+OpenAI / Google Gemini keys and usage toggles (e.g., use LLM for images).
 Now persists these in ~/.config/ezmd/ezmd.env.
 
-Removed references to google gemini.
+The .env file is read lazily, on the first getter call, rather than at import.
 """
 
 import os
@@ -71,9 +71,18 @@ def _persist_in_memory(envdict: dict) -> None:
         os.environ[k] = v
 
 
-# Let's load them upon import so that environment is available
-_loaded = _load_env_file()
-_persist_in_memory(_loaded)
+_env_loaded = False
+
+
+def _ensure_env_loaded() -> None:
+    """
+    Load the .env file into os.environ once, on first use.
+    """
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    _persist_in_memory(_load_env_file())
 
 
 def set_openai_key(key: str) -> None:
@@ -99,6 +108,7 @@ def get_openai_key() -> str:
     """
     Returns the openai key from environment (which is also loaded from .env).
     """
+    _ensure_env_loaded()
     return os.environ.get("EZMD_OPENAI_KEY", "")
 
 
@@ -121,6 +131,7 @@ def get_use_llm_img_desc() -> bool:
     """
     Returns True if EZMD_USE_LLM_IMG_DESC is 'true' (case-insensitive).
     """
+    _ensure_env_loaded()
     val = os.environ.get("EZMD_USE_LLM_IMG_DESC", "false").lower()
     return val == "true"
 
@@ -139,6 +150,7 @@ def get_img_desc_model() -> str:
     """
     If EZMD_IMG_DESC_MODEL is not set, fallback to 'gpt-4o-mini'.
     """
+    _ensure_env_loaded()
     return os.environ.get("EZMD_IMG_DESC_MODEL", "gpt-4o-mini")
 
 
@@ -152,4 +164,51 @@ def is_openai_available(config: dict) -> bool:
     oinfo = providers.get("openai", {})
     if not oinfo.get("enabled", False):
         return False
-    return len(get_openai_key()) > 0
\ No newline at end of file
+    return len(get_openai_key()) > 0
+
+
+def set_gemini_key(key: str) -> None:
+    """
+    Sets or clears the google gemini key in the environment and .env file.
+    """
+    envdict = _load_env_file()
+
+    if key:
+        envdict["EZMD_GOOGLE_GEMINI_KEY"] = key
+        os.environ["EZMD_GOOGLE_GEMINI_KEY"] = key
+    else:
+        if "EZMD_GOOGLE_GEMINI_KEY" in envdict:
+            del envdict["EZMD_GOOGLE_GEMINI_KEY"]
+        if "EZMD_GOOGLE_GEMINI_KEY" in os.environ:
+            del os.environ["EZMD_GOOGLE_GEMINI_KEY"]
+
+    _save_env_file(envdict)
+
+
+def get_gemini_key() -> str:
+    """
+    Returns the google gemini key from environment (which is also loaded from .env).
+    """
+    _ensure_env_loaded()
+    return os.environ.get("EZMD_GOOGLE_GEMINI_KEY", "")
+
+
+def get_gemini_model(config: dict) -> str:
+    """
+    The model comes from providers.google_gemini.default_model in config.json.
+    """
+    ginfo = (config or {}).get("providers", {}).get("google_gemini", {})
+    return ginfo.get("default_model") or "gemini-2.0-flash"
+
+
+def is_gemini_available(config: dict) -> bool:
+    """
+    Returns True if google_gemini is enabled in config and we have a key in env.
+    """
+    if not config:
+        return False
+    providers = config.get("providers", {})
+    ginfo = providers.get("google_gemini", {})
+    if not ginfo.get("enabled", False):
+        return False
+    return len(get_gemini_key()) > 0
@@ -5,47 +5,194 @@ This file encapsulates logic for performing an rsync operation to a remote host,
 and testing connections to confirm the user's SSH environment is set up properly.
 
 We store minimal code to keep the TUI code clean.
+
+push_file_groups() pushes each remote's files in a single `rsync --files-from`
+invocation, to several remotes concurrently, and reports per-remote success,
+bytes and latency. SSH ControlMaster/ControlPersist multiplexing lets repeated
+syncs to the same host reuse one SSH connection instead of re-handshaking.
+
+Every push is timed and reported to the metrics log as an "rsync" event
+(see metrics.py).
 """
 
 import subprocess
 import os
+import re
+import time
+import shlex
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 
-def rsync_file(local_file: str, ssh_host: str, remote_dir: str, timeout_sec: int = 10) -> bool:
-    """
-    Attempt to rsync the given local_file to the remote host's remote_dir.
-    Returns True if successful, False if an error or timeout occurs.
+from .config_manager import get_config_path
+from .metrics import StageRecorder
+
+DEFAULT_RSYNC_SETTINGS = {
+    "multiplex": True,
+    "control_persist_sec": 60,
+    "batch_timeout_sec": 300,
+    "parallelism": 4,
+}
 
-    # ASSUMPTION: The user has set up passwordless SSH or SSH keys. 
-    # We do not handle passphrase prompts here.
+
+def get_rsync_settings(config: Optional[dict]) -> dict:
+    settings = dict(DEFAULT_RSYNC_SETTINGS)
+    if config:
+        settings.update(config.get("rsync", {}) or {})
+    return settings
+
+
+def _ssh_transport_args(multiplex: bool, control_persist_sec: int = 60) -> List[str]:
     """
-    if not os.path.isfile(local_file):
-        print(f"[!] rsync error: local file not found: {local_file}")
-        return False
+    rsync "-e" arguments that enable SSH connection sharing.
+    The control socket lives in the ezmd config dir; %C is a hash of
+    (local host, remote host, port, user), so each remote gets its own master.
+    """
+    if not multiplex:
+        return []
+    control_path = os.path.join(os.path.dirname(get_config_path()), "cm-%C")
+    ssh_cmd = (
+        "ssh -o ControlMaster=auto "
+        f"-o ControlPath={shlex.quote(control_path)} "
+        f"-o ControlPersist={int(control_persist_sec)}"
+    )
+    return ["-e", ssh_cmd]
+
+
+def _rsync_files_result(
+    local_files: List[str],
+    ssh_host: str,
+    remote_dir: str,
+    timeout_sec: int,
+    multiplex: bool,
+    control_persist_sec: int,
+    config: Optional[dict] = None,
+) -> dict:
+    """
+    Push local_files to ssh_host:remote_dir with one rsync process (and so one
+    SSH handshake) using --files-from. Paths are sent relative to the files'
+    common parent directory, so files in subfolders of it keep that layout.
 
-    # Force trailing slash on remote_dir
+    Returns a dict with keys ok, bytes (bytes sent, from --stats), latency_sec
+    and error. The push is reported to the metrics log configured in config.
+    """
+    result = {"ok": False, "bytes": 0, "latency_sec": 0.0, "error": None}
+    files = []
+    missing = []
+    for path in local_files:
+        if os.path.isfile(path):
+            files.append(os.path.abspath(path))
+        else:
+            missing.append(path)
+    if not files:
+        result["error"] = f"rsync error: no local files to send (missing: {', '.join(missing)})"
+        return result
+
+    root = os.path.commonpath([os.path.dirname(p) for p in files])
     if not remote_dir.endswith("/"):
         remote_dir += "/"
 
-    command = [
-        "rsync",
-        "-avz",  # We assume typical flags; can be extended if user wants compression etc
-        local_file,
-        f"{ssh_host}:{remote_dir}"
-    ]
-
+    fd, list_path = tempfile.mkstemp(prefix="ezmd-rsync-", suffix=".txt")
+    start = time.time()
     try:
-        subprocess.run(command, check=True, timeout=timeout_sec, capture_output=True)
-        return True
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for path in files:
+                f.write(os.path.relpath(path, root) + "\n")
+
+        command = [
+            "rsync",
+            "-az",
+            "--stats",
+            f"--files-from={list_path}",
+            *_ssh_transport_args(multiplex, control_persist_sec),
+            root + "/",
+            f"{ssh_host}:{remote_dir}"
+        ]
+        proc = subprocess.run(command, check=True, timeout=timeout_sec,
+                              capture_output=True, text=True)
+        result["ok"] = True
+        result["bytes"] = _parse_bytes_sent(proc.stdout)
+        if missing:
+            result["error"] = f"skipped missing local files: {', '.join(missing)}"
     except subprocess.TimeoutExpired:
-        print(f"[!] rsync timed out after {timeout_sec} seconds.")
-        return False
+        result["error"] = f"rsync timed out after {timeout_sec} seconds."
     except subprocess.CalledProcessError as e:
-        # We can log e.stderr if we want more detail
-        print(f"[!] rsync returned an error: {e.stderr}")
-        return False
+        result["error"] = f"rsync returned an error: {(e.stderr or '').strip()}"
     except Exception as ex:
-        print(f"[!] Unexpected rsync error: {ex}")
-        return False
+        result["error"] = f"Unexpected rsync error: {ex}"
+    finally:
+        result["latency_sec"] = round(time.time() - start, 3)
+        try:
+            os.remove(list_path)
+        except OSError:
+            pass
+    metrics = StageRecorder("rsync", remote=ssh_host, files=len(files))
+    metrics.add("rsync", result["latency_sec"], result["bytes"])
+    metrics.finish("ok" if result["ok"] else "failed", config,
+                   error=None if result["ok"] else result["error"])
+    return result
+
+
+def _parse_bytes_sent(stats_output: str) -> int:
+    m = re.search(r"Total bytes sent:\s*([\d,.]+)", stats_output or "")
+    if not m:
+        return 0
+    digits = re.sub(r"[^\d]", "", m.group(1))
+    return int(digits) if digits else 0
+
+
+def push_file_groups(
+    groups: dict,
+    config: Optional[dict] = None,
+    timeout_sec: Optional[int] = None,
+) -> List[dict]:
+    """
+    Push to every remote in groups (alias -> (remote info, list of local files))
+    concurrently, one batched rsync per remote, with at most rsync.parallelism
+    transfers in flight. A slow host only delays its own result.
+
+    Returns one dict per remote (in groups order) with keys:
+    alias, ok, bytes, latency_sec, error.
+    """
+    settings = get_rsync_settings(config)
+    if timeout_sec is None:
+        timeout_sec = settings["batch_timeout_sec"]
+    aliases = list(groups.keys())
+    if not aliases:
+        return []
+
+    def _one(alias: str) -> dict:
+        info, files = groups[alias]
+        res = _rsync_files_result(
+            files,
+            info["ssh_host"],
+            info["remote_dir"],
+            timeout_sec,
+            settings["multiplex"],
+            settings["control_persist_sec"],
+            config,
+        )
+        res["alias"] = alias
+        return res
+
+    workers = max(1, min(int(settings["parallelism"]), len(aliases)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_one, aliases))
+
+
+def print_sync_summary(results: List[dict]) -> None:
+    """
+    One line per remote: status, bytes sent and latency.
+    """
+    if not results:
+        return
+    print("\n[Sync summary]")
+    for res in results:
+        status = "ok" if res["ok"] else "FAILED"
+        line = f"  {res['alias']:<16} {status:<6} {res['bytes']:>10} bytes  {res['latency_sec']:>7.2f}s"
+        if res.get("error"):
+            line += f"  ({res['error']})"
+        print(line)
 
 
 def test_rsync_connection(ssh_host: str, remote_dir: str, timeout_sec: int = 10) -> bool:
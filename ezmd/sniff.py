@@ -0,0 +1,164 @@
+"""
+Content sniffing: pick a file extension for a document from its bytes,
+falling back to the HTTP Content-Type, a Content-Disposition filename and
+finally the URL/path.
+
+Used where there is no trustworthy file name, e.g. documents streamed
+straight from an HTTP response into the converter.
+"""
+
+import os
+import re
+import zipfile
+import mimetypes
+from typing import BinaryIO, Optional
+from urllib.parse import urlparse, unquote
+
+_SNIFF_BYTES = 4096
+
+# (magic prefix, extension); checked in order
+_MAGIC = (
+    (b"%PDF-", ".pdf"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+    (b"ID3", ".mp3"),
+)
+
+# zip containers, recognised by a member name
+_ZIP_MARKERS = (
+    ("word/", ".docx"),
+    ("ppt/", ".pptx"),
+    ("xl/", ".xlsx"),
+    ("META-INF/container.xml", ".epub"),
+)
+
+# Content-Types mimetypes.guess_extension maps to an unhelpful extension (or none)
+_CONTENT_TYPES = {
+    "application/pdf": ".pdf",
+    "text/html": ".html",
+    "application/xhtml+xml": ".html",
+    "text/plain": ".txt",
+    "text/markdown": ".md",
+    "text/csv": ".csv",
+    "application/json": ".json",
+    "application/xml": ".xml",
+    "text/xml": ".xml",
+    "application/rss+xml": ".rss",
+    "application/atom+xml": ".atom",
+    "image/jpeg": ".jpg",
+    "application/msword": ".doc",
+    "application/vnd.ms-excel": ".xls",
+    "application/epub+zip": ".epub",
+}
+
+_FILENAME_RE = re.compile(r"""filename\*?=(?:UTF-8'')?["']?([^"';]+)""", re.IGNORECASE)
+
+
+def _sniff_zip(stream: BinaryIO) -> str:
+    try:
+        with zipfile.ZipFile(stream) as zf:
+            names = zf.namelist()
+    except zipfile.BadZipFile:
+        return ".zip"
+    for marker, ext in _ZIP_MARKERS:
+        if any(name.startswith(marker) for name in names):
+            return ext
+    return ".zip"
+
+
+def _decode_head(head: bytes) -> Optional[str]:
+    try:
+        return head.decode("utf-8")
+    except UnicodeDecodeError:
+        # a multi-byte character cut off at the end of the sample is fine
+        try:
+            return head[:-3].decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+
+
+def looks_like_text(head: bytes) -> bool:
+    """
+    True if head (the start of a document) is UTF-8 text without NUL bytes.
+    """
+    return b"\x00" not in head and _decode_head(head) is not None
+
+
+def _sniff_text(head: bytes) -> Optional[str]:
+    text = _decode_head(head)
+    if text is None:
+        return None
+    text = text.lstrip("\ufeff \t\r\n").lower()
+    if text.startswith("<!doctype html") or text.startswith("<html"):
+        return ".html"
+    if text.startswith("<?xml") or text.startswith("<rss") or text.startswith("<feed"):
+        if "<rss" in text:
+            return ".rss"
+        if "<feed" in text:
+            return ".atom"
+        if "<html" in text:
+            return ".html"
+        return ".xml"
+    if text.startswith("{") or text.startswith("["):
+        return ".json"
+    return None
+
+
+def extension_from_content_type(content_type: Optional[str]) -> Optional[str]:
+    if not content_type:
+        return None
+    mimetype = content_type.split(";", 1)[0].strip().lower()
+    return _CONTENT_TYPES.get(mimetype) or mimetypes.guess_extension(mimetype)
+
+
+def extension_from_name(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    path = urlparse(name).path if "://" in name else name
+    _, ext = os.path.splitext(unquote(path))
+    return ext.lower() or None
+
+
+def sniff_extension(
+    stream: BinaryIO,
+    content_type: Optional[str] = None,
+    content_disposition: Optional[str] = None,
+    name: Optional[str] = None,
+) -> str:
+    """
+    Best guess at the extension of the document in `stream` (seekable; its
+    position is restored). Binary signatures win; then the Content-Disposition
+    filename, the Content-Type, text signatures and the URL/path. ".bin" if
+    nothing matches.
+    """
+    pos = stream.tell()
+    try:
+        head = stream.read(_SNIFF_BYTES)
+        for magic, ext in _MAGIC:
+            if head.startswith(magic):
+                return ext
+        if head.startswith(b"PK\x03\x04"):
+            stream.seek(pos)
+            return _sniff_zip(stream)
+    finally:
+        stream.seek(pos)
+
+    disposition_name = None
+    if content_disposition:
+        m = _FILENAME_RE.search(content_disposition)
+        if m:
+            disposition_name = m.group(1)
+    guess = extension_from_name(disposition_name)
+    if guess:
+        return guess
+
+    from_type = extension_from_content_type(content_type)
+    # servers often label everything application/octet-stream, text/plain or
+    # generic XML; let the text signatures refine those
+    if from_type and from_type not in (".bin", ".txt", ".xml"):
+        return from_type
+
+    guess = _sniff_text(head) or extension_from_name(name) or from_type
+    return guess or ".bin"
@@ -0,0 +1,397 @@
+"""
+Durable background sync queue.
+
+Conversions enqueue (file, remote) pairs in a SQLite journal next to config.json
+(~/.config/ezmd/sync_queue.db) instead of running rsync inline. A background
+worker thread drains the queue, pushing each remote's files in one batched rsync
+(remotes in parallel), and reschedules failures with exponential backoff.
+Items that keep failing are parked as "failed" until retried with
+`ezmd sync-status --retry-failed`.
+
+Several drains can run at once (the TUI's worker, `ezmd batch --sync`,
+`ezmd sync-status --drain`), so a drain first claims the due rows: in one
+transaction they become "in_flight" with a lease. The push then marks them
+done or failed. A claim whose drain died is taken over once its lease expires.
+
+Rows survive restarts: whatever is still pending when ezmd exits is picked up
+by the next run (or `ezmd sync-status --drain`).
+"""
+
+import os
+import math
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import List, Optional
+
+from .config_manager import get_config_path
+
+DEFAULT_QUEUE_SETTINGS = {
+    "max_attempts": 8,
+    "backoff_base_sec": 30,
+    "backoff_max_sec": 3600,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    local_path TEXT NOT NULL,
+    alias TEXT NOT NULL,
+    ssh_host TEXT NOT NULL,
+    remote_dir TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    lease_until REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sync_items_due ON sync_items (status, next_attempt_at);
+"""
+
+# slack on top of the rsync timeout before another drain may take over a claim
+_LEASE_MARGIN_SEC = 60
+
+
+def get_queue_path() -> str:
+    return os.path.join(os.path.dirname(get_config_path()), "sync_queue.db")
+
+
+def get_queue_settings(config: Optional[dict]) -> dict:
+    settings = dict(DEFAULT_QUEUE_SETTINGS)
+    if config:
+        settings.update(config.get("sync_queue", {}) or {})
+    return settings
+
+
+class SyncQueue:
+    """
+    Thin wrapper over the SQLite journal. Each call opens its own connection,
+    so the TUI thread and the worker thread never share one.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or get_queue_path()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(sync_items)")}
+            if "lease_until" not in columns:
+                # journals created before claims existed
+                conn.execute("ALTER TABLE sync_items ADD COLUMN lease_until REAL")
+
+    @contextmanager
+    def _connect(self):
+        """
+        One connection per transaction: commits on success, always closes.
+        """
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, local_paths: List[str], remotes: dict) -> int:
+        """
+        Queue every path for every remote (alias -> info). Returns rows added.
+        A path already pending for the same remote is not queued twice.
+        """
+        now = time.time()
+        added = 0
+        with self._connect() as conn:
+            for alias, info in remotes.items():
+                for path in local_paths:
+                    path = os.path.abspath(path)
+                    exists = conn.execute(
+                        "SELECT 1 FROM sync_items WHERE local_path = ? AND alias = ? AND status = 'pending'",
+                        (path, alias),
+                    ).fetchone()
+                    if exists:
+                        continue
+                    conn.execute(
+                        "INSERT INTO sync_items (local_path, alias, ssh_host, remote_dir, status, "
+                        "attempts, next_attempt_at, created_at, updated_at) "
+                        "VALUES (?, ?, ?, ?, 'pending', 0, ?, ?, ?)",
+                        (path, alias, info["ssh_host"], info["remote_dir"], now, now, now),
+                    )
+                    added += 1
+        return added
+
+    def claim_due(self, lease_sec: float, now: Optional[float] = None, ignore_backoff: bool = False) -> List[dict]:
+        """
+        Atomically claim the due items, plus in-flight ones whose lease ran out:
+        they become 'in_flight' until lease_sec from now, so no other drain
+        pushes them meanwhile. Returns the claimed rows.
+        """
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            # take the write lock before reading, so two drains can't claim the same rows
+            conn.execute("BEGIN IMMEDIATE")
+            if ignore_backoff:
+                rows = conn.execute(
+                    "SELECT * FROM sync_items WHERE status = 'pending' "
+                    "OR (status = 'in_flight' AND lease_until <= ?) ORDER BY id",
+                    (now,),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM sync_items WHERE (status = 'pending' AND next_attempt_at <= ?) "
+                    "OR (status = 'in_flight' AND lease_until <= ?) ORDER BY id",
+                    (now, now),
+                ).fetchall()
+            conn.executemany(
+                "UPDATE sync_items SET status = 'in_flight', lease_until = ?, updated_at = ? WHERE id = ?",
+                [(now + lease_sec, now, row["id"]) for row in rows],
+            )
+        return [dict(r) for r in rows]
+
+    def extend_claim(self, ids: List[int], lease_sec: float) -> None:
+        until = time.time() + lease_sec
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE sync_items SET lease_until = ? WHERE id = ? AND status = 'in_flight'",
+                [(until, i) for i in ids],
+            )
+
+    def release(self, ids: List[int]) -> None:
+        """
+        Hand claimed items back unchanged (the push never happened).
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE sync_items SET status = 'pending', lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'in_flight'",
+                [(now, i) for i in ids],
+            )
+
+    def next_due_at(self) -> Optional[float]:
+        """
+        When the next pending item is due, or the next claim expires.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MIN(CASE status WHEN 'pending' THEN next_attempt_at ELSE lease_until END) "
+                "FROM sync_items WHERE status IN ('pending', 'in_flight')"
+            ).fetchone()
+        return row[0] if row else None
+
+    def mark_done(self, ids: List[int]) -> None:
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM sync_items WHERE id = ?", [(i,) for i in ids])
+
+    def mark_attempt_failed(self, items: List[dict], error: str, settings: dict) -> int:
+        """
+        Record a failed attempt: reschedule with exponential backoff, or park the
+        item as 'failed' once it reaches max_attempts. Returns how many were parked.
+        """
+        now = time.time()
+        parked = 0
+        with self._connect() as conn:
+            for item in items:
+                attempts = item["attempts"] + 1
+                if attempts >= settings["max_attempts"]:
+                    status = "failed"
+                    next_at = now
+                    parked += 1
+                else:
+                    status = "pending"
+                    delay = min(settings["backoff_base_sec"] * (2 ** (attempts - 1)),
+                                settings["backoff_max_sec"])
+                    next_at = now + delay
+                conn.execute(
+                    "UPDATE sync_items SET status = ?, attempts = ?, next_attempt_at = ?, "
+                    "last_error = ?, lease_until = NULL, updated_at = ? WHERE id = ?",
+                    (status, attempts, next_at, error, now, item["id"]),
+                )
+        return parked
+
+    def retry_failed(self) -> int:
+        now = time.time()
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE sync_items SET status = 'pending', attempts = 0, next_attempt_at = ?, "
+                "updated_at = ? WHERE status = 'failed'",
+                (now, now),
+            )
+            return cur.rowcount
+
+    def list_items(self, statuses=("in_flight", "pending", "failed")) -> List[dict]:
+        marks = ",".join("?" for _ in statuses)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM sync_items WHERE status IN ({marks}) ORDER BY status, id",
+                tuple(statuses),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def counts(self) -> dict:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) FROM sync_items GROUP BY status"
+            ).fetchall()
+        return {status: n for status, n in rows}
+
+
+def drain_once(queue: SyncQueue, config: Optional[dict], ignore_backoff: bool = False) -> List[dict]:
+    """
+    Claim and push every due item, one batched rsync per remote (remotes in
+    parallel). Returns the per-remote results from rsync_manager.push_file_groups,
+    each with "first_failure" set when a failed push included an item that had
+    not failed before.
+    """
+    from .rsync_manager import get_rsync_settings
+
+    settings = get_queue_settings(config)
+    rsync_settings = get_rsync_settings(config)
+    lease_sec = rsync_settings["batch_timeout_sec"] + _LEASE_MARGIN_SEC
+    items = queue.claim_due(lease_sec, ignore_backoff=ignore_backoff)
+    if not items:
+        return []
+    try:
+        return _push_claimed(queue, items, config, settings, rsync_settings)
+    finally:
+        # no-op for items already marked done or failed
+        queue.release([item["id"] for item in items])
+
+
+def _push_claimed(queue: SyncQueue, items: List[dict], config: Optional[dict], settings: dict,
+                  rsync_settings: dict) -> List[dict]:
+    from .rsync_manager import push_file_groups
+
+    groups = {}
+    items_by_alias = {}
+    for item in items:
+        if not os.path.isfile(item["local_path"]):
+            queue.mark_attempt_failed([dict(item, attempts=settings["max_attempts"])],
+                                      "local file not found", settings)
+            continue
+        info = {"ssh_host": item["ssh_host"], "remote_dir": item["remote_dir"]}
+        if item["alias"] not in groups:
+            groups[item["alias"]] = (info, [])
+            items_by_alias[item["alias"]] = []
+        groups[item["alias"]][1].append(item["local_path"])
+        items_by_alias[item["alias"]].append(item)
+
+    # remotes beyond rsync.parallelism wait for a free slot; keep the claim alive that long
+    rounds = math.ceil(len(groups) / max(1, int(rsync_settings["parallelism"])))
+    if rounds > 1:
+        queue.extend_claim([item["id"] for item in items],
+                           rounds * rsync_settings["batch_timeout_sec"] + _LEASE_MARGIN_SEC)
+
+    results = push_file_groups(groups, config)
+    for res in results:
+        alias_items = items_by_alias[res["alias"]]
+        res["first_failure"] = False
+        if res["ok"]:
+            queue.mark_done([i["id"] for i in alias_items])
+        else:
+            res["first_failure"] = any(i["attempts"] == 0 for i in alias_items)
+            parked = queue.mark_attempt_failed(alias_items, res["error"] or "unknown error", settings)
+            if parked:
+                print(f"\n[!] Sync to remote '{res['alias']}' gave up on {parked} file(s); "
+                      f"see `ezmd sync-status`.")
+    return results
+
+
+class SyncWorker(threading.Thread):
+    """
+    Background thread that drains the queue whenever items are due,
+    sleeping until the next backoff deadline (or until woken by wake()).
+    It runs in the TUI, so each drain's per-remote summary is printed, with a
+    warning the first time a file fails to sync.
+    """
+
+    def __init__(self, config: Optional[dict], poll_sec: float = 30.0):
+        super().__init__(name="ezmd-sync-worker", daemon=True)
+        self.config = config
+        self.poll_sec = poll_sec
+        self.queue = SyncQueue()
+        self._wake = threading.Event()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def run(self) -> None:
+        while True:
+            try:
+                _report_drain(drain_once(self.queue, self.config))
+                next_at = self.queue.next_due_at()
+            except Exception as ex:
+                print(f"\n[!] Sync worker error: {ex}")
+                next_at = None
+            wait = self.poll_sec
+            if next_at is not None:
+                wait = max(0.0, min(wait, next_at - time.time()))
+            self._wake.wait(timeout=wait)
+            self._wake.clear()
+
+
+def _report_drain(results: List[dict]) -> None:
+    from .rsync_manager import print_sync_summary
+
+    print_sync_summary(results)
+    for res in results:
+        if res.get("first_failure"):
+            print(f"[!] Warning: sync to remote '{res['alias']}' failed; it will be retried "
+                  f"in the background (see `ezmd sync-status`).")
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def start_background_worker(config: Optional[dict]) -> SyncWorker:
+    """
+    Start (once per process) and return the background sync worker.
+    """
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = SyncWorker(config)
+            _worker.start()
+        else:
+            _worker.config = config
+        return _worker
+
+
+def enqueue_and_kick(local_paths: List[str], remotes: dict, config: Optional[dict]) -> int:
+    """
+    Queue paths for the given remotes and wake the background worker.
+    """
+    added = SyncQueue().enqueue(local_paths, remotes)
+    start_background_worker(config).wake()
+    return added
+
+
+def pending_count() -> int:
+    if not os.path.exists(get_queue_path()):
+        return 0
+    counts = SyncQueue().counts()
+    return counts.get("pending", 0) + counts.get("in_flight", 0)
+
+
+def print_sync_status(show_all: bool = True) -> None:
+    queue = SyncQueue()
+    counts = queue.counts()
+    print(f"[Sync queue] {counts.get('pending', 0)} pending, {counts.get('in_flight', 0)} in flight, "
+          f"{counts.get('failed', 0)} failed ({queue.path})")
+    if not show_all:
+        return
+    now = time.time()
+    for item in queue.list_items():
+        if item["status"] == "pending":
+            due = item["next_attempt_at"] - now
+            when = "due now" if due <= 0 else f"retry in {int(due)}s"
+        elif item["status"] == "in_flight":
+            when = "pushing"
+        else:
+            when = "gave up"
+        line = (f"  #{item['id']:<5} {item['status']:<8} {item['alias']:<12} "
+                f"attempts={item['attempts']:<2} {when:<16} {item['local_path']}")
+        print(line)
+        if item["last_error"]:
+            print(f"         last error: {item['last_error']}")
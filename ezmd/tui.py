@@ -3,10 +3,13 @@ Provides all the TUI flows for ezmd, including:
  - Main menu
  - Convert flow
  - Config menu
- - Providers sub-menu (OpenAI only)
+ - Providers sub-menu (OpenAI, Google Gemini)
  - Manage Remotes sub-menu
 
 Now allows "b" to back out of sub-prompts and gracefully handle large lists.
+
+The conversion stack (converter -> markitdown, requests) is imported only
+when a conversion starts, so the menus open instantly.
 """
 
 import os
@@ -15,7 +18,6 @@ import sys
 import subprocess
 from typing import Optional
 
-from .converter import convert_document
 from .config_manager import save_config, load_config
 from .provider_manager import (
     is_openai_available,
@@ -25,11 +27,19 @@ from .provider_manager import (
     get_use_llm_img_desc,
     set_img_desc_model,
     get_img_desc_model,
+    is_gemini_available,
+    set_gemini_key,
+    get_gemini_key,
+    get_gemini_model,
 )
 from .windows_path_utils import is_windows_path, translate_windows_path_to_wsl
-from .rsync_manager import rsync_file, test_rsync_connection
+from .rsync_manager import test_rsync_connection
+from .sync_queue import enqueue_and_kick, pending_count
+
+# worker process that runs this session's conversions (see _conversion_runner)
+_conversion_pool = None
 
-def main_menu(config: dict) -> None:
+def main_menu(config: dict, use_cache: bool = True, profile: bool = False) -> None:
     while True:
         print("\n┌────────────────────────────────┐")
         print("│ ezmd - Easy Markdown Tool     │")
@@ -41,17 +51,21 @@ def main_menu(config: dict) -> None:
 
         choice = input("Select an option: ").strip()
         if choice == "1":
-            convert_document_flow(config)
+            convert_document_flow(config, use_cache=use_cache, profile=profile)
         elif choice == "2":
             config_menu(config)
         elif choice == "3":
+            pending = pending_count()
+            if pending:
+                print(f"[info] {pending} sync item(s) still pending; they'll be retried the next "
+                      f"time ezmd runs (or run `ezmd sync-status --drain`).")
             print("Exiting ezmd...")
             sys.exit(0)
         else:
             print("[!] Invalid choice, please try again.")
 
 
-def convert_document_flow(config: dict) -> None:
+def convert_document_flow(config: dict, use_cache: bool = True, profile: bool = False) -> None:
     print("\n[Convert Document]\n")
     title = input("Enter Title: ").strip()
     if title.lower() in ["b", "back"]:
@@ -68,12 +82,19 @@ def convert_document_flow(config: dict) -> None:
 
     if is_openai_available(config):
         provider = default_provider if default_provider == "openai" else None
+    if is_gemini_available(config) and default_provider == "google_gemini":
+        provider = "google_gemini"
 
     if provider is None and is_openai_available(config):
         choice = input("Use OpenAI LLM for images? (y/N): ").strip().lower()
         if choice.startswith("y"):
             provider = "openai"
 
+    if provider is None and is_gemini_available(config):
+        choice = input("Append Google Gemini image descriptions? (y/N): ").strip().lower()
+        if choice.startswith("y"):
+            provider = "google_gemini"
+
     force_overwrite_default = config.get("force_overwrite_default", False)
     ow_input = input(
         f"Overwrite if file exists? (Y/n) [default={'Y' if force_overwrite_default else 'N'}]: "
@@ -95,6 +116,9 @@ def convert_document_flow(config: dict) -> None:
 
     print("\n[Converting... please wait]")
     import threading
+    from .converter import ConversionSkipped
+
+    convert = _conversion_runner(config)
 
     spinner_stop = False
 
@@ -113,21 +137,28 @@ def convert_document_flow(config: dict) -> None:
 
     md_path = None
     error_message = None
+    skipped_message = None
     try:
-        md_path = convert_document(
+        md_path = convert(
             title=title,
             source=source,
             config=config,
             provider=provider if provider else "",
             overwrite=overwrite,
+            use_cache=use_cache,
+            profile=profile,
         )
+    except ConversionSkipped as ex:
+        skipped_message = str(ex)
     except Exception as ex:
         error_message = str(ex)
 
     spinner_stop = True
     thread.join()
 
-    if error_message:
+    if skipped_message:
+        print(f"[-] Skipped: {skipped_message}")
+    elif error_message:
         print(f"[!] Error during conversion: {error_message}")
     else:
         print(f"[+] Output saved to {md_path}")
@@ -135,30 +166,70 @@ def convert_document_flow(config: dict) -> None:
             _handle_post_conversion_rsync(md_path, config)
 
 
+def _conversion_runner(config: dict):
+    """
+    convert_document, or a stand-in that runs it in a supervised worker process
+    kept for the session (isolation.py), so a document that exhausts memory or
+    hangs fails on its own instead of taking the TUI down. Collision prompts
+    are forwarded from the worker.
+    """
+    global _conversion_pool
+    from .converter import convert_document
+    from .isolation import SupervisedPool, get_isolation_settings
+
+    if not get_isolation_settings(config)["enabled"]:
+        return convert_document
+    if _conversion_pool is None:
+        _conversion_pool = SupervisedPool(1, config, interactive=True)
+    # fork before the spinner thread starts
+    _conversion_pool.start_workers()
+
+    def convert(**kwargs) -> str:
+        # the worker was forked with the environment of that moment; send the
+        # provider settings (keys, LLM toggle, model) as they are now
+        env = {k: v for k, v in os.environ.items() if k.startswith("EZMD_")}
+        return _conversion_pool.submit(_convert_with_env, env, **kwargs).result()
+
+    return convert
+
+
+def _convert_with_env(env: dict, **kwargs) -> str:
+    """
+    convert_document in the session's worker, with its EZMD_* variables
+    replaced by env (the Providers menu changes them in the TUI process).
+    """
+    from .converter import convert_document
+    from .provider_manager import _ensure_env_loaded
+
+    # load .env now so a first lazy load can't overwrite env later
+    _ensure_env_loaded()
+    for key in [k for k in os.environ if k.startswith("EZMD_") and k not in env]:
+        del os.environ[key]
+    os.environ.update(env)
+    return convert_document(**kwargs)
+
+
 def _handle_post_conversion_rsync(md_path: str, config: dict):
     remotes = config.get("remotes", {})
     if not remotes:
         return
 
-    any_auto = False
-    for alias, info in remotes.items():
-        if info.get("auto_sync", False):
-            any_auto = True
-            success = rsync_file(md_path, info["ssh_host"], info["remote_dir"], timeout_sec=10)
-            if not success:
-                print(f"[!] Warning: auto-sync to remote '{alias}' failed.")
+    auto_remotes = {alias: info for alias, info in remotes.items() if info.get("auto_sync", False)}
+    any_auto = bool(auto_remotes)
+    if any_auto:
+        _queue_sync(md_path, auto_remotes, config)
 
     if not any_auto:
         choice = input("Sync new .md file(s) to a remote? (y/N): ").strip().lower()
         if choice.startswith("y"):
-            _choose_and_sync_remotes(md_path, remotes)
+            _choose_and_sync_remotes(md_path, remotes, config)
     else:
         choice = input("Sync to additional remote(s) as well? (y/N): ").strip().lower()
         if choice.startswith("y"):
-            _choose_and_sync_remotes(md_path, remotes)
+            _choose_and_sync_remotes(md_path, remotes, config)
 
 
-def _choose_and_sync_remotes(md_path: str, remotes: dict):
+def _choose_and_sync_remotes(md_path: str, remotes: dict, config: Optional[dict] = None):
     if not remotes:
         return
     aliases = list(remotes.keys())
@@ -192,11 +263,18 @@ def _choose_and_sync_remotes(md_path: str, remotes: dict):
         except:
             print(f"[!] Invalid selection: {part}")
 
-    for alias in choices:
-        info = remotes[alias]
-        success = rsync_file(md_path, info["ssh_host"], info["remote_dir"], timeout_sec=10)
-        if not success:
-            print(f"[!] Warning: sync to '{alias}' failed.")
+    if choices:
+        _queue_sync(md_path, {alias: remotes[alias] for alias in choices}, config)
+
+
+def _queue_sync(md_path: str, remotes: dict, config: Optional[dict]):
+    """
+    Hand md_path to the durable sync queue; the background worker pushes it
+    (retrying with backoff) while the user moves on to the next conversion.
+    """
+    enqueue_and_kick([md_path], remotes, config)
+    print(f"[info] Queued for sync to {', '.join(remotes.keys())} "
+          f"(see `ezmd sync-status`).")
 
 
 def config_menu(config: dict) -> None:
@@ -257,8 +335,8 @@ def config_menu(config: dict) -> None:
             save_config(config)
             print(f"force_overwrite_default is now {config['force_overwrite_default']}")
         elif choice == "d":
-            new_val = input("Enter default provider name (openai) or blank to disable default: ").strip()
-            if new_val in ["openai"]:
+            new_val = input("Enter default provider name (openai/google_gemini) or blank to disable default: ").strip()
+            if new_val in ["openai", "google_gemini"]:
                 config["default_provider"] = new_val
             else:
                 config["default_provider"] = None
@@ -277,10 +355,12 @@ def providers_submenu(config: dict) -> None:
     provs = config.get("providers", {})
     if "openai" not in provs:
         provs["openai"] = {"enabled": False, "default_model": "gpt-4o-mini"}
+    if "google_gemini" not in provs:
+        provs["google_gemini"] = {"enabled": False, "default_model": "gemini-2.0-flash"}
 
     while True:
         print("\n┌──────────────────────────────────┐")
-        print("│ Manage Providers (OpenAI)      │")
+        print("│ Manage Providers               │")
         print("├──────────────────────────────────┤")
         openai_cfg = provs["openai"]
         en = openai_cfg.get("enabled", False)
@@ -293,12 +373,21 @@ def providers_submenu(config: dict) -> None:
         print(f"    Key in env: {key_str}")
         print(f"    default_model (env): {default_model}")
         print(f"    use LLM for images? {use_llm}")
+        gemini_cfg = provs["google_gemini"]
+        gkey = get_gemini_key()
+        gkey_str = f"<Yes, starts with {gkey[:6]}...>" if gkey else "<No key>"
+        print(f"Google Gemini -> enabled: {gemini_cfg.get('enabled', False)}")
+        print(f"    Key in env: {gkey_str}")
+        print(f"    default_model: {get_gemini_model(config)}")
         print("├──────────────────────────────────┤")
         print("1) Toggle openai enable/disable")
         print("2) Edit openai key")
         print("3) Select default model (gpt-4, gpt-4o, gpt-4o-mini...)")
         print("4) Toggle LLM usage for images")
-        print("5) Return to config menu")
+        print("5) Toggle google_gemini enable/disable")
+        print("6) Edit google gemini key")
+        print("7) Select gemini model (gemini-2.0-flash, gemini-1.5-pro...)")
+        print("8) Return to config menu")
         print("└──────────────────────────────────┘")
 
         choice = input("Select an option: ").strip()
@@ -320,6 +409,23 @@ def providers_submenu(config: dict) -> None:
             current = get_use_llm_img_desc()
             set_use_llm_img_desc(not current)
         elif choice == "5":
+            gemini_cfg["enabled"] = not gemini_cfg.get("enabled", False)
+            provs["google_gemini"] = gemini_cfg
+            config["providers"] = provs
+            save_config(config)
+        elif choice == "6":
+            newkey = input("Enter new google gemini key (blank to remove): ").strip()
+            set_gemini_key(newkey if newkey else "")
+        elif choice == "7":
+            newmodel = input("Enter gemini model (e.g., gemini-2.0-flash): ").strip()
+            if not newmodel:
+                print("[!] Skipped.")
+            else:
+                gemini_cfg["default_model"] = newmodel
+                provs["google_gemini"] = gemini_cfg
+                config["providers"] = provs
+                save_config(config)
+        elif choice == "8":
             break
         else:
             print("[!] Invalid choice")
@@ -0,0 +1,410 @@
+"""
+Watch-folder mode, invoked as `ezmd watch <dir>`.
+
+Files dropped into (or modified in) the directory are converted with
+converter.convert_document, titled after their path relative to the directory.
+
+ - Change detection uses inotify (Linux, through ctypes) and falls back to
+   polling the directory tree every `poll_interval_sec` elsewhere or with --poll.
+ - Events are debounced: a file is converted once it has had no events for
+   `settle_sec` and its size/mtime stopped changing, so half-written copies
+   are never picked up.
+ - Conversions run in a bounded, supervised process pool (`workers`, like
+   `ezmd batch`; see isolation.py for the memory and time limits); a file
+   changed again while it is being converted is re-queued afterwards.
+ - A state file (<config_dir>/watch/<hash of dir>.json) remembers the size,
+   mtime and SHA-256 of every converted file, so a restart only converts what
+   changed in the meantime; a file that was merely touched is not re-converted.
+
+Hidden files and partial downloads (.part, .tmp, .crdownload, ~) are ignored.
+Settings live in the "watch" config section.
+"""
+
+import os
+import sys
+import json
+import time
+import errno
+import select
+import struct
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .config_manager import get_config_path
+from .disk_cache import sha256_file
+
+EXIT_OK = 0
+EXIT_BAD_INPUT = 2
+
+DEFAULT_WATCH_SETTINGS = {
+    "settle_sec": 2.0,
+    "poll_interval_sec": 1.0,
+    "workers": 2,
+    "collision": "overwrite",
+    "recursive": True,
+}
+
+_IGNORED_SUFFIXES = (".part", ".partial", ".tmp", ".crdownload", ".download", "~")
+
+# sys/inotify.h
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")
+
+Signature = Tuple[int, int]  # (size, mtime_ns)
+
+
+def get_watch_settings(config: Optional[dict]) -> dict:
+    settings = dict(DEFAULT_WATCH_SETTINGS)
+    if config:
+        settings.update(config.get("watch", {}) or {})
+    return settings
+
+
+def get_state_path(directory: str) -> str:
+    digest = hashlib.sha256(os.path.abspath(directory).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(os.path.dirname(get_config_path()), "watch", f"{digest}.json")
+
+
+def _is_ignored(name: str) -> bool:
+    return name.startswith(".") or name.lower().endswith(_IGNORED_SUFFIXES)
+
+
+def _signature(path: str) -> Optional[Signature]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _scan_files(directory: str, recursive: bool) -> Iterable[str]:
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+    for entry in entries:
+        if _is_ignored(entry.name):
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            if recursive:
+                yield from _scan_files(entry.path, recursive)
+        elif entry.is_file():
+            yield entry.path
+
+
+class WatchState:
+    """
+    {relative path: {"size", "mtime_ns", "sha256", "md_path"}} for every file
+    converted so far, persisted as JSON (written atomically after each change).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("files", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"[!] Ignoring unreadable watch state {path}: {e}")
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp-{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"files": self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def is_current(self, rel: str, sig: Signature) -> bool:
+        entry = self.entries.get(rel)
+        return entry is not None and (entry["size"], entry["mtime_ns"]) == tuple(sig)
+
+    def same_content(self, rel: str, sha256: str) -> bool:
+        entry = self.entries.get(rel)
+        return entry is not None and entry.get("sha256") == sha256
+
+    def update(self, rel: str, sig: Signature, sha256: str, md_path: Optional[str] = None) -> None:
+        entry = self.entries.setdefault(rel, {})
+        entry.update({"size": sig[0], "mtime_ns": sig[1], "sha256": sha256})
+        if md_path is not None:
+            entry["md_path"] = md_path
+
+
+class _PollingWatcher:
+    """
+    Reports files whose (size, mtime) changed since the previous scan.
+    """
+
+    method = "polling"
+
+    def __init__(self, directory: str, recursive: bool, interval_sec: float):
+        self.directory = directory
+        self.recursive = recursive
+        self.interval_sec = interval_sec
+        self.snapshot = self._snapshot()
+        self.next_scan = time.monotonic() + interval_sec
+
+    def _snapshot(self) -> Dict[str, Signature]:
+        snapshot = {}
+        for path in _scan_files(self.directory, self.recursive):
+            sig = _signature(path)
+            if sig is not None:
+                snapshot[path] = sig
+        return snapshot
+
+    def wait(self, timeout: float) -> List[str]:
+        delay = min(timeout, self.next_scan - time.monotonic())
+        if delay > 0:
+            time.sleep(delay)
+        if time.monotonic() < self.next_scan:
+            return []
+        self.next_scan = time.monotonic() + self.interval_sec
+        old, self.snapshot = self.snapshot, self._snapshot()
+        return [path for path, sig in self.snapshot.items() if old.get(path) != sig]
+
+    def close(self) -> None:
+        pass
+
+
+class _InotifyWatcher:
+    """
+    inotify through libc (no third-party dependency). New subdirectories are
+    watched as they appear; on queue overflow the whole tree is rescanned.
+    """
+
+    method = "inotify"
+
+    def __init__(self, directory: str, recursive: bool):
+        import ctypes
+        import ctypes.util
+
+        self.directory = directory
+        self.recursive = recursive
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._ctypes = ctypes
+        self.watches: Dict[int, str] = {}
+        self._add_tree(directory)
+
+    def _add_watch(self, path: str) -> None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = self._ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise OSError(err, "inotify watch limit reached (fs.inotify.max_user_watches)")
+            raise OSError(err, f"inotify_add_watch failed for {path}")
+        self.watches[wd] = path
+
+    def _add_tree(self, directory: str) -> List[str]:
+        """
+        Watch directory (and its subdirectories); returns the files already in it.
+        """
+        self._add_watch(directory)
+        files = []
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return files
+        for entry in entries:
+            if _is_ignored(entry.name):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if self.recursive:
+                    files.extend(self._add_tree(entry.path))
+            elif entry.is_file():
+                files.append(entry.path)
+        return files
+
+    def wait(self, timeout: float) -> List[str]:
+        ready, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        changed = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + name_len].rstrip(b"\0"))
+            offset += name_len
+
+            if mask & _IN_Q_OVERFLOW:
+                changed.extend(_scan_files(self.directory, self.recursive))
+                continue
+            if mask & _IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            parent = self.watches.get(wd)
+            if parent is None or not name or _is_ignored(name):
+                continue
+            path = os.path.join(parent, name)
+            if mask & _IN_ISDIR:
+                if self.recursive and mask & (_IN_CREATE | _IN_MOVED_TO):
+                    try:
+                        changed.extend(self._add_tree(path))
+                    except OSError as e:
+                        print(f"[!] Cannot watch {path}: {e}")
+                continue
+            changed.append(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def _make_watcher(directory: str, settings: dict, force_poll: bool):
+    if not force_poll and sys.platform.startswith("linux"):
+        try:
+            return _InotifyWatcher(directory, settings["recursive"])
+        except (OSError, AttributeError) as e:
+            print(f"[info] inotify unavailable ({e}); falling back to polling.")
+    return _PollingWatcher(directory, settings["recursive"], float(settings["poll_interval_sec"]))
+
+
+def _title_for(rel: str) -> str:
+    stem, _ = os.path.splitext(rel)
+    return stem.replace(os.sep, "_")
+
+
+def run_watch(
+    directory: str,
+    config: dict,
+    workers: Optional[int] = None,
+    collision_policy: Optional[str] = None,
+    provider: Optional[str] = None,
+    use_cache: bool = True,
+    force_poll: bool = False,
+    state_path: Optional[str] = None,
+    profile: bool = False,
+) -> int:
+    """
+    Watch `directory` until interrupted. Returns the process exit code.
+    """
+    from .batch import job_result, run_job
+    from .isolation import SupervisedPool
+
+    directory = os.path.abspath(os.path.expanduser(directory))
+    if not os.path.isdir(directory):
+        print(f"[!] Not a directory: {directory}")
+        return EXIT_BAD_INPUT
+
+    settings = get_watch_settings(config)
+    settle_sec = float(settings["settle_sec"])
+    workers = max(1, workers or int(settings["workers"]))
+    collision_policy = collision_policy or settings["collision"]
+    if provider is None:
+        provider = config.get("default_provider") or ""
+
+    state = WatchState(state_path or get_state_path(directory))
+    watcher = _make_watcher(directory, settings, force_poll)
+    print(f"[info] Watching {directory} ({watcher.method}, {workers} worker(s), "
+          f"settle {settle_sec:g}s). Ctrl-C to stop.")
+
+    # path -> (deadline, signature at the last event)
+    pending: Dict[str, Tuple[float, Optional[Signature]]] = {}
+    ready: List[str] = []
+    in_flight: Dict[str, tuple] = {}  # path -> (future, job, signature, sha256)
+    changed_again = set()
+    job_index = 0
+
+    def note(path: str) -> None:
+        if path in in_flight:
+            changed_again.add(path)
+        pending[path] = (time.monotonic() + settle_sec, _signature(path))
+
+    # anything that changed while we were not running
+    for path in _scan_files(directory, settings["recursive"]):
+        note(path)
+
+    pool = SupervisedPool(workers, config)
+    try:
+        while True:
+            now = time.monotonic()
+            timeout = min((d for d, _ in pending.values()), default=now + 1.0) - now
+            if in_flight:
+                timeout = min(timeout, 0.2)
+            for path in watcher.wait(max(0.0, timeout)):
+                note(path)
+
+            # promote files whose writes have settled
+            now = time.monotonic()
+            for path, (deadline, sig) in list(pending.items()):
+                if deadline > now:
+                    continue
+                current = _signature(path)
+                if current is None:
+                    del pending[path]
+                elif current != sig:
+                    pending[path] = (now + settle_sec, current)
+                else:
+                    # files still being converted are re-queued once they finish
+                    del pending[path]
+                    if path not in in_flight and path not in ready:
+                        ready.append(path)
+
+            # collect finished conversions
+            for path, (fut, job, sig, sha) in list(in_flight.items()):
+                if not fut.done():
+                    continue
+                del in_flight[path]
+                res = job_result(job, fut)
+                rel = os.path.relpath(path, directory)
+                if res["status"] == "ok":
+                    print(f"[+] {rel} -> {res['md_path']} [{res['elapsed_sec']}s]")
+                    state.update(rel, sig, sha, res["md_path"])
+                    state.save()
+                elif res["status"] == "skipped":
+                    print(f"[-] {rel} skipped: {res['error']}")
+                    state.update(rel, sig, sha)
+                    state.save()
+                else:
+                    print(f"[!] {rel} failed: {res['error']}")
+                if path in changed_again:
+                    changed_again.discard(path)
+                    pending.setdefault(path, (time.monotonic() + settle_sec, _signature(path)))
+
+            # hand settled files to the pool, at most `workers` at a time
+            while ready and len(in_flight) < workers:
+                path = ready.pop(0)
+                rel = os.path.relpath(path, directory)
+                sig = _signature(path)
+                if sig is None or state.is_current(rel, sig):
+                    continue
+                try:
+                    sha = sha256_file(path)
+                except OSError as e:
+                    print(f"[!] Cannot read {rel}: {e}")
+                    continue
+                if state.same_content(rel, sha):
+                    # touched, not changed
+                    state.update(rel, sig, sha)
+                    state.save()
+                    continue
+                job_index += 1
+                job = {"index": job_index, "title": _title_for(rel), "source": path, "provider": provider}
+                fut = pool.submit(run_job, job, config, collision_policy, use_cache, profile)
+                in_flight[path] = (fut, job, sig, sha)
+    except KeyboardInterrupt:
+        print("\n[info] Stopping watch...")
+    finally:
+        watcher.close()
+        pool.shutdown(wait=False, cancel_futures=True)
+    return EXIT_OK
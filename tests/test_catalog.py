@@ -0,0 +1,89 @@
+"""
+Conversion catalog (catalog.py): a document whose content was already
+converted is linked under its new name (or skipped) instead of being
+converted again.
+
+Run from the repo root: python -m pytest tests
+"""
+
+import os
+import sqlite3
+
+import pytest
+
+from ezmd import converter
+from ezmd.catalog import get_catalog_path
+from ezmd.converter import ConversionSkipped, convert_document
+
+TEXT = "Meeting notes\n\nSame content, two names.\n"
+
+
+@pytest.fixture
+def sources(tmp_path):
+    paths = []
+    for name in ["notes.txt", "notes copy.txt"]:
+        path = tmp_path / "in" / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(TEXT)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    calls = []
+    render = converter._render_markdown
+
+    def counting_render(document, *args, **kwargs):
+        calls.append(document)
+        return render(document, *args, **kwargs)
+
+    monkeypatch.setattr(converter, "_render_markdown", counting_render)
+    return calls
+
+
+def _config(tmp_path, duplicates: str = "link") -> dict:
+    return {
+        "base_context_dir": str(tmp_path / "context"),
+        "catalog": {"duplicates": duplicates},
+        "conversion_cache": {"enabled": False},
+        "metrics": {"enabled": False},
+    }
+
+
+def _convert(title: str, source: str, config: dict) -> str:
+    return convert_document(title, source, config, provider="", overwrite=False, collision_policy="skip")
+
+
+def test_duplicate_hash_is_linked_instead_of_converted(tmp_path, sources, renders):
+    config = _config(tmp_path)
+    first = _convert("Notes", sources[0], config)
+    second = _convert("Notes copy", sources[1], config)
+
+    assert len(renders) == 1
+    assert second != first
+    assert os.path.samefile(first, second)
+
+    with sqlite3.connect(get_catalog_path(config)) as conn:
+        rows = conn.execute("SELECT id, md_path, duplicate_of FROM documents ORDER BY id").fetchall()
+    assert [(md, dup) for _, md, dup in rows] == [(first, None), (second, rows[0][0])]
+
+
+def test_skip_policy_skips_the_duplicate(tmp_path, sources, renders):
+    config = _config(tmp_path, duplicates="skip")
+    first = _convert("Notes", sources[0], config)
+    with pytest.raises(ConversionSkipped, match="Already converted"):
+        _convert("Notes copy", sources[1], config)
+
+    assert len(renders) == 1
+    # no output (or empty placeholder) is left for the skipped document
+    assert not os.path.exists(os.path.join(os.path.dirname(first), "Notes copy.md"))
+
+
+def test_convert_policy_converts_again(tmp_path, sources, renders):
+    config = _config(tmp_path, duplicates="convert")
+    first = _convert("Notes", sources[0], config)
+    second = _convert("Notes copy", sources[1], config)
+
+    assert len(renders) == 2
+    assert not os.path.samefile(first, second)
@@ -0,0 +1,39 @@
+"""
+`ezmd submit` (daemon.submit): local paths are made absolute for the daemon,
+which has its own working directory; other sources are passed through.
+
+Run from the repo root: python -m pytest tests
+"""
+
+import os
+
+import pytest
+
+from ezmd import daemon
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    messages = []
+
+    def request(msg, socket_path=None):
+        messages.append(msg)
+        return {"status": "ok", "md_path": "/ctx/out.md"}
+
+    monkeypatch.setattr(daemon, "request", request)
+    return messages
+
+
+def test_relative_local_path_is_made_absolute(sent, tmp_path, monkeypatch):
+    (tmp_path / "paper.pdf").write_bytes(b"%PDF-1.4\n")
+    monkeypatch.chdir(tmp_path)
+    assert daemon.submit("Paper", "paper.pdf") == daemon.EXIT_OK
+    assert sent[0]["source"] == os.path.join(str(tmp_path), "paper.pdf")
+
+
+@pytest.mark.parametrize("source", ["2306.02564", "arxiv.org/abs/2306.02564",
+                                    "https://example.com/doc.pdf"])
+def test_non_path_sources_are_passed_through(sent, tmp_path, monkeypatch, source):
+    monkeypatch.chdir(tmp_path)
+    assert daemon.submit("Paper", source) == daemon.EXIT_OK
+    assert sent[0]["source"] == source
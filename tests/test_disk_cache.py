@@ -0,0 +1,56 @@
+"""
+Size-bounded on-disk LRU cache (disk_cache.py): hits, misses and which
+entries are evicted first.
+
+Run from the repo root: python -m pytest tests
+"""
+
+import os
+import time
+
+from ezmd.disk_cache import DiskLRUCache
+
+
+def _age(cache: DiskLRUCache, key: str, seconds_ago: float) -> None:
+    # recency is the entry's mtime; set it explicitly rather than sleeping
+    t = time.time() - seconds_ago
+    os.utime(cache._entry_path(key), (t, t))
+
+
+def test_hit_and_miss(tmp_path):
+    cache = DiskLRUCache(str(tmp_path), 1024, suffix=".md")
+    assert cache.get("missing") is None
+    assert cache.path_for("missing") is None
+
+    cache.put("key", b"# converted\n")
+    assert cache.get("key") == b"# converted\n"
+    assert cache.path_for("key") == str(tmp_path / "key.md")
+
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path):
+    cache = DiskLRUCache(str(tmp_path), 300)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.put(key, b"x" * 100)
+        _age(cache, key, 100 - i * 10)  # a oldest, then b, then c
+
+    # a hit makes "a" the most recently used entry
+    assert cache.get("a") is not None
+    cache.put("d", b"x" * 100)
+
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in ["a", "c", "d"])
+
+    _age(cache, "c", 50)
+    _age(cache, "a", 40)
+    _age(cache, "d", 30)
+    cache.put("e", b"x" * 150)
+    # 450 bytes: dropping "c" is not enough, "a" goes too
+    assert [key for key in "acde" if cache.get(key) is not None] == ["d", "e"]
+
+
+def test_another_writers_temp_file_is_neither_counted_nor_evicted(tmp_path):
+    cache = DiskLRUCache(str(tmp_path), 100)
+    (tmp_path / ".tmp-inflight").write_bytes(b"x" * 1000)
+    cache.put("key", b"x" * 50)
+    assert cache.get("key") == b"x" * 50
+    assert (tmp_path / ".tmp-inflight").exists()
@@ -0,0 +1,69 @@
+"""
+Built-in converters for text and CSV (fast_paths.py): their output must be
+exactly what MarkItDown produces for the same file.
+
+Run from the repo root: python -m pytest tests
+"""
+
+import io
+
+import pytest
+
+from ezmd import fast_paths
+
+markitdown = pytest.importorskip("markitdown")
+
+DOCUMENTS = {
+    "plain.txt": b"First line   \nsecond\tline\t\n\n\n\nafter blank lines\n",
+    "no-final-newline.txt": b"no newline at the end",
+    "carriage-returns.txt": b"windows\r\nline endings\r\nand a stray\rcarriage return\r\n",
+    "empty.txt": b"",
+    "unicode.md": "# Überschrift\n\n- naïve café ✓\n- 東京\n".encode("utf-8"),
+    "data.json": b'{\n  "name": "ezmd",\n  "tags": ["a", "b"]   \n}\n',
+    "records.jsonl": b'{"id": 1}\n{"id": 2}\n\n\n{"id": 3}\n',
+    "table.csv": b"name,value,note\nalpha,1,plain\nbeta,2,\"has, comma\"\n",
+    "pipes.csv": b'col|a,col b\n"x | y","back\\\\|slash"\n',
+    "ragged.csv": b"a,b,c\n1\n1,2\n1,2,3,4\n",
+    "multiline-cells.csv": b'title,body\n"one","line one\nline two"\n"two","crlf\r\ninside"\r\n',
+    "blank-rows.csv": b"\n\nh1,h2\n\n\nv1,v2\n\nv3,v4\n\n\n",
+    "header-only.csv": b"h1,h2\n",
+    "empty.csv": b"",
+}
+
+
+@pytest.fixture(scope="module")
+def md():
+    return markitdown.MarkItDown()
+
+
+@pytest.mark.parametrize("name", sorted(DOCUMENTS))
+def test_output_matches_markitdown(md, tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(DOCUMENTS[name])
+    extension = path.suffix
+
+    with open(path, "rb") as stream:
+        kind = fast_paths.route(stream, extension)
+        assert kind is not None
+        ours = fast_paths.convert(kind, stream)
+
+    assert ours == md.convert(str(path)).text_content
+
+
+def test_leading_bom_is_dropped():
+    stream = io.BytesIO(b"\xef\xbb\xbfhello\n")
+    assert fast_paths.convert("text", stream) == "hello\n"
+
+
+@pytest.mark.parametrize("kind", ["text", "csv"])
+def test_non_utf8_input_falls_back(kind):
+    stream = io.BytesIO("café,crème\n".encode("latin-1"))
+    with pytest.raises(fast_paths.NotFastPath):
+        fast_paths.convert(kind, stream)
+
+
+def test_binary_content_is_not_routed():
+    stream = io.BytesIO(b"%PDF-1.4\n\x00\x01\x02\xff binary")
+    assert fast_paths.route(stream, ".txt") is None
+    assert stream.tell() == 0
+    assert fast_paths.route(io.BytesIO(b"text"), ".pdf") is None
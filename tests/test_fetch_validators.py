@@ -0,0 +1,111 @@
+"""
+Conditional re-fetching of URL sources (fetch_validators.py): the ETag and
+Last-Modified of a download are stored, sent back on the next fetch of the
+same URL, and a 304 reuses the raw file (and output) from last time.
+
+Run from the repo root: python -m pytest tests
+"""
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from ezmd.converter import convert_document
+from ezmd.downloader import DownloadEngine
+from ezmd.fetch_validators import FetchValidatorStore
+
+BODY = b"# Notes\n\nServed over HTTP.\n"
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+class _ConditionalHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == server.etag:
+            server.statuses.append(304)
+            self.send_response(304)
+            self.send_header("ETag", server.etag)
+            self.end_headers()
+            return
+        server.statuses.append(200)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/markdown")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.send_header("ETag", server.etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _ConditionalHandler)
+    srv.daemon_threads = True
+    srv.etag = ETAG
+    srv.requests = []
+    srv.statuses = []
+    srv.url = f"http://127.0.0.1:{srv.server_address[1]}/notes.md"
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    try:
+        yield srv
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+
+def test_304_reuses_the_stored_raw_file(server, tmp_path):
+    config = {"base_context_dir": str(tmp_path)}
+    store = FetchValidatorStore(config)
+    engine = DownloadEngine(retries=0)
+    first, second = str(tmp_path / "first.md"), str(tmp_path / "second.md")
+
+    assert engine.fetch(server.url, first, store) == len(BODY)
+    record = store.lookup(server.url)
+    assert (record["etag"], record["last_modified"]) == (ETAG, LAST_MODIFIED)
+
+    assert engine.fetch(server.url, second, store) is None
+    assert server.statuses == [200, 304]
+    assert server.requests[1]["If-None-Match"] == ETAG
+    assert server.requests[1]["If-Modified-Since"] == LAST_MODIFIED
+    with open(second, "rb") as f:
+        assert f.read() == BODY
+
+
+def test_modified_raw_file_is_not_trusted(server, tmp_path):
+    config = {"base_context_dir": str(tmp_path)}
+    store = FetchValidatorStore(config)
+    engine = DownloadEngine(retries=0)
+    raw = str(tmp_path / "raw.md")
+
+    engine.fetch(server.url, raw, store)
+    with open(raw, "ab") as f:
+        f.write(b"edited locally\n")
+    assert store.lookup(server.url) is None
+
+    # so the next fetch is unconditional and downloads the body again
+    assert engine.fetch(server.url, str(tmp_path / "again.md"), store) == len(BODY)
+    assert "If-None-Match" not in server.requests[1]
+    assert server.statuses == [200, 200]
+
+
+def test_304_reuses_the_earlier_output(server, tmp_path):
+    config = {"base_context_dir": str(tmp_path / "context"), "metrics": {"enabled": False}}
+
+    first = convert_document("Notes", server.url, config, provider="", overwrite=False,
+                             collision_policy="skip")
+    second = convert_document("Notes again", server.url, config, provider="", overwrite=False,
+                              collision_policy="skip")
+
+    assert server.statuses == [200, 304]
+    assert second != first
+    # the unchanged document is linked under the new title, not converted again
+    assert os.path.samefile(first, second)
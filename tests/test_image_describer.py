@@ -0,0 +1,195 @@
+"""
+Concurrent image descriptions (image_describer.py) against a local stub server
+that stands in for the OpenAI chat completions API.
+
+The stub identifies each image by the SHA-256 of its bytes, so tests can give
+every image its own latency, make it answer 429 first, and check which
+description ended up where.
+
+Run from the repo root: python -m pytest tests
+"""
+
+import base64
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+openai = pytest.importorskip("openai")
+
+from ezmd.disk_cache import DiskLRUCache
+from ezmd.image_describer import (
+    DEFAULT_IMAGE_DESCRIPTION_SETTINGS,
+    ImageDescriber,
+    prefetch_image_descriptions,
+)
+from ezmd.llm_cache import CachingLLMClient
+
+MODEL = "stub-vision"
+
+
+class _StubState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.default_delay = 0.2
+        self.delays = {}  # image sha256 -> seconds before answering
+        self.names = {}  # image sha256 -> name used in the description
+        self.rate_limited = {}  # image sha256 -> Retry-After value of its first (429) answer
+        self.calls = []  # (image sha256, monotonic time, status)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+
+class _StubOpenAIHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        state = self.server.state
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        data_uri = next(part["image_url"]["url"] for part in body["messages"][0]["content"]
+                        if part["type"] == "image_url")
+        key = hashlib.sha256(base64.b64decode(data_uri.split(",", 1)[1])).hexdigest()
+
+        with state.lock:
+            retry_after = state.rate_limited.pop(key, None)
+            state.calls.append((key, time.monotonic(), 429 if retry_after is not None else 200))
+            if retry_after is None:
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        if retry_after is not None:
+            self._reply(429, {"error": {"message": "Rate limit reached", "type": "requests",
+                                        "code": "rate_limit_exceeded"}},
+                        {"Retry-After": str(retry_after)})
+            return
+
+        time.sleep(state.delays.get(key, state.default_delay))
+        with state.lock:
+            state.in_flight -= 1
+        self._reply(200, {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": f"Description of {state.names.get(key, key[:8])}"},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        })
+
+    def _reply(self, status: int, payload: dict, headers: dict = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubOpenAIHandler)
+    server.daemon_threads = True
+    server.state = _StubState()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # max_retries=0: retries on 429 must come from ImageDescriber, not the SDK
+    client = openai.OpenAI(api_key="test-key", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+                           max_retries=0)
+    try:
+        yield client, server.state
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _settings(**overrides) -> dict:
+    settings = dict(DEFAULT_IMAGE_DESCRIPTION_SETTINGS)
+    settings.update(overrides)
+    return settings
+
+
+def _images(state: _StubState, count: int) -> list:
+    images = []
+    for i in range(count):
+        data = f"image {i}".encode("utf-8")
+        state.names[hashlib.sha256(data).hexdigest()] = f"image {i}"
+        images.append((f"image{i}.png", data, "image/png"))
+    return images
+
+
+def test_requests_overlap_up_to_concurrency(stub):
+    client, state = stub
+    images = _images(state, 8)
+    describer = ImageDescriber(client, MODEL, _settings(concurrency=4))
+
+    start = time.monotonic()
+    results = describer.describe_all(images)
+    elapsed = time.monotonic() - start
+
+    assert results == [f"Description of image {i}" for i in range(8)]
+    assert 1 < state.max_in_flight <= 4
+    # one at a time would take 8 x 0.2s
+    assert elapsed < 8 * state.default_delay * 0.75
+
+
+def test_429_is_retried_after_retry_after(stub):
+    client, state = stub
+    images = _images(state, 3)
+    limited = hashlib.sha256(images[1][1]).hexdigest()
+    state.rate_limited[limited] = 0.5
+    # backoff without Retry-After would wait 30s
+    describer = ImageDescriber(client, MODEL, _settings(concurrency=3, backoff_base_sec=30, max_retries=2))
+
+    start = time.monotonic()
+    results = describer.describe_all(images)
+    elapsed = time.monotonic() - start
+
+    assert results == ["Description of image 0", "Description of image 1", "Description of image 2"]
+    attempts = [(t, status) for key, t, status in state.calls if key == limited]
+    assert [status for _, status in attempts] == [429, 200]
+    assert attempts[1][0] - attempts[0][0] >= 0.5
+    assert elapsed < 5
+
+
+def test_descriptions_merged_back_in_document_order(stub, tmp_path):
+    pytest.importorskip("pptx")
+    markitdown = pytest.importorskip("markitdown")
+    from pptx import Presentation
+    from pptx.util import Inches
+    from benchmarks.corpus import write_png
+
+    client, state = stub
+    slides = 6
+    prs = Presentation()
+    for i in range(slides):
+        png = tmp_path / f"figure{i}.png"
+        write_png(str(png), 32, 32, seed=i)
+        key = hashlib.sha256(png.read_bytes()).hexdigest()
+        state.names[key] = f"figure {i}"
+        # later slides answer first, so completion order is the reverse of document order
+        state.delays[key] = 0.05 * (slides - i)
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        slide.shapes.add_picture(str(png), Inches(1), Inches(1))
+    deck = str(tmp_path / "deck.pptx")
+    prs.save(deck)
+
+    cached_client = CachingLLMClient(client, DiskLRUCache(str(tmp_path / "cache"), 1024 * 1024, suffix=".txt"))
+    config = {"image_description": {"concurrency": slides}}
+    assert prefetch_image_descriptions(deck, cached_client, MODEL, config) == slides
+    assert state.max_in_flight > 1
+
+    markdown = markitdown.MarkItDown(llm_client=cached_client, llm_model=MODEL).convert(deck).text_content
+
+    # MarkItDown asked for every image again and got each from the cache
+    assert len(state.calls) == slides
+    assert cached_client.hits == slides
+    positions = [markdown.find(f"Description of figure {i}") for i in range(slides)]
+    assert all(pos >= 0 for pos in positions)
+    assert positions == sorted(positions)
@@ -0,0 +1,108 @@
+"""
+Ingesting local sources into raw/ (ingest.py): each mode uses its cheap
+mechanism where it works and falls back (hardlink -> reflink -> copy,
+reflink -> copy) where it doesn't, without leaving temp files behind.
+
+Run from the repo root: python -m pytest tests
+"""
+
+import errno
+import os
+
+import pytest
+
+from ezmd import ingest
+from ezmd.ingest import ingest_local_file
+
+DATA = b"%PDF-1.4\nsource document\n"
+
+
+@pytest.fixture
+def src(tmp_path):
+    path = tmp_path / "source.pdf"
+    path.write_bytes(DATA)
+    return str(path)
+
+
+def _failing(err: int, writes_partial: bool = False):
+    def method(source, dest):
+        if writes_partial:
+            with open(dest, "wb") as f:
+                f.write(b"partial")
+        raise OSError(err, os.strerror(err))
+    return method
+
+
+def _unsupported(monkeypatch, *methods, writes_partial=False):
+    for name in methods:
+        monkeypatch.setitem(ingest._METHODS, name, _failing(errno.EOPNOTSUPP, writes_partial))
+
+
+def _leftovers(directory) -> list:
+    return [name for name in os.listdir(directory) if ".ingest-" in name]
+
+
+def test_hardlink_shares_the_inode(src, tmp_path):
+    dest = str(tmp_path / "raw.pdf")
+    assert ingest_local_file(src, dest, "hardlink") == "hardlink"
+    assert os.path.samefile(src, dest)
+
+
+def test_hardlink_across_filesystems_falls_back_to_reflink(src, tmp_path, monkeypatch):
+    monkeypatch.setitem(ingest._METHODS, "hardlink", _failing(errno.EXDEV))
+    cloned = []
+    monkeypatch.setitem(ingest._METHODS, "reflink", lambda s, d: cloned.append(d) or ingest._copy(s, d))
+
+    dest = str(tmp_path / "raw.pdf")
+    assert ingest_local_file(src, dest, "hardlink") == "reflink"
+    assert len(cloned) == 1
+    assert not os.path.samefile(src, dest)
+
+
+@pytest.mark.parametrize("mode", ["reflink", "hardlink"])
+def test_falls_back_to_copy_without_leaving_temp_files(src, tmp_path, monkeypatch, mode):
+    # a failed clone can leave a partial destination behind
+    _unsupported(monkeypatch, "hardlink", "reflink", writes_partial=True)
+
+    dest = tmp_path / "raw.pdf"
+    assert ingest_local_file(src, str(dest), mode) == "copy"
+    assert dest.read_bytes() == DATA
+    assert not os.path.samefile(src, str(dest))
+    assert _leftovers(tmp_path) == []
+
+
+def test_reflink_result_is_independent_of_the_source(src, tmp_path):
+    # a real clone where the filesystem supports it, a copy elsewhere
+    dest = tmp_path / "raw.pdf"
+    assert ingest_local_file(src, str(dest), "reflink") in ("reflink", "copy")
+    with open(src, "ab") as f:
+        f.write(b"edited later\n")
+    assert dest.read_bytes() == DATA
+
+
+def test_symlink_points_at_the_absolute_source(src, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dest = str(tmp_path / "raw.pdf")
+    assert ingest_local_file(os.path.basename(src), dest, "symlink") == "symlink"
+    assert os.readlink(dest) == src
+
+
+def test_existing_hardlinked_dest_is_replaced_not_written_through(src, tmp_path):
+    other = tmp_path / "other.pdf"
+    other.write_bytes(b"another document\n")
+    dest = str(tmp_path / "raw.pdf")
+    os.link(str(other), dest)
+
+    ingest_local_file(src, dest, "copy")
+
+    assert other.read_bytes() == b"another document\n"
+    with open(dest, "rb") as f:
+        assert f.read() == DATA
+
+
+def test_copy_failure_is_raised(src, tmp_path, monkeypatch):
+    _unsupported(monkeypatch, "reflink", "copy", writes_partial=True)
+    with pytest.raises(OSError):
+        ingest_local_file(src, str(tmp_path / "raw.pdf"), "reflink")
+    assert _leftovers(tmp_path) == []
+    assert not (tmp_path / "raw.pdf").exists()
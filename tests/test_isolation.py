@@ -0,0 +1,112 @@
+"""
+Supervised worker processes (isolation.py): a job that runs out of memory,
+hangs or crashes fails with WorkerFailed and a structured record, and the
+pool carries on with a fresh worker.
+
+Run from the repo root: python -m pytest tests
+"""
+
+import os
+import time
+
+import pytest
+
+from ezmd.isolation import SupervisedPool, WorkerFailed, claim_for_job
+
+MB = 1024 * 1024
+
+
+def _config(**limits) -> dict:
+    settings = {"memory_mb": 0, "max_rss_mb": 0, "timeout_sec": 0, "max_jobs_per_worker": 0}
+    settings.update(limits)
+    return {"isolation": settings}
+
+
+def _vm_mb() -> int:
+    # a forked worker starts with this much address space already mapped
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE") // MB
+
+
+def _rss_mb() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // MB
+
+
+def _allocate(mb: int) -> int:
+    return len(bytearray(mb * MB))
+
+
+def _hold(mb: int, seconds: float) -> int:
+    data = b"x" * (mb * MB)  # touched, so it counts towards RSS
+    time.sleep(seconds)
+    return len(data)
+
+
+def _claim_and_hang(path: str) -> None:
+    with open(path, "w"):
+        pass
+    claim_for_job(path)
+    time.sleep(30)
+
+
+def _exit(code: int) -> None:
+    os._exit(code)
+
+
+def _fail() -> None:
+    raise ValueError("bad document")
+
+
+def _pid() -> int:
+    return os.getpid()
+
+
+pytestmark = pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="needs Linux /proc")
+
+
+def test_worker_over_memory_mb_fails_with_a_memory_record():
+    memory_mb = _vm_mb() + 256
+    with SupervisedPool(1, _config(memory_mb=memory_mb)) as pool:
+        with pytest.raises(WorkerFailed) as info:
+            pool.submit(_allocate, 1024).result(timeout=60)
+        assert info.value.record["kind"] == "memory"
+        assert str(memory_mb) in info.value.record["message"]
+
+        # a fresh worker takes the next job
+        assert pool.submit(_allocate, 16).result(timeout=60) == 16 * MB
+
+
+def test_worker_over_max_rss_mb_is_killed():
+    max_rss_mb = _rss_mb() + 64
+    with SupervisedPool(1, _config(max_rss_mb=max_rss_mb)) as pool:
+        with pytest.raises(WorkerFailed) as info:
+            pool.submit(_hold, 256, 30).result(timeout=60)
+    record = info.value.record
+    assert record["kind"] == "memory"
+    assert record["peak_rss_mb"] > max_rss_mb
+
+
+def test_hung_job_times_out_and_its_claims_are_removed(tmp_path):
+    placeholder = str(tmp_path / "out.md")
+    start = time.monotonic()
+    with SupervisedPool(1, _config(timeout_sec=1)) as pool:
+        with pytest.raises(WorkerFailed) as info:
+            pool.submit(_claim_and_hang, placeholder).result(timeout=60)
+    assert info.value.record["kind"] == "timeout"
+    assert time.monotonic() - start < 15
+    assert not os.path.exists(placeholder)
+
+
+def test_crash_and_exception_are_reported_separately():
+    with SupervisedPool(1, _config()) as pool:
+        first_pid = pool.submit(_pid).result(timeout=60)
+        with pytest.raises(WorkerFailed) as info:
+            pool.submit(_exit, 3).result(timeout=60)
+        assert info.value.record["kind"] == "crashed"
+        assert info.value.record["exit_code"] == 3
+
+        # the job's own exception comes back unchanged
+        with pytest.raises(ValueError, match="bad document"):
+            pool.submit(_fail).result(timeout=60)
+        assert pool.submit(_pid).result(timeout=60) != first_pid
@@ -0,0 +1,29 @@
+"""
+Opening the menus must not import the conversion stack: `import ezmd.main`
+in a fresh interpreter leaves markitdown, requests, openai (and the other
+heavy dependencies) unloaded. See also python -m benchmarks.bench_startup.
+
+Run from the repo root: python -m pytest tests
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.bench_startup import HEAVY_MODULES
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_main_loads_no_heavy_modules():
+    code = "import json, sys, ezmd.main; print(json.dumps(sorted(sys.modules)))"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])))
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                          cwd=REPO_ROOT, env=env, check=True)
+    loaded = set(json.loads(proc.stdout))
+
+    assert "ezmd.main" in loaded
+    watched = set(HEAVY_MODULES) | {"markitdown", "requests", "openai"}
+    heavy = {name for name in loaded if any(name == h or name.startswith(h + ".") for h in watched)}
+    assert heavy == set()
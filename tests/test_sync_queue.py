@@ -0,0 +1,89 @@
+"""
+Durable sync queue (sync_queue.py): drains claim their rows, so concurrent
+drains never push the same file twice. rsync is replaced by a recording stub.
+
+Run from the repo root: python -m pytest tests
+"""
+
+import threading
+import time
+
+import pytest
+
+from ezmd import rsync_manager
+from ezmd.sync_queue import SyncQueue, drain_once
+
+REMOTES = {"box": {"ssh_host": "box", "remote_dir": "/srv/context"}}
+
+
+@pytest.fixture
+def queue(tmp_path):
+    files = []
+    for i in range(5):
+        path = tmp_path / f"doc{i}.md"
+        path.write_text(f"doc {i}\n")
+        files.append(str(path))
+    q = SyncQueue(str(tmp_path / "sync_queue.db"))
+    q.enqueue(files, REMOTES)
+    return q
+
+
+def _stub_push(monkeypatch, ok=True, delay=0.0):
+    pushed = []
+
+    def push_file_groups(groups, config=None, timeout_sec=None):
+        time.sleep(delay)
+        results = []
+        for alias, (_, files) in groups.items():
+            pushed.extend(files)
+            results.append({"alias": alias, "ok": ok, "bytes": 0, "latency_sec": delay,
+                            "error": None if ok else "connection refused"})
+        return results
+
+    monkeypatch.setattr(rsync_manager, "push_file_groups", push_file_groups)
+    return pushed
+
+
+def test_concurrent_drains_push_each_file_once(queue, monkeypatch):
+    pushed = _stub_push(monkeypatch, delay=0.2)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(drain_once(queue, None)))
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(pushed) == sorted(set(pushed))
+    assert len(pushed) == 5
+    assert queue.counts() == {}
+
+
+def test_claimed_rows_are_skipped_until_the_lease_expires(queue):
+    now = time.time()
+    claimed = queue.claim_due(lease_sec=60, now=now)
+    assert len(claimed) == 5
+    assert queue.counts() == {"in_flight": 5}
+    assert queue.claim_due(lease_sec=60, now=now + 30) == []
+    # the drain holding the claim died; another takes it over
+    assert len(queue.claim_due(lease_sec=60, now=now + 61)) == 5
+
+
+def test_failure_is_flagged_only_the_first_time(queue, monkeypatch):
+    _stub_push(monkeypatch, ok=False)
+    first = drain_once(queue, None, ignore_backoff=True)
+    assert [(r["ok"], r["first_failure"]) for r in first] == [(False, True)]
+    assert queue.counts() == {"pending": 5}
+
+    again = drain_once(queue, None, ignore_backoff=True)
+    assert [(r["ok"], r["first_failure"]) for r in again] == [(False, False)]
+
+
+def test_claim_is_released_when_the_push_raises(queue, monkeypatch):
+    def push_file_groups(groups, config=None, timeout_sec=None):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(rsync_manager, "push_file_groups", push_file_groups)
+    with pytest.raises(KeyboardInterrupt):
+        drain_once(queue, None)
+    assert queue.counts() == {"pending": 5}
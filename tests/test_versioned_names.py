@@ -0,0 +1,58 @@
+"""
+Versioned output names (converter._next_version_path): "<name>_vN" comes
+from a per-directory index and is claimed with O_EXCL, so concurrent jobs,
+in threads or in separate processes with their own index, never get the
+same name.
+
+Run from the repo root: python -m pytest tests
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from ezmd import converter
+from ezmd.converter import _next_version_path, _resolve_collision_path
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    converter._version_index.clear()
+    yield
+    converter._version_index.clear()
+
+
+def _reserve_versions(path: str, count: int) -> list:
+    return [_resolve_collision_path(path, False, "version") for _ in range(count)]
+
+
+def test_existing_versions_are_skipped(tmp_path):
+    for name in ["doc.md", "doc_v2.md", "doc_v7.md", "other_v9.md"]:
+        (tmp_path / name).write_text("")
+    reserved = []
+    assert _next_version_path(str(tmp_path / "doc.md"), reserved) == str(tmp_path / "doc_v8.md")
+    assert reserved == [str(tmp_path / "doc_v8.md")]
+    assert (tmp_path / "doc_v8.md").exists()
+
+
+def test_concurrent_threads_get_distinct_names(tmp_path):
+    path = str(tmp_path / "doc.md")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        names = [n for batch in pool.map(_reserve_versions, [path] * 8, [5] * 8) for n in batch]
+
+    assert len(names) == len(set(names)) == 40
+    assert path in names
+    assert all(os.path.exists(n) for n in names)
+
+
+def test_concurrent_processes_get_distinct_names(tmp_path):
+    (tmp_path / "doc.md").write_text("")
+    path = str(tmp_path / "doc.md")
+    # every process builds its own index, so only O_EXCL keeps them apart
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        names = [n for batch in pool.map(_reserve_versions, [path] * 8, [10] * 8) for n in batch]
+
+    assert len(names) == len(set(names)) == 80
+    assert path not in names
+    assert sorted(os.listdir(tmp_path)) == sorted(["doc.md"] + [os.path.basename(n) for n in names])